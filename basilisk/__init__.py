@@ -41,6 +41,32 @@ A simple example:
 
 """
 from .fields import MapField, JsonMapField
-from .redis_entities import RedisModel, RedisList, RedisHash, RedisSortedSet, RedisModelException
-from .elasticsearch_entities import ElasticsearchModelException, ElasticsearchModel
 from .base import Config, MapModelBase
+from .batching import batch
+from .cache import NearCache
+from .query import RedisQuery
+from .routing import use_primary
+from . import backends
+
+__all__ = ['MapField', 'JsonMapField', 'Config', 'MapModelBase', 'batch', 'NearCache', 'RedisQuery',
+           'use_primary'] + sorted(backends.EXPORTS)
+
+
+def __getattr__(name):
+    """
+    Models and proxies of backends are imported on first access, see basilisk.backends.
+
+    :param name: attribute name.
+    :returns: exported object.
+    """
+    value = globals()[name] = backends.resolve(name)
+    return value
+
+
+def __dir__():
+    """
+    Lists module's attributes together with names exported by backends.
+
+    :returns: list of names.
+    """
+    return sorted(set(globals()) | set(backends.EXPORTS))
@@ -0,0 +1,451 @@
+"""
+This module defines asyncio counterparts of Redis collection proxies, backed by redis.asyncio.
+
+They share changelists, keys and the rest of the machinery with the blocking proxies,
+but every method talking to Redis has to be awaited, e.g. await redis_hash['key'],
+await redis_hash.save(), await redis_list[0:10] or await redis_list.length().
+Python protocols which can't be awaited (len(), in, item assignment and deletion
+talking to Redis directly) are replaced by coroutine methods.
+"""
+from .redis_entities import DEFAULT_CHUNK_SIZE, RedisHash, RedisList, RedisSortedSet, RedisSortedSetSlice
+
+__all__ = ['AsyncRedisHash', 'AsyncRedisList', 'AsyncRedisSortedSet']
+
+
+class AsyncProxyMixin(object):
+    """
+    This mixin replaces proxy's blocking connection with an asyncio one.
+    """
+
+    @property
+    def connect(self):
+        """
+        Asyncio Redis connection of the running event loop.
+
+        :returns: redis.asyncio.Redis
+        """
+        return self.register.aconnect()
+
+    async def clear(self):
+        """
+        This removes the entity from Redis.
+        """
+        await self.connect.delete(self.get_instance_key())
+
+    def __len__(self):
+        """
+        Length can't be awaited, use length() instead.
+        """
+        raise TypeError("Use 'await {}.length()' instead of len().".format(self.__class__.__name__))
+
+    def __bool__(self):
+        """
+        Proxies are always true, like objects without __len__, emptiness has to be checked with length().
+        """
+        return True
+
+
+class AsyncRedisHash(AsyncProxyMixin, RedisHash):
+    """
+    This class is an asyncio proxy for Redis Hash. get, __getitem__, keys, items, load and prefetch
+    return awaitables.
+    """
+
+    async def clear(self):
+        """
+        This removes whole hash from Redis.
+        """
+        await self.connect.delete(self.get_instance_key())
+        if self.snapshot is not None:
+            self.snapshot = {}
+
+    async def load(self):
+        """
+        This method fetches the whole hash into the local snapshot with a single HGETALL.
+
+        :returns: self
+        """
+        self._set_snapshot(await self.connect.hgetall(self.get_instance_key()))
+        return self
+
+    async def prefetch(self, max_age=None):
+        """
+        This method loads the local snapshot, so following reads don't talk to Redis.
+
+        :param max_age: number of seconds after which the snapshot is reloaded or None to keep it
+         until load() is called.
+        :returns: self
+        """
+        self.max_age = max_age
+        return await self.load()
+
+    async def get(self, *fields):
+        """
+        This gets one or many items from Redis. Keys which can be read locally aren't fetched.
+
+        :param fields: list of fields to get.
+        """
+        if self._is_stale():
+            await self.load()
+        found = [self._lookup(field) for field in fields]
+        missing = [field for field, (local, _) in zip(fields, found) if not local]
+        fetched = iter(await self.connect.hmget(self.get_instance_key(), *missing) if missing else ())
+        return [value if local else next(fetched) for local, value in found]
+
+    async def __getitem__(self, item):
+        """
+        This function returns value assigned to given key.
+
+        :param item: key belonging to this hash.
+        :returns: given key's value.
+        """
+        if self._is_stale():
+            await self.load()
+        local, value = self._lookup(item)
+        if local:
+            return value
+        return await self.connect.hget(self.get_instance_key(), item)
+
+    async def keys(self):
+        """
+        This returns list of keys in hash.
+
+        :returns: list of keys in hash.
+        """
+        if self._is_stale():
+            await self.load()
+        if self.snapshot is not None:
+            return self._merge_keys(list(self.snapshot))
+        return self._merge_keys(await self.connect.hkeys(self.get_instance_key()))
+
+    async def items(self):
+        """
+        This returns key, value pairs available in this hash.
+
+        :returns: hash's key, value pairs.
+        """
+        if self._is_stale():
+            await self.load()
+        if self.snapshot is not None:
+            return self._merge_items(self.snapshot)
+        return self._merge_items(await self.connect.hgetall(self.get_instance_key()))
+
+    async def length(self):
+        """
+        How many elements are in hash - as Redis says, after applying the changelist.
+
+        :returns: number of elements in hash.
+        """
+        if not self.changes and self.snapshot is None:
+            return await self.connect.hlen(self.get_instance_key())
+        return len(await self.keys())
+
+    def __contains__(self, item):
+        """
+        Membership can't be awaited, use contains() instead.
+        """
+        raise TypeError("Use 'await AsyncRedisHash.contains(key)' instead of in.")
+
+    async def contains(self, item):
+        """
+        This functions checks for given key's existence in hash.
+
+        :param item: key to be checked.
+        :returns: boolean
+        """
+        if self._is_stale():
+            await self.load()
+        local, value = self._lookup(item)
+        if local:
+            return value is not None
+        return await self.connect.hexists(self.get_instance_key(), item)
+
+    async def save(self):
+        """
+        This method propagates the changelist to Redis in a single pipeline.
+        """
+        pipe = self.connect.pipeline(transaction=False)
+        written = self._queue_changes(pipe)
+        await pipe.execute()
+        written()
+
+
+class AsyncRedisSortedSetSlice(RedisSortedSetSlice):
+    """
+    An asyncio counterpart of RedisSortedSetSlice. Indexing returns awaitables.
+    """
+
+    async def __getitem__(self, item):
+        """
+        This function translates Python index and slice into ZRANGEBYSCORE and returns Redis's response.
+
+        :param item: index or slice to get.
+        :returns: element or a list of elements.
+        """
+        if isinstance(item, slice):
+            start = item.start or 0
+            if item.stop is None:
+                return await self.connect.zrangebyscore(self.key, self.start, self.end, start, -1)
+            return await self.connect.zrangebyscore(self.key, self.start, self.end, start, item.stop - start)
+        return (await self.connect.zrangebyscore(self.key, self.start, self.end, item, 1))[0]
+
+    def __len__(self):
+        """
+        Length can't be awaited, use length() instead.
+        """
+        raise TypeError("Use 'await AsyncRedisSortedSetSlice.length()' instead of len().")
+
+    async def length(self):
+        """
+        Returns Redis-counted number of elements in range.
+
+        :returns: number of elements in range.
+        """
+        return await self.connect.zcount(self.key, self.start, self.end)
+
+
+class AsyncRedisSortedSet(AsyncProxyMixin, RedisSortedSet):
+    """
+    This class is an asyncio proxy for Redis Sorted Set. Indexing returns AsyncRedisSortedSetSlice.
+    """
+
+    def __getitem__(self, item):
+        """
+        Returns AsyncRedisSortedSetSlice for given SCORE or its range passed as a slice.
+
+        :param item: SCORE or slice [SCORE MIN, SCORE MAX].
+        :returns: AsyncRedisSortedSetSlice for given SCORE or its range.
+        """
+        if isinstance(item, slice):
+            return AsyncRedisSortedSetSlice(self.connect, self.get_instance_key(), item.start, item.stop)
+        return AsyncRedisSortedSetSlice(self.connect, self.get_instance_key(), item, item)
+
+    def __delitem__(self, item):
+        """
+        Deletion can't be awaited, use delete_range() instead.
+        """
+        raise TypeError("Use 'await AsyncRedisSortedSet.delete_range(start, stop)' instead of del.")
+
+    async def delete_range(self, start=None, stop=None):
+        """
+        Removes elements in given SCORE range.
+
+        :param start: minimum SCORE, by default -inf.
+        :param stop: maximum SCORE, by default +inf.
+        """
+        await self.connect.zremrangebyscore(self.get_instance_key(), '-inf' if start is None else start,
+                                            '+inf' if stop is None else stop)
+
+    async def length(self):
+        """
+        Let's see how many items do we have in our set. As returned by Redis.
+
+        :returns: number of elements in set.
+        """
+        return await self.connect.zcard(self.get_instance_key())
+
+    async def lowest(self):
+        """
+        Returns element with lowest SCORE and its SCORE.
+
+        :returns: element with lowest SCORE and its SCORE.
+        """
+        return (await self.connect.zrange(self.get_instance_key(), 0, 0, withscores=True) or [(None, 0)])[0]
+
+    async def highest(self):
+        """
+        Returns element with highest SCORE and its SCORE.
+
+        :returns: element with highest SCORE and its SCORE.
+        """
+        return (await self.connect.zrevrange(self.get_instance_key(), 0, 0, withscores=True) or [(None, 0)])[0]
+
+    async def save(self):
+        """
+        This method propagates the changelist to Redis in a single pipeline.
+        """
+        pipe = self.connect.pipeline(transaction=False)
+        written = self._queue_changes(pipe)
+        await pipe.execute()
+        written()
+
+
+class AsyncRedisList(AsyncProxyMixin, RedisList):
+    """
+    This class is an asyncio proxy for Redis List. Indexing, pop and to_list return awaitables,
+    the list is iterated with async for.
+    """
+
+    async def __getitem__(self, item):
+        """
+        Returns value(s) for given index or slice [min, max].
+
+        :param item: index or slice.
+        :returns: value or values.
+        """
+        if isinstance(item, slice):
+            start = item.start or 0
+            stop = -1 if item.stop is None else item.stop
+            return self.decode_many(await self.connect.lrange(self.get_instance_key(), start, stop))
+        return self.decode_many(await self.connect.lrange(self.get_instance_key(), item, item))[0]
+
+    def __iter__(self):
+        """
+        Iteration can't be awaited, use async for instead.
+        """
+        raise TypeError("Use 'async for' to iterate over AsyncRedisList.")
+
+    async def __aiter__(self):
+        """
+        Iterates over list's elements, fetching them in chunks.
+
+        :returns: asynchronous iterator of values.
+        """
+        async for chunk in self.iter_chunks():
+            for value in chunk:
+                yield value
+
+    async def iter_chunks(self, size=DEFAULT_CHUNK_SIZE):
+        """
+        This method fetches the list in chunks, each with a single LRANGE.
+
+        :param size: maximum number of elements in a chunk.
+        :returns: asynchronous iterator of lists of values.
+        """
+        start = 0
+        while True:
+            chunk = await self.connect.lrange(self.get_instance_key(), start, start + size - 1)
+            if chunk:
+                yield self.decode_many(chunk)
+            if len(chunk) < size:
+                return
+            start += size
+
+    async def to_list(self):
+        """
+        This method fetches all elements of the list with a single LRANGE.
+
+        :returns: list of values.
+        """
+        return self.decode_many(await self.connect.lrange(self.get_instance_key(), 0, -1))
+
+    async def tail(self, count):
+        """
+        This method fetches up to count last elements of the list with a single LRANGE.
+
+        :param count: number of elements.
+        :returns: list of values.
+        """
+        if count <= 0:
+            return []
+        return self.decode_many(await self.connect.lrange(self.get_instance_key(), -count, -1))
+
+    async def pop(self, first=False):
+        """
+        Gets and removes an element from list's edge. By default it's the last element.
+
+        :param first: Should the first element be popped instead of the last.
+        """
+        if first:
+            value = await self.connect.lpop(self.get_instance_key())
+        else:
+            value = await self.connect.rpop(self.get_instance_key())
+        if value is None or self.decode is None:
+            return value
+        return self.decode(value)
+
+    def __setitem__(self, item, value):
+        """
+        Assignment can't be awaited, use set() instead.
+        """
+        raise TypeError("Use 'await AsyncRedisList.set(index, value)' instead of item assignment.")
+
+    async def set(self, item, value):
+        """
+        Assigns a value to given index.
+
+        :param item: index
+        :param value: value
+        """
+        await self.connect.lset(self.get_instance_key(), item, value)
+
+    async def remove(self, item):
+        """
+        Removes all elements with given value.
+
+        :param item: value to be removed.
+        """
+        await self.connect.lrem(self.get_instance_key(), 0, item)
+
+    async def append(self, item):
+        """
+        Adds element at the end of the list.
+
+        :param item: element to be appended.
+        :returns: list length or None, if the write is buffered.
+        """
+        return await self._push('rpush', [item], DEFAULT_CHUNK_SIZE)
+
+    async def prepend(self, item):
+        """
+        Adds element at the beginning of the list.
+
+        :param item: element to be prepended.
+        :returns: list length or None, if the write is buffered.
+        """
+        return await self._push('lpush', [item], DEFAULT_CHUNK_SIZE)
+
+    async def _push(self, command, iterable, chunk_size):
+        """
+        This method buffers pushes or sends them in a pipeline.
+
+        :param command: rpush or lpush.
+        :param iterable: elements to be pushed.
+        :param chunk_size: maximum number of elements pushed by a single command.
+        :returns: list length or None.
+        """
+        if self.buffered:
+            self._buffer(command, iterable)
+            return None
+        items = list(iterable)
+        if not items:
+            return None
+        pipe = self.connect.pipeline(transaction=False)
+        self._queue_push(pipe, command, items, chunk_size)
+        return self._get_length(await pipe.execute())
+
+    async def save(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        This method propagates pushes queued by a buffered list to Redis in a single pipeline.
+        If it fails, the pushes are kept, so they can be saved again.
+
+        :param chunk_size: maximum number of elements pushed by a single command.
+        """
+        if not self.changes:
+            return
+        pipe = self.connect.pipeline(transaction=False)
+        restore = self._queue_changes(pipe, chunk_size)
+        try:
+            await pipe.execute()
+        except BaseException:
+            restore()
+            raise
+
+    async def replace(self, iterable, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        This method atomically replaces the list's contents, see RedisList.replace.
+
+        :param iterable: new elements of the list.
+        :param chunk_size: maximum number of elements pushed by a single command.
+        """
+        self.changes = []
+        for pipe in self._queue_replace(list(iterable), chunk_size):
+            await pipe.execute()
+
+    async def length(self):
+        """
+        List length as returned by Redis.
+
+        :returns: number of elements in the list.
+        """
+        return await self.connect.llen(self.get_instance_key())
@@ -0,0 +1,199 @@
+"""
+This module defines a Redis client which transparently pipelines commands issued concurrently
+by different threads.
+"""
+import threading
+import time
+
+import redis
+
+__all__ = ['AutoPipelineRedis']
+
+
+class PendingCommand(object):
+    """
+    This class keeps a command waiting to be sent together with its result.
+    """
+    __slots__ = ('args', 'options', 'event', 'lead', 'concurrent', 'done', 'value', 'error')
+
+    def __init__(self, args, options):
+        """
+        This method remembers the command.
+
+        :param args: command name and arguments.
+        :param options: options passed to response callbacks.
+        """
+        self.args = args
+        self.options = options
+        self.event = threading.Event()
+        self.lead = False
+        self.concurrent = False
+        self.done = False
+        self.value = None
+        self.error = None
+
+    def resolve(self, value=None, error=None):
+        """
+        This method sets the command's result and wakes up the waiting thread.
+
+        :param value: Redis's response.
+        :param error: exception raised by the command.
+        """
+        self.value = value
+        self.error = error
+        self.done = True
+        self.event.set()
+
+    def result(self):
+        """
+        This method returns the command's result or raises its exception.
+
+        :returns: Redis's response.
+        """
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class AutoPipelineRedis(redis.Redis):
+    """
+    This class is a Redis client coalescing commands issued by different threads into pipelines.
+
+    Only one pipeline is in flight at a time - the thread which finds no pipeline in flight
+    sends its command (together with everything queued during the optional window) and commands
+    issued meanwhile by other threads are queued and sent together in the next pipeline,
+    executed by the first of the waiting threads. Every caller gets its own result, so there's
+    no need to change call sites. Without concurrency it behaves like a regular client.
+
+    Blocking, transactional and connection state commands are always sent directly.
+
+    One instance should be shared by all threads, so RedisModelRegister keeps one per namespace
+    configured with autopipeline=True (and optional autopipeline_window in seconds).
+    """
+    DIRECT_COMMANDS = frozenset([
+        'BLPOP', 'BRPOP', 'BRPOPLPUSH', 'BLMOVE', 'BLMPOP', 'BZPOPMIN', 'BZPOPMAX', 'BZMPOP', 'XREAD',
+        'XREADGROUP', 'WAIT', 'WATCH', 'UNWATCH', 'MULTI', 'EXEC', 'DISCARD', 'SUBSCRIBE', 'PSUBSCRIBE',
+        'MONITOR', 'SELECT', 'CLIENT', 'AUTH', 'QUIT', 'RESET',
+    ])
+
+    def __init__(self, autopipeline_window=0, **kwargs):
+        """
+        This method sets up the command queue.
+
+        :param autopipeline_window: number of seconds to wait for more commands before sending a pipeline.
+        :param kwargs: arguments of redis.Redis.
+        """
+        super(AutoPipelineRedis, self).__init__(**kwargs)
+        self.autopipeline_window = autopipeline_window
+        self.pipelines_sent = 0
+        self.commands_sent = 0
+        self._pending = []
+        self._flushing = False
+        self._last_caller = None
+        self._pending_lock = threading.Lock()
+
+    def execute_command(self, *args, **options):
+        """
+        This method queues the command to be sent in a shared pipeline and waits for its result.
+
+        :param args: command name and arguments.
+        :param options: options passed to response callbacks.
+        :returns: Redis's response.
+        """
+        if str(args[0]).split(' ')[0].upper() in self.DIRECT_COMMANDS:
+            return super(AutoPipelineRedis, self).execute_command(*args, **options)
+        command, caller = PendingCommand(args, options), threading.current_thread().ident
+        with self._pending_lock:
+            self._pending.append(command)
+            command.lead = not self._flushing
+            command.concurrent = self._last_caller not in (None, caller)
+            self._flushing = True
+            self._last_caller = caller
+        if not command.lead:
+            try:
+                command.event.wait()
+            except BaseException:
+                self._abandon(command)
+                raise
+        if not command.done:
+            self._flush(command)
+        return command.result()
+
+    def _flush(self, command):
+        """
+        This method sends queued commands in one pipeline and hands sending the next one
+        to the first thread which queued a command meanwhile - also if sending fails.
+
+        The window is waited for only if other commands are already queued or the previous command
+        came from another thread, so callers without concurrency don't pay for it.
+
+        :param command: PendingCommand of the calling thread.
+        """
+        try:
+            with self._pending_lock:
+                wait = len(self._pending) > 1 or command.concurrent
+            if self.autopipeline_window and wait:
+                time.sleep(self.autopipeline_window)
+            with self._pending_lock:
+                commands, self._pending = self._pending, []
+            self._send(commands)
+        finally:
+            self._hand_over(command)
+
+    def _hand_over(self, command):
+        """
+        This method hands sending the next pipeline to the first thread waiting for it or,
+        if there's none, lets the next command start a pipeline.
+
+        :param command: PendingCommand of the calling thread, dropped if it wasn't sent.
+        """
+        with self._pending_lock:
+            if command in self._pending:
+                self._pending.remove(command)
+            if self._pending:
+                self._pending[0].lead = True
+                self._pending[0].event.set()
+            else:
+                self._flushing = False
+
+    def _abandon(self, command):
+        """
+        This method forgets the command of a thread interrupted while waiting for its result.
+        If the thread was handed sending the next pipeline meanwhile, it's handed further.
+
+        :param command: PendingCommand of the calling thread.
+        """
+        with self._pending_lock:
+            lead = command.lead and not command.done
+            if not lead and command in self._pending:
+                self._pending.remove(command)
+        if lead:
+            self._hand_over(command)
+
+    def _send(self, commands):
+        """
+        This method executes given commands in a pipeline and resolves them. If it's interrupted
+        (e.g. by KeyboardInterrupt), commands of other threads fail with ConnectionError.
+
+        :param commands: list of PendingCommand.
+        """
+        try:
+            pipe = self.pipeline(transaction=False)
+            for command in commands:
+                pipe.execute_command(*command.args, **command.options)
+            results = pipe.execute(raise_on_error=False)
+        except BaseException as error:  # pylint: disable=broad-except
+            failure = error if isinstance(error, Exception) else redis.exceptions.ConnectionError(
+                'Pipeline was interrupted by {!r}'.format(error))
+            for command in commands:
+                command.resolve(error=failure)
+            if failure is not error:
+                raise
+            return
+        self.pipelines_sent += 1
+        self.commands_sent += len(commands)
+        for command, result in zip(commands, results):
+            if isinstance(result, Exception):
+                command.resolve(error=result)
+            else:
+                command.resolve(value=result)
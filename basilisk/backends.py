@@ -0,0 +1,57 @@
+"""
+This module keeps the registry of backends. Each backend is a module defining models and
+proxies for a NoSQL store, registered together with names it exports from basilisk package.
+
+Backend modules are imported lazily, when one of their names is accessed for the first time,
+and client libraries are imported by registers only when the first connection is made,
+so e.g. Redis-only users never import elasticsearch.
+"""
+import importlib
+
+__all__ = ['register_backend', 'get_backend', 'resolve']
+
+BACKENDS = {}
+EXPORTS = {}
+
+
+def register_backend(name, module, exports):
+    """
+    This function registers a backend.
+
+    :param name: backend name.
+    :param module: dotted path of the module defining backend's models and proxies.
+    :param exports: names exported by the module from basilisk package.
+    """
+    BACKENDS[name] = module
+    for export in exports:
+        EXPORTS[export] = name
+
+
+def get_backend(name):
+    """
+    This function returns backend's module, importing it on first use.
+
+    :param name: backend name.
+    :returns: module.
+    """
+    return importlib.import_module(BACKENDS[name])
+
+
+def resolve(export):
+    """
+    This function returns a name exported by one of the backends.
+
+    :param export: exported name.
+    :returns: exported object.
+    """
+    if export not in EXPORTS:
+        raise AttributeError("module 'basilisk' has no attribute '{}'".format(export))
+    return getattr(get_backend(EXPORTS[export]), export)
+
+
+register_backend('redis', 'basilisk.redis_entities',
+                 ('RedisModel', 'RedisList', 'RedisHash', 'RedisSortedSet', 'RedisModelException'))
+register_backend('redis_workqueue', 'basilisk.workqueue', ('WorkQueue', 'QueueConsumer'))
+register_backend('redis_asyncio', 'basilisk.aio', ('AsyncRedisHash', 'AsyncRedisList', 'AsyncRedisSortedSet'))
+register_backend('elasticsearch', 'basilisk.elasticsearch_entities',
+                 ('ElasticsearchModel', 'ElasticsearchModelException'))
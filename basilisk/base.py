@@ -3,15 +3,18 @@ This module defines required design patterns and classes responsible for the Red
 model register.
 """
 import json
+import os
+import threading
 import uuid
+import weakref
 from collections import defaultdict
 from functools import wraps
+from types import MappingProxyType, MemberDescriptorType
 
-import redis
-from elasticsearch import Elasticsearch
 from six import with_metaclass
 
-from .fields import MapField
+from .codegen import compile_model
+from .fields import MapField, RawValue
 
 
 def singleton_decorator(function):
@@ -163,6 +166,9 @@ class Config(with_metaclass(ConfigCreator, SingletonBase)):
 class MapModelRegister(object):
     """
     This class as model register for a NoSQL store.
+
+    Clients are created lazily, on first use, and recreated whenever the process id changes,
+    so processes forked by prefork servers never share connections with their parent.
     """
 
     def __init__(self):
@@ -170,7 +176,56 @@ class MapModelRegister(object):
         We create an empty model dict.
         """
         self._models = {}
-        self.connect = lambda: None
+        self._client = None
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def connect(self):
+        """
+        This method returns a client for the current process, creating it on first use.
+
+        :returns: client.
+        """
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._client = self.create_client()
+                    self._async_clients = weakref.WeakKeyDictionary()
+                    self._pid = os.getpid()
+        return self._client
+
+    def aconnect(self):
+        """
+        This method returns an asyncio client for the running event loop, creating it on first use.
+        Clients can't be shared between event loops, so there's one per loop. It has to be called
+        from a coroutine.
+
+        :returns: asyncio client.
+        """
+        import asyncio  # pylint: disable=import-outside-toplevel
+        self.connect()
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = self.create_async_client()
+        return client
+
+    def create_client(self):
+        """
+        This method creates a new client.
+
+        :returns: client.
+        """
+        raise NotImplementedError()
+
+    def create_async_client(self):
+        """
+        This method creates a new asyncio client.
+
+        :returns: asyncio client.
+        """
+        raise NotImplementedError()
 
     def register(self, name, ref):
         """
@@ -199,34 +254,291 @@ class MapModelRegister(object):
 class RedisModelRegister(NamedSingleton, MapModelRegister):
     """
     This class creates Redis connection pool and acts as model register.
+
+    Apart from redis.ConnectionPool arguments, namespace config may contain autopipeline
+    (whether commands issued concurrently by different threads should be pipelined together)
+    and autopipeline_window (number of seconds to wait for more commands, 0 by default).
+
+    A namespace may be spread over several Redis instances by listing their configs in shards,
+    e.g. {'shards': [{'host': 'redis1'}, {'host': 'redis2'}], 'max_connections': 10}. Other options
+    apply to all shards and keys are routed by consistent hashing, see basilisk.sharding.
+    Shards are named by their optional name option or host:port/db and names must not change,
+    as they're placed on the hash ring.
+
+    Reads may be balanced between replicas listed in replicas, e.g. {'host': 'primary',
+    'replicas': [{'host': 'replica1'}, {'host': 'replica2'}]}, with other options applying to them
+    as well - see basilisk.replication. Optional replica_max_lag and replica_check_interval (both
+    in seconds) tune replica health checks. In sharded namespaces replicas are configured per shard.
+    asyncio clients always use primaries.
+
+    Config is read and redis is imported when the first connection is made, not when
+    the register is created.
     """
 
     def __init__(self):
         """
-        We create a connection pool.
+        We prepare the register, the connection pool is created on first use.
         """
         super(RedisModelRegister, self).__init__()
-        self.pool = redis.ConnectionPool(**Config[self.sl_name])
-        self.connect = lambda: redis.Redis(connection_pool=self.pool)
+        self.config = None
+        self.shards = None
+        self.pool = None
+
+    def create_client(self):
+        """
+        This method creates a connection pool and a client using it, or a sharded client
+        if the namespace is configured with shards.
+
+        :returns: redis.Redis or basilisk.sharding.ShardedRedis
+        """
+        import redis  # pylint: disable=import-outside-toplevel
+        config = dict(Config[self.sl_name])
+        self.shards = config.pop('shards', None)
+        self.config = config
+        if self.shards is not None:
+            from .sharding import ShardedRedis  # pylint: disable=import-outside-toplevel
+            return ShardedRedis([self.create_shard(shard) for shard in self.shards])
+        self.pool = redis.ConnectionPool(**self.get_pool_config(config))
+        return self.create_redis(self.pool, config)
+
+    def create_redis(self, pool, config):
+        """
+        This method creates a client using given connection pool, pipelining commands
+        automatically if configured with autopipeline and balancing reads if configured with replicas.
+
+        :param pool: redis.ConnectionPool of the primary.
+        :param config: namespace or shard config.
+        :returns: redis.Redis or basilisk.replication.ReplicatedRedis
+        """
+        import redis  # pylint: disable=import-outside-toplevel
+        if config.get('autopipeline', False):
+            from .autopipeline import AutoPipelineRedis  # pylint: disable=import-outside-toplevel
+            client = AutoPipelineRedis(config.get('autopipeline_window', 0), connection_pool=pool)
+        else:
+            client = redis.Redis(connection_pool=pool)
+        if not config.get('replicas'):
+            return client
+        from . import replication  # pylint: disable=import-outside-toplevel
+        replicas = []
+        for replica in config['replicas']:
+            replica = dict(config, replicas=None, **replica)
+            replicas.append(self.create_redis(redis.ConnectionPool(**self.get_pool_config(replica)), replica))
+        return replication.ReplicatedRedis(client, replicas,
+                                           config.get('replica_max_lag', replication.DEFAULT_MAX_LAG),
+                                           config.get('replica_check_interval', replication.DEFAULT_CHECK_INTERVAL))
+
+    def create_shard(self, shard):
+        """
+        This method creates a client of a single shard.
+
+        :param shard: shard's config.
+        :returns: 2-tuple of shard name and redis.Redis
+        """
+        import redis  # pylint: disable=import-outside-toplevel
+        config = self.get_shard_config(shard)
+        return self.get_shard_name(shard), self.create_redis(redis.ConnectionPool(**self.get_pool_config(config)),
+                                                             config)
+
+    def get_shard_config(self, shard):
+        """
+        This method merges shard's config with options of the namespace.
+
+        :param shard: shard's config.
+        :returns: dict
+        """
+        config = {name: value for name, value in self.config.items() if name != 'replicas'}
+        config.update(shard)
+        return config
+
+    @staticmethod
+    def get_pool_config(config):
+        """
+        This method strips options which aren't redis.ConnectionPool arguments from given config.
+
+        :param config: namespace or shard config.
+        :returns: dict
+        """
+        return {name: value for name, value in config.items()
+                if name not in ('autopipeline', 'autopipeline_window', 'name', 'replicas', 'replica_max_lag',
+                                'replica_check_interval')}
+
+    @staticmethod
+    def get_shard_name(shard):
+        """
+        This method returns shard's name placed on the hash ring.
+
+        :param shard: shard's config.
+        :returns: shard name.
+        """
+        return shard.get('name') or '{}:{}/{}'.format(shard.get('host', 'localhost'), shard.get('port', 6379),
+                                                     shard.get('db', 0))
+
+    def add_shard(self, shard, batch_size=500, match=None):
+        """
+        This method adds a shard to a sharded namespace, moving keys which belong to it from
+        other shards (see basilisk.sharding.ShardedRedis.add_shard), and adds it to namespace's config.
+        Other processes have to be configured with the new shard as well.
+
+        Unless match is given, all keys kept on the shards are moved, so shards of the namespace
+        have to be dedicated databases, not shared with other namespaces or applications.
+
+        :param shard: shard's config.
+        :param batch_size: number of keys scanned and copied at once.
+        :param match: glob-style pattern or list of patterns of moved keys, by default all keys are moved.
+        :returns: number of moved keys.
+        """
+        client = self.connect()
+        if self.shards is None:
+            raise MapModelException('Namespace {} is not sharded'.format(self.sl_name))
+        name, shard_client = self.create_shard(shard)
+        moved = client.add_shard(name, shard_client, batch_size, match)
+        self.shards = self.shards + [shard]
+        Config.load(**{self.sl_name: dict(Config[self.sl_name], shards=self.shards)})
+        self._async_clients = weakref.WeakKeyDictionary()
+        return moved
+
+    def create_async_client(self):
+        """
+        This method creates a redis.asyncio client with its own connection pool (or one per shard).
+
+        :returns: redis.asyncio.Redis or basilisk.sharding.AsyncShardedRedis
+        """
+        import redis.asyncio  # pylint: disable=import-outside-toplevel
+        if self.shards is not None:
+            from .sharding import AsyncShardedRedis  # pylint: disable=import-outside-toplevel
+            return AsyncShardedRedis([
+                (self.get_shard_name(shard), redis.asyncio.Redis(connection_pool=redis.asyncio.ConnectionPool(
+                    **self.get_pool_config(self.get_shard_config(shard)))))
+                for shard in self.shards])
+        return redis.asyncio.Redis(connection_pool=redis.asyncio.ConnectionPool(**self.get_pool_config(self.config)))
 
 
 class ElasticsearchModelRegister(NamedSingleton, MapModelRegister):
     """
     This class creates ElasticSearch connection and acts as model register.
+    Elasticsearch is imported when the first connection is made.
     """
+
     def __init__(self):
         """
-        We create a connection pool.
+        We prepare the register, the client is created on first use.
         """
         super(ElasticsearchModelRegister, self).__init__()
-        self.connect = lambda: Elasticsearch(**Config[self.sl_name])
+
+    def create_client(self):
+        """
+        This method creates Elasticsearch client.
+
+        :returns: elasticsearch.Elasticsearch
+        """
+        from elasticsearch import Elasticsearch  # pylint: disable=import-outside-toplevel
+        return Elasticsearch(**Config[self.sl_name])
+
+    def create_async_client(self):
+        """
+        This method creates an asyncio Elasticsearch client.
+
+        :returns: elasticsearch.AsyncElasticsearch
+        """
+        from elasticsearch import AsyncElasticsearch  # pylint: disable=import-outside-toplevel
+        return AsyncElasticsearch(**Config[self.sl_name])
+
+
+class ConnectionDescriptor(object):
+    """
+    This descriptor resolves models' connect property lazily, using their register,
+    so the connection always belongs to the current process.
+    """
+
+    def __init__(self, register):
+        """
+        This method remembers the register.
+
+        :param register: MapModelRegister instance.
+        """
+        self.register = register
+
+    def __get__(self, instance, owner):
+        """
+        This method returns register's client for the current process.
+
+        :param instance: model instance or None.
+        :param owner: model class.
+        :returns: client.
+        """
+        return self.register.connect()
+
+
+class LazyFieldDescriptor(object):
+    """
+    This descriptor keeps values of a lazy field. Raw values fetched from NoSQL store are
+    pythonized on first access and replaced with the result. Values are kept in instance's
+    __dict__ or, in compact models, in the slot given as storage.
+    """
+
+    def __init__(self, field, storage=None):
+        """
+        This method remembers the field.
+
+        :param field: lazy MapField.
+        :param storage: slot's member descriptor or None.
+        """
+        self.field = field
+        self.name = field.get_name()
+        self.storage = storage
+
+    def get_raw(self, instance):
+        """
+        This method returns field's value without pythonizing it.
+
+        :param instance: model instance.
+        :returns: value or RawValue.
+        """
+        if self.storage is not None:
+            return self.storage.__get__(instance, type(instance))
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name)
+
+    def __get__(self, instance, owner):
+        """
+        This method returns field's value, pythonizing it first if needed.
+
+        :param instance: model instance or None.
+        :param owner: model class.
+        :returns: value.
+        """
+        if instance is None:
+            return self
+        value = self.get_raw(instance)
+        if isinstance(value, RawValue):
+            raw, value = value.data, self.field.pythonize(value.data)
+            self.__set__(instance, value)
+            if self.field.is_mutable():
+                instance._serialized = dict(instance._serialized, **{  # pylint: disable=protected-access
+                    self.name: raw.decode('utf-8') if isinstance(raw, bytes) else raw})
+        return value
+
+    def __set__(self, instance, value):
+        """
+        This method sets field's value.
+
+        :param instance: model instance.
+        :param value: value or RawValue.
+        """
+        if self.storage is not None:
+            self.storage.__set__(instance, value)
+        else:
+            instance.__dict__[self.name] = value
 
 
 class MapModelCreator(type):
     """
     This metaclass integrates classes with MapModelRegister, properly inherits
     MapFields from base classes and injects fields list and NoSQL store connection
-    to created classes.
+    to created classes. It also compiles functions initializing, serializing and pythonizing
+    instances specialized for class's fields, see basilisk.codegen.
     """
     registers = {}
     register = lambda namespace: None
@@ -268,11 +580,59 @@ class MapModelCreator(type):
                 del attrs[key]
         return args, id_fields
 
+    @staticmethod
+    def get_slots(bases, names):
+        """
+        This function returns names which need new slots, as they aren't slots of base classes yet.
+
+        :param bases: base classes.
+        :param names: names of attributes kept in slots.
+        :returns: tuple of names.
+        """
+        slotted = set()
+        for base in bases:
+            for klass in base.__mro__:
+                slots = klass.__dict__.get('__slots__', ())
+                slotted.update([slots] if isinstance(slots, str) else slots)
+        return tuple(name for name in names if name not in slotted)
+
+    @staticmethod
+    def get_slot(model, name):
+        """
+        This function finds the member descriptor of a slot, possibly wrapped by LazyFieldDescriptor.
+
+        :param model: class.
+        :param name: slot name.
+        :returns: member descriptor.
+        """
+        for klass in model.__mro__:
+            value = klass.__dict__.get(name)
+            if isinstance(value, LazyFieldDescriptor) and value.storage is not None:
+                return value.storage
+            if isinstance(value, MemberDescriptorType):
+                return value
+        raise TypeError("No slot {} in {} class.".format(name, model.__name__))
+
+    @staticmethod
+    def get_class_default(base, name):
+        """
+        This function returns the class-level default of an instance attribute, skipping slots.
+
+        :param base: base class.
+        :param name: attribute name.
+        :returns: default value.
+        """
+        for klass in base.__mro__:
+            value = klass.__dict__.get(name)
+            if name in klass.__dict__ and not isinstance(value, MemberDescriptorType):
+                return value
+        return None
+
     def __new__(mcs, name, bases, attrs):
         """
         This method creates and registers new class, if it's not already
         in the register, and injects it with a list of fields _fields,
-        a NoSQL store connection function connect and primary key field's name.
+        a lazily bound NoSQL store connection connect and primary key field's name.
         """
         # Do not modify the base classes, which actual models inherit.
         if bases[0].__bases__[0].__name__ != 'object':
@@ -287,8 +647,25 @@ class MapModelCreator(type):
                 if len(id_fields) > 1:
                     raise TypeError("Multiple primary key in {} class.".format(name))
                 attrs['id_field'] = id_fields[0]
-                attrs['connect'] = mcs.registers[namespace].connect()
-            model = super(MapModelCreator, mcs).__new__(mcs, name, bases, attrs)
+                compact, state = attrs.get('compact', bases[0].compact), {}
+                lazy = {key: LazyFieldDescriptor(field) for key, field in attrs['_fields'].items() if field.is_lazy()}
+                if compact:
+                    names = bases[0]._instance_state  # pylint: disable=protected-access
+                    attrs['__slots__'] = mcs.get_slots(bases, list(attrs['_fields']) + list(names))
+                    state = {key: mcs.get_class_default(bases[0], key) for key in names if key != '_dirty'}
+                else:
+                    attrs.update(lazy)
+                attrs.update(compile_model(attrs['_fields'], compact, state, lazy))
+                attrs['connect'] = ConnectionDescriptor(mcs.registers[namespace])
+                attrs['aconnect'] = mcs.registers[namespace].aconnect
+                model = super(MapModelCreator, mcs).__new__(mcs, name, bases, attrs)
+                if compact:
+                    # Slots can't be declared together with class attributes, so lazy fields wrap them afterwards.
+                    for key, descriptor in lazy.items():
+                        descriptor.storage = mcs.get_slot(model, key)
+                        setattr(model, key, descriptor)
+            else:
+                model = super(MapModelCreator, mcs).__new__(mcs, name, bases, attrs)
             mcs.registers[namespace].register(name, model)
         else:
             model = super(MapModelCreator, mcs).__new__(mcs, name, bases, attrs)
@@ -309,6 +686,10 @@ class ElasticsearchModelCreator(MapModelCreator):
     register = ElasticsearchModelRegister
 
 
+NO_CHANGES = frozenset()
+NO_SERIALIZED = MappingProxyType({})
+
+
 class MapModelException(Exception):
     """
     Exception raised when errors related to NoSQL store handling are encountered.
@@ -326,27 +707,156 @@ class MapModelBase(object):
     Redis connection is available in connect property.
     Dict of fields is available in _fields property.
 
-    Reserved property names, apart from methods, are _fields, id_field and connect.
+    Instances may be loaded partially - fields which weren't fetched from NoSQL store
+    keep their default values, are listed in _unloaded and are never written back
+    unless they're assigned explicitly.
+
+    Assignments to fields are tracked - names of fields modified since the instance was loaded
+    or saved are kept in _dirty. Unchanged instances share an empty frozenset, a set is created
+    on the first change. Values of mutable fields (like dicts kept in JsonMapField) may be changed
+    in place, so they're serialized when the instance is loaded or saved, kept in _serialized
+    and compared with their current serialized values. Instances without serialized values share
+    an empty read-only mapping. Lazy fields are serialized only once they're
+    pythonized, using their raw values. Fields may also be marked as changed with mark_dirty.
+
+    Models declared with compact = True keep fields' values and instance state in __slots__
+    generated from _fields instead of __dict__, which saves memory when many instances are kept
+    around. Compact instances can't have attributes other than fields.
+
+    Values of lazy fields (like JsonMapField(lazy=True)) are kept as fetched, wrapped in RawValue,
+    and pythonized on first access by LazyFieldDescriptor.
+
+    Reserved property names, apart from methods, are _fields, _unloaded, _dirty, _serialized, _instance_state,
+    id_field, compact and connect.
 
     :type _fields: dict
+    :type _unloaded: frozenset
+    :type _dirty: set or frozenset
+    :type _serialized: dict or mappingproxy
     :type id_field: str
     """
+    __slots__ = ()
     MapModelException = MapModelException
 
+    compact = False
+    _instance_state = ('_dirty', '_unloaded', '_serialized')
+
     # It's to make sure syntax analyzers see the variables set by metaclass.
-    _fields = None
+    _fields = {}
     connect = None
     id_field = None
+    _unloaded = frozenset()
+    _serialized = NO_SERIALIZED
+
+    @staticmethod
+    def aconnect():
+        """
+        This method returns an asyncio client of the running event loop. Models are given
+        their register's aconnect when they're created.
+
+        :returns: asyncio client.
+        """
+        raise MapModelException('Base model classes have no asyncio client, it is bound to models by their register.')
 
     def __init__(self, **kwargs):
         """
         We fill the instance using kwargs elements that are also fields or fields'
         default values.
 
+        :param kwargs: initial values of fields.
+        """
+        self._init_fields(kwargs)
+
+    def _init_fields(self, kwargs):
+        """
+        This method fills the instance with given values or fields' defaults and marks all fields
+        as changed. Models get a version compiled for their fields.
+
         :param kwargs: initial values of fields.
         """
         for key, item in self._fields.items():
-            self.__dict__[key] = kwargs[key] if key in kwargs else item.get_default()
+            object.__setattr__(self, key, kwargs[key] if key in kwargs else item.get_default())
+        self._dirty = set(self._fields)
+
+    def __setattr__(self, key, value):
+        """
+        Assigning a value to a field marks it as changed. If the field wasn't loaded,
+        it becomes loaded, so it'll be saved.
+
+        :param key: property name.
+        :param value: property value.
+        """
+        if key in self._fields:
+            if self._dirty:
+                self._dirty.add(key)
+            else:
+                self._dirty = {key}
+            if key in self._unloaded:
+                self._unloaded = self._unloaded - {key}
+        super(MapModelBase, self).__setattr__(key, value)
+
+    def mark_dirty(self, *fields):
+        """
+        This method marks given fields as changed, e.g. after their values were mutated in place.
+        When no fields are given, all loaded fields are marked.
+
+        :param fields: names of changed fields.
+        """
+        self._dirty = set(self._dirty).union(fields or set(self._fields).difference(self._unloaded))
+
+    def get_changed_fields(self):
+        """
+        This method returns names of fields changed since the instance was loaded or saved,
+        including mutable fields whose serialized values differ from the ones kept in _serialized.
+        If primary key was changed, all loaded fields have to be written to the new key.
+
+        :returns: set of field names.
+        """
+        if self.id_field in self._dirty:
+            return set(self._fields).difference(self._unloaded)
+        changed = set(self._dirty)
+        for name, value in self._serialized.items():
+            if name not in changed and name not in self._unloaded \
+                    and self._fields[name].serialize(getattr(self, name)) != value:
+                changed.add(name)
+        return changed
+
+    def _serialize_mutable(self):
+        """
+        This method serializes loaded values of mutable fields, so their in-place changes can be detected.
+        Lazy fields which weren't pythonized yet are skipped, LazyFieldDescriptor adds them on first access.
+
+        :returns: dict of field name: serialized value or NO_SERIALIZED if there are none.
+        """
+        serialized = None
+        for name, field in self._fields.items():
+            if field.is_mutable() and name not in self._unloaded:
+                value = self._get_raw(name)
+                if not isinstance(value, RawValue):
+                    if serialized is None:
+                        serialized = {}
+                    serialized[name] = field.serialize(value)
+        return serialized or NO_SERIALIZED
+
+    def _get_raw(self, name):
+        """
+        This method returns field's value without pythonizing values of lazy fields.
+
+        :param name: field name.
+        :returns: value or RawValue.
+        """
+        if self._fields[name].is_lazy():
+            return getattr(type(self), name).get_raw(self)
+        return getattr(self, name)
+
+    def is_loaded(self, name):
+        """
+        This method checks whether given field's value was loaded from NoSQL store (or set).
+
+        :param name: field name.
+        :returns: boolean.
+        """
+        return name not in self._unloaded
 
     def get_instance_key(self):
         """
@@ -356,27 +866,38 @@ class MapModelBase(object):
         """
         return self.get_key(getattr(self, self.id_field))
 
-    def serialize(self, dump=False):
+    def serialize(self, dump=False, fields=None):
         """
         We try to call serialize for each field, if it doesn't exist then field's value
         is not converted.
 
         :param dump: whether the result should be json (True) or python dict (False).
+        :param fields: names of fields to serialize, by default all loaded fields are serialized.
         :returns: dictionary of values ready to be sent to NoSQL store.
         """
-        ret = {k: (i.serialize(self.__dict__[k]) if hasattr(i, "serialize") else self.__dict__[k])
-               for k, i in self._fields.items()}
+        ret = self._encode(fields)
         if dump:
             return json.dumps(ret)
         return ret
 
+    def _encode(self, fields):
+        """
+        This method serializes loaded fields. Models get a version compiled for their fields.
+
+        :param fields: names of fields to serialize or None.
+        :returns: dictionary of values ready to be sent to NoSQL store.
+        """
+        return {k: (i.serialize(getattr(self, k)) if hasattr(i, "serialize") else getattr(self, k))
+                for k, i in self._fields.items() if k not in self._unloaded and (fields is None or k in fields)}
+
     def to_dict(self, *args):
         """
-        This method returns a dict containing fields and their values in this instance.
+        This method returns a dict containing loaded fields and their values in this instance.
 
         :returns: values dict.
         """
-        ret = {k: self.__dict__[k] for k in self._fields if not args or k in args}
+        ret = {k: getattr(self, k) for k in self._fields
+               if (not args or k in args) and k not in self._unloaded}
         return ret
 
     def _save(self, create_id):
@@ -401,6 +922,21 @@ class MapModelBase(object):
         """
         raise NotImplementedError()
 
+    def delete(self):
+        """
+        Let's remove the instance from NoSQL store.
+        """
+        raise NotImplementedError()
+
+    async def asave(self, create_id=True):
+        """
+        Let's save instance's current state to NoSQL store, asynchronously.
+
+        :param create_id: whether id should be created automatically if it's not set yet.
+        :returns: self
+        """
+        raise NotImplementedError()
+
     @classmethod
     def get_fields(cls):
         """
@@ -430,7 +966,16 @@ class MapModelBase(object):
         """
         if loads:
             data = json.loads(data)
+        return cls._decode(data)
+
+    @classmethod
+    def _decode(cls, data):
+        """
+        This method pythonizes values of fields. Models get a version compiled for their fields.
 
+        :param data: values to convert.
+        :returns: dict of values ready to pass to __init__.
+        """
         data = {
             key if isinstance(key, str) else key.decode('utf-8'): value
             for key, value in data.items()
@@ -439,6 +984,45 @@ class MapModelBase(object):
                 for key, value in data.items()
                 if key in cls.get_fields()}
 
+    @classmethod
+    def pythonize_many(cls, data_list, loads=False):
+        """
+        This method prepares a batch of data fetched from NoSQL store for new instances.
+        Empty entries (missing objects) are returned as None.
+
+        :param data_list: list of values to convert.
+        :param loads: whether each element should be loaded from json first.
+        :returns: list of dicts of values ready to pass to __init__ (or None).
+        """
+        return [cls.pythonize(data, loads) if data else None for data in data_list]
+
+    @classmethod
+    def hydrate(cls, data, fields=None):
+        """
+        This method creates an instance from pythonized data. If only some fields were
+        fetched, the rest of them is marked as unloaded.
+
+        :param data: dict of values, as returned by pythonize.
+        :param fields: names of fetched fields or None if all of them were fetched.
+        :returns: model instance.
+        """
+        instance = cls(**data)
+        instance._dirty = NO_CHANGES  # pylint: disable=protected-access
+        if fields is not None:
+            instance._unloaded = frozenset(cls._fields).difference(fields)  # pylint: disable=protected-access
+        instance._serialized = instance._serialize_mutable()  # pylint: disable=protected-access
+        return instance
+
+    @classmethod
+    def get_projection(cls, fields):
+        """
+        This method prepares a list of fields to fetch, always including primary key field first.
+
+        :param fields: names of fields to fetch.
+        :returns: list of field names.
+        """
+        return [cls.id_field] + [field for field in fields if field != cls.id_field]
+
     @classmethod
     def get(cls, oid):
         """
@@ -449,6 +1033,16 @@ class MapModelBase(object):
         """
         raise NotImplementedError()
 
+    @classmethod
+    async def aget(cls, oid):
+        """
+        This method gets a model instance with given id from NoSQL store, asynchronously.
+
+        :param oid: id of object to get.
+        :returns: hydrated model instance.
+        """
+        raise NotImplementedError()
+
 
 class MapModel(with_metaclass(MapModelCreator, MapModelBase)):
     """
@@ -0,0 +1,146 @@
+"""
+This module defines a unit of work collecting Redis writes of models and collection proxies,
+so they can be sent in a single pipeline.
+"""
+import threading
+from contextlib import contextmanager
+
+from .base import RedisModelRegister
+
+__all__ = ['Batch', 'batch']
+
+_state = threading.local()
+
+
+class Batch(object):
+    """
+    This class wraps a Redis pipeline collecting writes, together with callbacks which
+    update local state once the writes are executed or discarded.
+
+    Deferred batches are created by batch() context manager and executed when it exits;
+    immediate ones are executed as soon as the entity which queued writes flushes them.
+
+    :type pipe: redis.client.Pipeline
+    """
+
+    def __init__(self, pipe, deferred=False):
+        """
+        This method remembers the pipeline.
+
+        :param pipe: Redis pipeline.
+        :param deferred: whether flush() should leave execution to the owner of the batch.
+        """
+        self.pipe = pipe
+        self.deferred = deferred
+        self.callbacks = []
+        self.discard_callbacks = []
+
+    @classmethod
+    def current(cls, namespace):
+        """
+        This method returns the batch collecting writes for given namespace in current thread.
+
+        :param namespace: name of connection.
+        :returns: Batch or None.
+        """
+        return getattr(_state, 'batches', {}).get(namespace)
+
+    @classmethod
+    def start(cls, namespace, connect, transaction=False):
+        """
+        This method returns the current batch of given namespace or, if there's none, a new
+        immediate batch.
+
+        :param namespace: name of connection.
+        :param connect: Redis connection used for a new batch.
+        :param transaction: whether a new batch should use MULTI/EXEC.
+        :returns: Batch.
+        """
+        return cls.current(namespace) or cls(connect.pipeline(transaction=transaction))
+
+    def on_flush(self, callback):
+        """
+        This method registers a function called after the writes are executed.
+
+        :param callback: function without arguments.
+        """
+        self.callbacks.append(callback)
+
+    def on_discard(self, callback):
+        """
+        This method registers a function called if the writes are discarded instead.
+
+        :param callback: function without arguments.
+        """
+        self.discard_callbacks.append(callback)
+
+    def flush(self):
+        """
+        This method executes an immediate batch. Deferred batches are left to their owner.
+
+        :returns: pipeline results or None if the batch is deferred.
+        """
+        if self.deferred:
+            return None
+        return self.execute()
+
+    def execute(self):
+        """
+        This method executes queued writes and calls registered callbacks. If the pipeline fails,
+        the batch is discarded.
+
+        :returns: pipeline results.
+        """
+        try:
+            results = self.pipe.execute()
+        except BaseException:
+            self.discard()
+            raise
+        callbacks, self.callbacks, self.discard_callbacks = self.callbacks, [], []
+        for callback in callbacks:
+            callback()
+        return results
+
+    def discard(self):
+        """
+        This method drops queued writes and callbacks, calling the ones registered with on_discard.
+        """
+        self.pipe.reset()
+        callbacks, self.callbacks, self.discard_callbacks = self.discard_callbacks, [], []
+        for callback in reversed(callbacks):
+            callback()
+
+
+@contextmanager
+def batch(namespace='redis', transaction=False):
+    """
+    This context manager collects writes made by RedisModel.save and delete, RedisHash.save,
+    RedisSortedSet.save and RedisList.append, prepend, extend, extendleft and save for given namespace
+    in current thread.
+    They're flushed in one pipeline on exit or discarded if an exception is raised - changelists
+    of hashes, sorted sets and buffered lists and changes of models are then kept, so they can be saved again.
+    Nested batches of the same namespace join the outer one.
+
+    Writes don't return Redis's responses while batched (e.g. RedisList.append returns None).
+
+    :param namespace: name of connection.
+    :param transaction: whether the pipeline should be executed as MULTI/EXEC transaction.
+    :returns: Batch.
+    """
+    current = Batch.current(namespace)
+    if current is not None:
+        yield current
+        return
+    current = Batch(RedisModelRegister(namespace).connect().pipeline(transaction=transaction), deferred=True)
+    if not hasattr(_state, 'batches'):
+        _state.batches = {}
+    _state.batches[namespace] = current
+    try:
+        yield current
+    except BaseException:
+        current.discard()
+        raise
+    else:
+        current.execute()
+    finally:
+        del _state.batches[namespace]
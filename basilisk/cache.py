@@ -0,0 +1,213 @@
+"""
+This module defines an in-process near cache which can be put in front of Redis models.
+"""
+import copy
+import os
+import threading
+from collections import OrderedDict
+from timeit import default_timer
+
+__all__ = ['NearCache']
+
+
+def copy_data(data):
+    """
+    This function copies pythonized data, so mutable values (dicts, lists and sets) aren't shared.
+
+    :param data: dict of values.
+    :returns: dict of values.
+    """
+    if not isinstance(data, dict):
+        return data
+    return {name: copy.deepcopy(value) if isinstance(value, (dict, list, set)) else value
+            for name, value in data.items()}
+
+
+class NearCache(object):
+    """
+    This class is a bounded LRU cache with TTL, keeping pythonized data of model instances
+    under their Redis keys. Entries are invalidated across processes with messages
+    published on a Redis pub/sub channel - every cache listens on it in a background thread
+    started on first use.
+
+    Mutable values (like dicts in JsonMapField) are copied when data is cached and served,
+    so instances never share them.
+
+    Every invalidation bumps the cache's generation. Data fetched by a reader is cached only
+    if its key wasn't invalidated since the reader took the generation, before fetching -
+    otherwise an invalidation handled during the fetch would be followed by caching stale data.
+    """
+    channel = 'basilisk.invalidate'
+
+    def __init__(self, max_size=1000, ttl=60, channel=None):
+        """
+        This method sets up an empty cache.
+
+        :param max_size: maximum number of entries kept in cache.
+        :param ttl: number of seconds after which an entry expires.
+        :param channel: name of pub/sub channel used for invalidation messages.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.channel = channel or self.channel
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._invalidated = OrderedDict()
+        self._forgotten = 0
+        self._lock = threading.Lock()
+        self._listener = None
+        self._listener_pid = None
+
+    def get(self, key):
+        """
+        This method returns data cached under given key, if it's there and hasn't expired yet.
+
+        :param key: Redis key of an instance.
+        :returns: cached data or None.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[0] < default_timer():
+                self.misses += 1
+                return None
+            self._entries[key] = entry
+            self.hits += 1
+        return copy_data(entry[1])
+
+    def generation(self):
+        """
+        This method returns cache's current generation, which should be taken before data is fetched.
+
+        :returns: number of invalidations so far.
+        """
+        return self._generation
+
+    def set(self, key, data, generation=None):
+        """
+        This method puts data in cache, evicting least recently used entries if it's full.
+        Data is skipped if the key was invalidated after given generation. Generations of
+        invalidated keys are remembered for max_size keys - if the key's one was forgotten,
+        data is skipped when any forgotten invalidation is newer.
+
+        :param key: Redis key of an instance.
+        :param data: pythonized instance data.
+        :param generation: generation taken before data was fetched or None to cache data anyway.
+        """
+        data = copy_data(data)
+        with self._lock:
+            if generation is not None and self._invalidated.get(key, self._forgotten) > generation:
+                return
+            self._entries.pop(key, None)
+            self._entries[key] = (default_timer() + self.ttl, data)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """
+        This method removes given key from cache.
+
+        :param key: Redis key of an instance.
+        """
+        with self._lock:
+            self._generation += 1
+            self._invalidated.pop(key, None)
+            self._invalidated[key] = self._generation
+            while len(self._invalidated) > self.max_size:
+                self._forgotten = self._invalidated.popitem(last=False)[1]
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        """
+        This method removes all entries from cache. Data fetched before isn't cached afterwards.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self._forgotten = self._generation
+            self._invalidated.clear()
+
+    def stats(self):
+        """
+        This method returns cache counters.
+
+        :returns: dict with hits, misses, evictions, invalidations and current size.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'invalidations': self.invalidations, 'size': len(self._entries)}
+
+    def __len__(self):
+        """
+        Number of entries currently kept in cache.
+
+        :returns: number of entries.
+        """
+        return len(self._entries)
+
+    def listen(self, connect):
+        """
+        This method makes sure a thread listening for invalidation messages is running
+        in current process. Entries cached before the listener was (re)started may have missed
+        invalidations, so they're dropped.
+
+        :param connect: Redis connection.
+        """
+        if self._listener_pid == os.getpid():
+            return
+        with self._lock:
+            if self._listener_pid == os.getpid():
+                return
+            pubsub = connect.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: self._handle_message})
+            self._listener = pubsub.run_in_thread(sleep_time=1, daemon=True)
+            self._listener_pid = os.getpid()
+            self._entries.clear()
+            self._generation += 1
+            self._forgotten = self._generation
+            self._invalidated.clear()
+
+    async def alisten(self, connect):
+        """
+        This coroutine makes sure the listener is running without blocking the event loop -
+        subscribing talks to Redis, so it's done in a worker thread.
+
+        :param connect: Redis connection (a blocking one, as the listener runs in a thread).
+        """
+        if self._listener_pid == os.getpid():
+            return
+        import asyncio  # pylint: disable=import-outside-toplevel
+        await asyncio.get_running_loop().run_in_executor(None, self.listen, connect)
+
+    def stop(self):
+        """
+        This method stops the invalidation listener thread.
+        """
+        with self._lock:
+            if self._listener is not None and self._listener_pid == os.getpid():
+                self._listener.stop()
+            self._listener = None
+            self._listener_pid = None
+
+    def publish(self, pipe, key):
+        """
+        This method queues an invalidation message for given key in a Redis pipeline.
+
+        :param pipe: Redis pipeline.
+        :param key: Redis key of an instance.
+        """
+        pipe.publish(self.channel, key)
+
+    def _handle_message(self, message):
+        """
+        This method invalidates a key received from pub/sub channel.
+
+        :param message: pub/sub message.
+        """
+        key = message['data']
+        self.invalidate(key if isinstance(key, str) else key.decode('utf-8'))
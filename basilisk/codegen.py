@@ -0,0 +1,178 @@
+"""
+This module generates functions initializing, serializing and pythonizing instances of
+a particular model class. They're compiled once, when the class is defined, with loops over
+fields unrolled and each field's default value, serializer and deserializer looked up
+in advance, so none of it happens per instance.
+
+Compact models keep fields' values in slots instead of instance's __dict__, so their
+functions access attributes instead.
+
+Lazy fields are pythonized by their descriptors on first access, so fetched values are
+only wrapped in RawValue and serialized without being pythonized.
+"""
+from .fields import MapField, RawValue, to_text
+
+__all__ = ['compile_model']
+
+
+def _compile(name, lines, namespace):
+    """
+    This function compiles source of a function.
+
+    :param name: function name.
+    :param lines: lines of function's source.
+    :param namespace: globals available to the function.
+    :returns: function.
+    """
+    code = compile('\n'.join(lines) + '\n', '<basilisk {}>'.format(name), 'exec')
+    exec(code, namespace)  # pylint: disable=exec-used
+    return namespace[name]
+
+
+def _assign(name, value, compact):
+    """
+    This function generates an assignment bypassing MapModelBase.__setattr__.
+
+    :param name: attribute name.
+    :param value: expression.
+    :param compact: whether the attribute is kept in a slot.
+    :returns: statement.
+    """
+    if compact:
+        return 'set_slot(self, {!r}, {})'.format(name, value)
+    return 'values[{!r}] = {}'.format(name, value)
+
+
+def compile_init(fields, compact=False, state=None):
+    """
+    This function generates _init_fields, filling instance's fields with given values or defaults.
+    Defaults of fields which don't override get_default are computed once.
+
+    :param fields: dict of field name: MapField.
+    :param compact: whether values are kept in slots.
+    :param state: dict of name: default value of other attributes, which have to be set in slots.
+    :returns: function(self, kwargs).
+    """
+    namespace = {'set_slot': object.__setattr__, 'names': frozenset(fields)}
+    lines = ['def _init_fields(self, kwargs):']
+    if not compact:
+        lines.append('    values = self.__dict__')
+    lines.append('    if kwargs:')
+    defaults = []
+    for index, (name, field) in enumerate(fields.items()):
+        if type(field).get_default is MapField.get_default:
+            namespace['default_{}'.format(index)] = field.get_default()
+            default = 'default_{}'.format(index)
+        else:
+            namespace['field_{}'.format(index)] = field
+            default = 'field_{}.get_default()'.format(index)
+        lines.append('        ' + _assign(name, 'kwargs[{0!r}] if {0!r} in kwargs else {1}'.format(name, default),
+                                          compact))
+        defaults.append('        ' + _assign(name, default, compact))
+    lines.append('    else:')
+    lines.extend(defaults or ['        pass'])
+    lines.append('    ' + _assign('_dirty', 'set(names)', compact))
+    if compact:
+        for index, (name, value) in enumerate(sorted((state or {}).items())):
+            namespace['state_{}'.format(index)] = value
+            lines.append('    ' + _assign(name, 'state_{}'.format(index), compact))
+    return _compile('_init_fields', lines, namespace)
+
+
+def compile_encode(fields, compact=False, lazy=None):
+    """
+    This function generates _encode, serializing loaded fields. Fields which don't override
+    serialize are passed as they are.
+
+    :param fields: dict of field name: MapField.
+    :param compact: whether values are kept in slots.
+    :param lazy: dict of field name: LazyFieldDescriptor of lazy fields.
+    :returns: function(self, fields).
+    """
+    namespace = {}
+    values = []
+    for index, (name, field) in enumerate(fields.items()):
+        if compact and name in (lazy or {}):
+            namespace['lazy_{}'.format(index)] = lazy[name]
+            value = 'lazy_{}.get_raw(self)'.format(index)
+        elif compact:
+            value = 'self.{}'.format(name)
+        else:
+            value = 'values[{!r}]'.format(name)
+        if type(field).serialize is not MapField.serialize:
+            namespace['serialize_{}'.format(index)] = field.serialize
+            value = 'serialize_{}({})'.format(index, value)
+        values.append((name, value))
+    lines = ['def _encode(self, fields):']
+    if not compact:
+        lines.append('    values = self.__dict__')
+    lines += ['    unloaded = self._unloaded',
+              '    if fields is None and not unloaded:',
+              '        return {' + ', '.join('{!r}: {}'.format(name, value) for name, value in values) + '}',
+              '    data = {}']
+    for name, value in values:
+        lines.append('    if {0!r} not in unloaded and (fields is None or {0!r} in fields):'.format(name))
+        lines.append('        data[{!r}] = {}'.format(name, value))
+    lines.append('    return data')
+    return _compile('_encode', lines, namespace)
+
+
+def compile_decode(fields):
+    """
+    This function generates _decode, pythonizing data fetched from NoSQL store.
+    Keys of the data are expected to be either all bytes or all text. The default
+    text deserializer is inlined.
+
+    :param fields: dict of field name: MapField.
+    :returns: function(data).
+    """
+    namespace = {'missing': object()}
+    text_lines = []
+    bytes_lines = []
+    for index, (name, field) in enumerate(fields.items()):
+        if field.is_lazy():
+            pythonize = RawValue
+        elif type(field).pythonize is MapField.pythonize:
+            pythonize = field.get_type()
+        else:
+            pythonize = field.pythonize
+        if pythonize is to_text:
+            value = "value.decode('utf-8') if value.__class__ is bytes else value"
+        elif pythonize:
+            namespace['pythonize_{}'.format(index)] = pythonize
+            value = 'pythonize_{}(value)'.format(index)
+        else:
+            value = 'value'
+        for lines, key in ((text_lines, name), (bytes_lines, name.encode('utf-8'))):
+            lines.append('        value = data.get({!r}, missing)'.format(key))
+            lines.append('        if value is not missing:')
+            lines.append('            pythonized[{!r}] = {}'.format(name, value))
+    lines = ['def _decode(data):',
+             '    pythonized = {}',
+             '    for key in data:',
+             '        break',
+             '    else:',
+             '        return pythonized',
+             '    if key.__class__ is bytes:']
+    lines.extend(bytes_lines or ['        pass'])
+    lines.append('    else:')
+    lines.extend(text_lines or ['        pass'])
+    lines.append('    return pythonized')
+    return _compile('_decode', lines, namespace)
+
+
+def compile_model(fields, compact=False, state=None, lazy=None):
+    """
+    This function generates all specialized functions of a model.
+
+    :param fields: dict of field name: MapField.
+    :param compact: whether values are kept in slots.
+    :param state: dict of name: default value of other attributes kept in slots of compact models.
+    :param lazy: dict of field name: LazyFieldDescriptor of lazy fields.
+    :returns: dict of attributes to set in the model class.
+    """
+    return {
+        '_init_fields': compile_init(fields, compact, state),
+        '_encode': compile_encode(fields, compact, lazy),
+        '_decode': staticmethod(compile_decode(fields)),
+    }
@@ -2,7 +2,6 @@
 This module defines a Elasticsearch-backed model.
 """
 
-from elasticsearch.exceptions import NotFoundError
 from six import with_metaclass
 
 from .base import ElasticsearchModelCreator, MapModelBase, MapModelException
@@ -26,12 +25,13 @@ class ElasticsearchModel(with_metaclass(ElasticsearchModelCreator, MapModelBase)
 
     Elasticsearch connection is available in connect property.
     Dict of fields is available in _fields property.
+    Asyncio client (for the running event loop) is available from aconnect().
 
-    Reserved property names, apart from methods, are _fields, id_field and connect.
+    Reserved property names, apart from methods, are _fields, id_field, connect and aconnect.
 
     :type connect: elasticsearch.Elasticsearch
     """
-
+    __slots__ = ()
     MapModelException = ElasticsearchModelException
     ElasticsearchModelException = ElasticsearchModelException
 
@@ -50,6 +50,24 @@ class ElasticsearchModel(with_metaclass(ElasticsearchModelCreator, MapModelBase)
         self.connect.index(**params)
         return self
 
+    async def asave(self, create_id=True):
+        """
+        This coroutine is an asyncio counterpart of save.
+
+        :param create_id: whether id should be created automatically if it's not set yet.
+        """
+        self._save(create_id)
+        params = self.get_instance_key()
+        params['body'] = self.serialize()
+        await self.aconnect().index(**params)
+        return self
+
+    def delete(self):
+        """
+        Let's remove the instance from Elasticsearch.
+        """
+        self.connect.delete(**self.get_instance_key())
+
     @classmethod
     def get_key(cls, oid=None):
         """
@@ -71,6 +89,7 @@ class ElasticsearchModel(with_metaclass(ElasticsearchModelCreator, MapModelBase)
         :param oid: id of object to get.
         :returns: hydrated model instance.
         """
+        from elasticsearch.exceptions import NotFoundError  # pylint: disable=import-outside-toplevel
         try:
             data = cls.connect.get(**cls.get_key(oid))['_source']
         except NotFoundError:
@@ -79,3 +98,64 @@ class ElasticsearchModel(with_metaclass(ElasticsearchModelCreator, MapModelBase)
             return cls(**cls.pythonize(data))
         raise ElasticsearchModelException('No object with primary key {} of class {}'.format(cls.get_key(oid),
                                                                                              cls.__name__))
+
+    @classmethod
+    def get_many(cls, oids, skip_missing=False):
+        """
+        This method gets model instances with given ids from Elasticsearch in a single mget request.
+
+        :param oids: ids of objects to get.
+        :param skip_missing: whether missing ids should be skipped instead of returned as None.
+        :returns: list of hydrated model instances in the same order as oids.
+        """
+        if not oids:
+            return []
+        return cls._hydrate_docs(cls.connect.mget(body={'ids': list(oids)}, **cls.get_key()), skip_missing)
+
+    @classmethod
+    async def aget_many(cls, oids, skip_missing=False):
+        """
+        This coroutine is an asyncio counterpart of get_many.
+
+        :param oids: ids of objects to get.
+        :param skip_missing: whether missing ids should be skipped instead of returned as None.
+        :returns: list of hydrated model instances in the same order as oids.
+        """
+        if not oids:
+            return []
+        return cls._hydrate_docs(await cls.aconnect().mget(body={'ids': list(oids)}, **cls.get_key()), skip_missing)
+
+    @classmethod
+    def _hydrate_docs(cls, response, skip_missing):
+        """
+        This method creates instances from documents returned by mget.
+
+        :param response: mget response.
+        :param skip_missing: whether missing documents should be skipped instead of returned as None.
+        :returns: list of model instances (or None).
+        """
+        models = []
+        for doc in response['docs']:
+            if doc.get('found') and doc.get('_source'):
+                models.append(cls(**cls.pythonize(doc['_source'])))
+            elif not skip_missing:
+                models.append(None)
+        return models
+
+    @classmethod
+    async def aget(cls, oid):
+        """
+        This coroutine is an asyncio counterpart of get.
+
+        :param oid: id of object to get.
+        :returns: hydrated model instance.
+        """
+        from elasticsearch.exceptions import NotFoundError  # pylint: disable=import-outside-toplevel
+        try:
+            data = (await cls.aconnect().get(**cls.get_key(oid)))['_source']
+        except NotFoundError:
+            data = None
+        if data:
+            return cls(**cls.pythonize(data))
+        raise ElasticsearchModelException('No object with primary key {} of class {}'.format(cls.get_key(oid),
+                                                                                             cls.__name__))
@@ -3,7 +3,38 @@ This module contains serializable fields ready to use in NoSQL store models.
 """
 import json
 
-from six import text_type
+from six import binary_type, text_type
+
+
+def to_text(data):
+    """
+    This function is the default deserializing function of fields, decoding bytes to text.
+
+    :param data: data fetched from NoSQL store.
+    :returns: text.
+    """
+    return data if isinstance(data, str) else data.decode('utf-8')
+
+
+class RawValue(object):
+    """
+    This class wraps a value fetched from NoSQL store for a lazy field, which isn't pythonized yet.
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        """
+        This method wraps fetched data.
+
+        :param data: data fetched from NoSQL store.
+        """
+        self.data = data
+
+    def __repr__(self):
+        """
+        :returns: representation of the wrapped data.
+        """
+        return 'RawValue({!r})'.format(self.data)
 
 
 class MapField(object):
@@ -11,7 +42,7 @@ class MapField(object):
     This is a base class for all NoSQL store fields. It supports data-based initialisation,
     default values and prepping values to serialization.
     """
-    __slots__ = ('_type', '_default', '_name', '_key')
+    __slots__ = ('_type', '_default', '_name', '_key', '_index', '_range_index')
 
     def __init__(self, **kwargs):
         """
@@ -19,12 +50,16 @@ class MapField(object):
 
         :param kwargs: may contain deserializing function 'type' (default unicode),
          default for default value (None), key determining whether a field is model's
-         primary key and name (but that's better used by NoSQLModelCreator).
+         primary key, index determining whether a field should be indexed, range_index
+         determining whether a numeric field should be indexed for range queries and name
+         (but that's better used by NoSQLModelCreator).
         """
-        self._type = kwargs.get('type', lambda data: data if isinstance(data, str) else data.decode('utf-8'))
+        self._type = kwargs.get('type', to_text)
         self._default = kwargs.get('default', None)
         self._name = kwargs.get('name', None)
         self._key = kwargs.get('key', False)
+        self._index = kwargs.get('index', False)
+        self._range_index = kwargs.get('range_index', False)
 
     def get_default(self):
         """
@@ -42,6 +77,59 @@ class MapField(object):
         """
         return self._key
 
+    def is_indexed(self):
+        """
+        Should the field be indexed, so models can be looked up by its value.
+
+        :returns: boolean.
+        """
+        return self._index
+
+    def get_index_value(self, data):
+        """
+        This function converts a value to text used in index keys.
+
+        :param data: input data.
+        :returns: serialized data as text.
+        """
+        data = self.serialize(data)
+        if isinstance(data, binary_type):
+            return data.decode('utf-8')
+        return text_type(data)
+
+    def is_range_indexed(self):
+        """
+        Should the field be indexed by its numeric value, so models can be queried by ranges.
+
+        :returns: boolean.
+        """
+        return self._range_index
+
+    def is_lazy(self):
+        """
+        Should the field's value be pythonized only when it's accessed for the first time.
+
+        :returns: boolean.
+        """
+        return False
+
+    def is_mutable(self):
+        """
+        Can the field's value be changed in place, so changes have to be detected by comparing serialized values.
+
+        :returns: boolean.
+        """
+        return False
+
+    def get_index_score(self, data):
+        """
+        This function converts a value to number used as score in range indexes.
+
+        :param data: input data.
+        :returns: float.
+        """
+        return float(self.get_index_value(data))
+
     def set_name(self, name):
         """
         It sets field's name to make it self-conscious.
@@ -52,6 +140,14 @@ class MapField(object):
         self._name = name
         return self
 
+    def get_type(self):
+        """
+        Returns field's deserializing function.
+
+        :returns: function or None.
+        """
+        return self._type
+
     def get_name(self):
         """
         Returns field's name.
@@ -84,26 +180,48 @@ class MapField(object):
 class JsonMapField(MapField):
     """
     This class enables keeping JSON as field value.
+
+    Lazy fields keep fetched JSON as it is and load it on first access. If the value is never
+    accessed, it's written back as it was fetched.
     """
 
     def __init__(self, **kwargs):
         """
         Set the default value to empty dict.
 
-        :param kwargs:
+        :param kwargs: MapField's kwargs and lazy determining whether JSON should be loaded on first access.
         """
         if 'default' not in kwargs:
             kwargs['default'] = {}
+        self._lazy = kwargs.get('lazy', False)
         super(JsonMapField, self).__init__(**kwargs)
 
+    def is_lazy(self):
+        """
+        Should the field's value be pythonized only when it's accessed for the first time.
+
+        :returns: boolean.
+        """
+        return self._lazy
+
+    def is_mutable(self):
+        """
+        Can the field's value be changed in place, so changes have to be detected by comparing serialized values.
+
+        :returns: boolean.
+        """
+        return True
+
     @staticmethod
     def serialize(data):
         """
-        This function dumps data to JSON.
+        This function dumps data to JSON. Raw values of lazy fields are already JSON.
 
         :param data: input data.
         :returns: data dumped to JSON.
         """
+        if isinstance(data, RawValue):
+            return data.data
         return json.dumps(data)
 
     def pythonize(self, data):
@@ -115,4 +233,4 @@ class JsonMapField(MapField):
         """
         if isinstance(data, text_type):
             return json.loads(data)
-        return json.loads(text_type(data, 'utf-8'), 'utf-8')
+        return json.loads(text_type(data, 'utf-8'))
@@ -0,0 +1,70 @@
+"""
+This module defines a base of pipelines recording commands, so clients routing them
+between Redis instances can decide where to send them once they're executed.
+"""
+from redis.commands import CoreCommands
+
+__all__ = ['RecordingPipeline']
+
+
+class RecordingPipeline(CoreCommands):
+    """
+    This class records pipelined commands as (args, options) pairs. Subclasses define execute.
+    """
+
+    def __init__(self, client, transaction=True):
+        """
+        This method sets up the pipeline.
+
+        :param client: routing client which created the pipeline.
+        :param transaction: whether commands should be executed as MULTI/EXEC.
+        """
+        self.client = client
+        self.transaction = transaction
+        self.commands = []
+
+    def execute_command(self, *args, **options):
+        """
+        This method records a command.
+
+        :param args: command name and arguments.
+        :param options: options passed to response callbacks.
+        :returns: self
+        """
+        self.commands.append((args, options))
+        return self
+
+    def __len__(self):
+        """
+        Number of recorded commands.
+
+        :returns: int
+        """
+        return len(self.commands)
+
+    def __enter__(self):
+        """
+        Pipelines can be used as context managers.
+        """
+        return self
+
+    def __exit__(self, *_):
+        """
+        Recorded commands are dropped on exit.
+        """
+        self.reset()
+
+    def reset(self):
+        """
+        This method drops recorded commands.
+        """
+        self.commands = []
+
+    def execute(self, raise_on_error=True):
+        """
+        This method sends recorded commands.
+
+        :param raise_on_error: whether the first error should be raised.
+        :returns: list of responses.
+        """
+        raise NotImplementedError
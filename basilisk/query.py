@@ -0,0 +1,188 @@
+"""
+This module defines ordered range queries over Redis models' range indexes.
+"""
+__all__ = ['RedisQuery']
+
+
+class RedisQuery(object):
+    """
+    This class builds a query over a single range-indexed field of a Redis model.
+    Queries are lazy and immutable - where, order_by, limit and offset return new queries.
+    Matching ids are resolved by ZRANGEBYSCORE (or ZREVRANGEBYSCORE) on Redis's side and
+    instances are loaded with a single get_many call. Ids of expired instances are skipped
+    when loading, but they take part in limit and offset until the model's purge_expired() removes them.
+
+    Supported conditions are field (exact), field__gt, field__gte, field__lt and field__lte.
+    """
+    LOOKUPS = ('gt', 'gte', 'lt', 'lte')
+
+    def __init__(self, model, field=None, lower=None, upper=None, descending=False, start=0, count=None):
+        """
+        This method sets up the query. It's better to build it with RedisModel.where.
+
+        :param model: queried model class.
+        :param field: name of queried range-indexed field.
+        :param lower: lower bound as a (score, exclusive) tuple or None.
+        :param upper: upper bound as a (score, exclusive) tuple or None.
+        :param descending: whether results are ordered from the highest score.
+        :param start: number of skipped results.
+        :param count: maximum number of results or None.
+        """
+        self.model = model
+        self.field = field
+        self.lower = lower
+        self.upper = upper
+        self.descending = descending
+        self.start = start
+        self.count = count
+
+    def _clone(self, **kwargs):
+        """
+        This method creates a copy of the query with given properties changed.
+
+        :param kwargs: properties to change.
+        :returns: new query.
+        """
+        params = dict(field=self.field, lower=self.lower, upper=self.upper, descending=self.descending,
+                      start=self.start, count=self.count)
+        params.update(kwargs)
+        return RedisQuery(self.model, **params)
+
+    def _check_field(self, name):
+        """
+        This method makes sure given field can be queried together with the rest of the query.
+
+        :param name: field name.
+        """
+        field = self.model.get_fields().get(name)
+        if field is None or not field.is_range_indexed():
+            raise self.model.RedisModelException('Field {} of class {} is not range indexed'.format(
+                name, self.model.__name__))
+        if self.field is not None and self.field != name:
+            raise self.model.RedisModelException('Query of class {} already uses field {}, not {}'.format(
+                self.model.__name__, self.field, name))
+
+    def where(self, **conditions):
+        """
+        This method narrows the query with given conditions.
+
+        :param conditions: conditions like field__gte=value.
+        :returns: new query.
+        """
+        query = self
+        for condition, value in conditions.items():
+            name, _, lookup = condition.partition('__')
+            if lookup and lookup not in self.LOOKUPS:
+                raise self.model.RedisModelException('Unknown lookup {} in class {} query'.format(
+                    lookup, self.model.__name__))
+            query._check_field(name)  # pylint: disable=protected-access
+            score = self.model.get_fields()[name].get_index_score(value)
+            lower, upper = query.lower, query.upper
+            if lookup in ('', 'gt', 'gte'):
+                bound = (score, lookup == 'gt')
+                if lower is None or bound[0] > lower[0] or (bound[0] == lower[0] and bound[1]):
+                    lower = bound
+            if lookup in ('', 'lt', 'lte'):
+                bound = (score, lookup == 'lt')
+                if upper is None or bound[0] < upper[0] or (bound[0] == upper[0] and bound[1]):
+                    upper = bound
+            query = query._clone(field=name, lower=lower, upper=upper)  # pylint: disable=protected-access
+        return query
+
+    def order_by(self, name):
+        """
+        This method orders results by given field, prefix its name with - to order descending.
+
+        :param name: field name.
+        :returns: new query.
+        """
+        descending = name.startswith('-')
+        name = name.lstrip('-')
+        self._check_field(name)
+        return self._clone(field=name, descending=descending)
+
+    def limit(self, count):
+        """
+        This method limits the number of results.
+
+        :param count: maximum number of results.
+        :returns: new query.
+        """
+        return self._clone(count=count)
+
+    def offset(self, start):
+        """
+        This method skips given number of results.
+
+        :param start: number of skipped results.
+        :returns: new query.
+        """
+        return self._clone(start=start)
+
+    @staticmethod
+    def _format_bound(bound, infinity):
+        """
+        This method converts a bound to ZRANGEBYSCORE's format.
+
+        :param bound: (score, exclusive) tuple or None.
+        :param infinity: value used when there's no bound.
+        :returns: score as accepted by Redis.
+        """
+        if bound is None:
+            return infinity
+        return '({}'.format(bound[0]) if bound[1] else bound[0]
+
+    def _get_range(self):
+        """
+        This method returns query's key and bounds.
+
+        :returns: 3-tuple with range index key, lower and upper bound.
+        """
+        if self.field is None:
+            raise self.model.RedisModelException('Query of class {} needs a condition or ordering'.format(
+                self.model.__name__))
+        return (self.model.get_range_index_key(self.field), self._format_bound(self.lower, '-inf'),
+                self._format_bound(self.upper, '+inf'))
+
+    def ids(self):
+        """
+        This method resolves ids of matching instances.
+
+        :returns: list of ids in query's order.
+        """
+        key, lower, upper = self._get_range()
+        count = self.count
+        if count is None:
+            count = -1 if self.start else None
+        start = self.start if count is not None else None
+        if self.descending:
+            oids = self.model.connect.zrevrangebyscore(key, upper, lower, start, count)
+        else:
+            oids = self.model.connect.zrangebyscore(key, lower, upper, start, count)
+        return [oid if isinstance(oid, str) else oid.decode('utf-8') for oid in oids]
+
+    def all(self):
+        """
+        This method loads matching instances.
+
+        :returns: list of hydrated model instances in query's order.
+        """
+        return self.model.get_many(self.ids(), skip_missing=True)
+
+    def count_all(self):
+        """
+        This method counts all instances matching the conditions, regardless of limit and offset.
+        Expired instances are counted until their ids are removed with model's purge_expired().
+
+        :returns: number of instances.
+        """
+        key, lower, upper = self._get_range()
+        return self.model.connect.zcount(key, lower, upper)
+
+    def __iter__(self):
+        """
+        Iterating over the query loads matching instances.
+
+        :returns: iterator of model instances.
+        """
+        return iter(self.all())
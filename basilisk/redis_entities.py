@@ -2,13 +2,144 @@
 This module defines base classes corresponding to Redis types as well
 as Redis model.
 """
+import re
+import time
+import uuid
 from collections import defaultdict
+from timeit import default_timer
+
 from six import with_metaclass
 
-from .base import RedisModelRegister, RedisModelCreator, MapModelBase, MapModelException
+from .base import RedisModelRegister, RedisModelCreator, MapModelBase, MapModelException, NO_CHANGES
+from .batching import Batch
+from .fields import RawValue
+from .query import RedisQuery
+from .routing import use_primary
 
 __all__ = ['RedisModel', 'RedisSortedSet', 'RedisModelException', 'RedisHash', 'RedisList']
 
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_PURGE_MARGIN = 24 * 3600
+
+# KEYS: index record. ARGV: number of recorded fields, their names and index keys, names of removed fields.
+UPDATE_RECORD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local recorded = tonumber(ARGV[1])
+for index = 2, 2 * recorded, 2 do
+    redis.call('HSET', KEYS[1], ARGV[index], ARGV[index + 1])
+end
+for index = 2 * recorded + 2, #ARGV do
+    redis.call('HDEL', KEYS[1], ARGV[index])
+end
+return 1
+"""
+
+# KEYS: instance, index record, expiry set, recorded index sets, range indexes.
+# ARGV: id, current time, number of recorded index sets.
+PURGE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    local expires = redis.call('ZSCORE', KEYS[3], ARGV[1])
+    if expires and tonumber(expires) <= tonumber(ARGV[2]) then
+        redis.call('ZREM', KEYS[3], ARGV[1])
+    end
+    return 0
+end
+local recorded = tonumber(ARGV[3])
+local passed = {}
+for index = 4, 3 + recorded do
+    passed[KEYS[index]] = true
+end
+local current = redis.call('HVALS', KEYS[2])
+if #current ~= recorded then
+    return -1
+end
+for _, key in ipairs(current) do
+    if not passed[key] then
+        return -1
+    end
+end
+for index = 4, #KEYS do
+    if index <= 3 + recorded then
+        redis.call('SREM', KEYS[index], ARGV[1])
+    else
+        redis.call('ZREM', KEYS[index], ARGV[1])
+    end
+end
+redis.call('ZREM', KEYS[3], ARGV[1])
+redis.call('UNLINK', KEYS[2])
+return 1
+"""
+
+
+def chunks(iterable, size):
+    """
+    This generator splits given iterable into lists of at most size elements.
+
+    :param iterable: elements to split.
+    :param size: maximum length of a chunk.
+    :returns: generator of lists.
+    """
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def encode_value(value):
+    """
+    This function encodes a key or value like redis-py does before sending it to Redis.
+
+    :param value: value to encode.
+    :returns: bytes
+    """
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, float):
+        return repr(value).encode('utf-8')
+    return str(value).encode('utf-8')
+
+
+def take_changes(changes):
+    """
+    This function compacts a changelist to the last value of every key, which is what gets written,
+    and prepares a function removing these values from the changelist once they're written.
+    Values set in the meantime are kept.
+
+    :param changes: dict of key: list of values.
+    :returns: 2-tuple of dict of key: last value and a function without arguments.
+    """
+    queued = {}
+    for key, values in list(changes.items()):
+        changes[key] = queued[key] = [values[-1]]
+
+    def forget():
+        """
+        This function removes written values from the changelist.
+        """
+        for key, values in queued.items():
+            if changes.get(key) is values:
+                del values[0]
+                if not values:
+                    del changes[key]
+
+    return {key: values[0] for key, values in queued.items()}, forget
+
+
+def escape_pattern(text):
+    """
+    This function escapes glob-style special characters, so text can be used in MATCH patterns.
+
+    :param text: text to escape.
+    :returns: escaped text.
+    """
+    return re.sub(r'([*?\[\]\\])', r'\\\1', text)
+
 
 class RedisModelException(MapModelException):
     """
@@ -25,28 +156,452 @@ class RedisModel(with_metaclass(RedisModelCreator, MapModelBase)):
     Redis connection is available in connect property.
     Dict of fields is available in _fields property.
 
-    Reserved property names, apart from methods, are _fields, id_field and connect.
+    Models may opt in to an in-process near cache by setting near_cache to a NearCache
+    instance. Full loads are then served from it and save() publishes invalidations.
+
+    Fields declared with index=True are indexed in Redis sets kept in sync by save(),
+    so instances can be looked up by their values with filter(). Values indexed when
+    the instance was loaded or saved are remembered in _index_values. Numeric fields
+    declared with range_index=True are kept in sorted sets and can be queried with where().
+
+    If default_ttl is set (in seconds, float values are used with millisecond precision),
+    save() sets instance's expiry in the same pipeline. Redis can't expire members of index sets,
+    so ids of indexed instances are also scored by their expiry time in a sorted set and
+    purge_expired() (meant to be called periodically) removes index entries of expired instances.
+    Until then they're skipped by lookups, but still counted by RedisQuery.count_all().
+    Index sets of expiring instances are recorded in a hash expiring purge_margin seconds after
+    the instance, so purge_expired() has to be called more often than that.
+
+    Coroutines aget, aget_many, asave and adelete use redis.asyncio client available
+    (for the running event loop) from aconnect().
+
+    In sharded namespaces instances are spread over shards by their keys, so ids sharing
+    a hash tag, e.g. '{user:1}:profile' and '{user:1}:settings', are kept on the same shard.
+    Index entries live on shards of their index keys, so indexed saves are atomic only per shard.
+
+    Reserved property names, apart from methods, are _fields, _index_values, id_field,
+    connect, aconnect, near_cache, default_ttl, purge_margin and compact.
 
     :type connect: redis.Redis
+    :type near_cache: basilisk.cache.NearCache
+    :type _index_values: dict
     """
+    __slots__ = ()
     __metaclass__ = RedisModelCreator
     MapModelException = RedisModelException
     RedisModelException = RedisModelException
 
     namespace = 'redis'
     connect = None
+    near_cache = None
+    default_ttl = None
+    purge_margin = DEFAULT_PURGE_MARGIN
+    _index_values = {}
+    _instance_state = MapModelBase._instance_state + ('_index_values',)
+
+    def save(self, create_id=True, ttl=None):
+        """
+        Let's save instance's current state to Redis. Only fields changed since the instance
+        was loaded or saved are sent; if nothing changed and there's no expiry to set,
+        Redis is not contacted at all.
+        If the model has indexes, they're updated in the same MULTI/EXEC transaction.
+
+        :param create_id: whether id should be created automatically if it's not set yet.
+        :param ttl: instance's time to live in seconds, overrides model's default_ttl; 0 disables expiry.
+        :returns: self
+        """
+        self._save(create_id)
+        writes = Batch.start(self.namespace, self.connect, transaction=self.has_indexes())
+        written = self._write(writes.pipe, ttl)
+        if written is not None:
+            writes.on_flush(written)
+            writes.flush()
+        return self
 
-    def save(self, create_id=True):
+    async def asave(self, create_id=True, ttl=None):
         """
-        Let's save instance's current state to Redis.
+        This coroutine is an asyncio counterpart of save. Writes are not collected by batch().
 
         :param create_id: whether id should be created automatically if it's not set yet.
+        :param ttl: instance's time to live in seconds, overrides model's default_ttl; 0 disables expiry.
         :returns: self
         """
         self._save(create_id)
-        self.connect.hmset(self.get_instance_key(), self.serialize())
+        pipe = self.aconnect().pipeline(transaction=self.has_indexes())
+        written = self._write(pipe, ttl)
+        if written is not None:
+            await pipe.execute()
+            written()
         return self
 
+    async def adelete(self):
+        """
+        This coroutine is an asyncio counterpart of delete.
+        """
+        index_values, unknown = self._index_values, self._get_unknown_indexed_fields()
+        if unknown:
+            pipe, projection = self.aconnect().pipeline(transaction=False), self.get_projection(unknown)
+            self._queue_fetch(pipe, [self.get_instance_key()], projection)
+            index_values = self._merge_index_values(self._parse_fetched(await pipe.execute(), projection)[0], unknown)
+        pipe = self.aconnect().pipeline(transaction=self.has_indexes())
+        self._queue_delete(pipe, getattr(self, self.id_field), index_values)
+        await pipe.execute()
+        if self.near_cache is not None:
+            self.near_cache.invalidate(self.get_instance_key())
+
+    def delete(self):
+        """
+        Let's remove the instance from Redis (with non-blocking UNLINK) and from indexes.
+        If the instance wasn't loaded (e.g. Model(id=1).delete()) or its indexed fields were
+        left out of a partial load, their stored values are fetched first.
+        """
+        index_values, unknown = self._index_values, self._get_unknown_indexed_fields()
+        if unknown:
+            projection = self.get_projection(unknown)
+            with use_primary():
+                found = self._fetch([self.get_instance_key()], 1, projection)[0]
+            index_values = self._merge_index_values(found, unknown)
+        writes = Batch.start(self.namespace, self.connect, transaction=self.has_indexes())
+        self._queue_delete(writes.pipe, getattr(self, self.id_field), index_values)
+        if self.near_cache is not None:
+            writes.on_flush(lambda: self.near_cache.invalidate(self.get_instance_key()))
+        writes.flush()
+
+    def _write(self, pipe, ttl=None):
+        """
+        This method queues commands persisting instance's changed fields in given pipeline.
+        Fields set to None are removed from the hash, as Redis can't keep them.
+
+        :param pipe: Redis pipeline.
+        :param ttl: instance's time to live in seconds (0 removes expiry with PERSIST),
+         by default model's default_ttl is used.
+        :returns: function without arguments to call once the commands are executed, see _take_written,
+         or None if no command was queued.
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        fields = self.get_changed_fields()
+        data = self._write_fields(pipe, fields) if fields else {}
+        if ttl:
+            if isinstance(ttl, float):
+                pipe.pexpire(self.get_instance_key(), int(ttl * 1000))
+            else:
+                pipe.expire(self.get_instance_key(), ttl)
+        elif ttl == 0:
+            pipe.persist(self.get_instance_key())
+        if ttl is not None and self.has_indexes():
+            oid = getattr(self, self.id_field)
+            if ttl:
+                pipe.zadd(self.get_expiry_key(), {oid: time.time() + ttl})
+            else:
+                pipe.zrem(self.get_expiry_key(), oid)
+        if self.get_indexed_fields() and (fields or ttl is not None):
+            self._write_index_record(pipe, fields, ttl)
+        if not fields and ttl is None:
+            return None
+        return self._take_written(fields, data)
+
+    def _write_fields(self, pipe, fields):
+        """
+        This method queues commands persisting given fields, their indexes and cache invalidation.
+
+        :param pipe: Redis pipeline.
+        :param fields: names of fields to write.
+        :returns: dict of field name: serialized value.
+        """
+        data = self.serialize(fields=fields)
+        removed = [name for name, value in data.items() if value is None]
+        if removed:
+            pipe.hdel(self.get_instance_key(), *removed)
+        if len(removed) < len(data):
+            pipe.hset(self.get_instance_key(), mapping={name: value for name, value in data.items()
+                                                        if value is not None})
+        self._write_indexes(pipe, fields)
+        if self.near_cache is not None:
+            self.near_cache.publish(pipe, self.get_instance_key())
+        return data
+
+    def _write_indexes(self, pipe, fields):
+        """
+        This method queues commands moving instance's id between index sets of changed fields
+        and updating its scores in range indexes.
+        If primary key was changed, previously indexed values belong to the old id and are left alone.
+
+        :param pipe: Redis pipeline.
+        :param fields: names of changed fields.
+        """
+        oid = getattr(self, self.id_field)
+        previous = {} if self.id_field in self._dirty else self._index_values
+        for name, value in self._get_index_values().items():
+            if name in fields and previous.get(name) != value:
+                if previous.get(name) is not None:
+                    pipe.srem(self.get_index_key(name, previous[name]), oid)
+                pipe.sadd(self.get_index_key(name, value), oid)
+        for name in self.get_range_indexed_fields():
+            if name in fields:
+                value = getattr(self, name)
+                if value is None:
+                    pipe.zrem(self.get_range_index_key(name), oid)
+                else:
+                    pipe.zadd(self.get_range_index_key(name), {oid: self._fields[name].get_index_score(value)})
+
+    def _write_index_record(self, pipe, fields, ttl):
+        """
+        This method queues commands keeping the record of index sets the instance belongs to, which
+        is used by purge_expired, in sync. Saves setting an expiry record all loaded indexed fields
+        and expire the record purge_margin seconds after the instance, PERSIST removes the record
+        and other saves update it only if it exists.
+
+        :param pipe: Redis pipeline.
+        :param fields: names of changed fields.
+        :param ttl: instance's time to live in seconds, 0 or None.
+        """
+        key = self.get_index_record_key(getattr(self, self.id_field))
+        if ttl == 0:
+            pipe.unlink(key)
+            return
+        names = [name for name in self.get_indexed_fields() if name not in self._unloaded and (ttl or name in fields)]
+        values = self._get_index_values()
+        recorded = {name: self.get_index_key(name, values[name]) for name in names if name in values}
+        removed = [name for name in names if name not in values]
+        if ttl:
+            if recorded:
+                pipe.hset(key, mapping=recorded)
+            if removed:
+                pipe.hdel(key, *removed)
+            pipe.pexpire(key, int((ttl + self.purge_margin) * 1000))
+        elif names:
+            pipe.eval(UPDATE_RECORD_SCRIPT, 1, key, len(recorded),
+                      *[item for pair in recorded.items() for item in pair], *removed)
+
+    def _get_index_values(self):
+        """
+        This method returns current values of loaded indexed fields, as used in index keys.
+
+        :returns: dict of field name: index value.
+        """
+        return {name: self._fields[name].get_index_value(getattr(self, name))
+                for name in self.get_indexed_fields()
+                if name not in self._unloaded and getattr(self, name) is not None}
+
+    def _get_unknown_indexed_fields(self):
+        """
+        This method returns names of indexed fields whose values kept in index sets aren't known,
+        because the instance was neither loaded nor saved or they weren't loaded.
+
+        :returns: list of field names.
+        """
+        if self._index_values is RedisModel._index_values:
+            return self.get_indexed_fields()
+        return [name for name in self.get_indexed_fields() if name in self._unloaded]
+
+    def _merge_index_values(self, data, fields):
+        """
+        This method combines remembered index values with values of given fields fetched from Redis.
+
+        :param data: pythonized data of fetched fields or None if the instance doesn't exist.
+        :param fields: names of fetched indexed fields.
+        :returns: dict of field name: index value.
+        """
+        values = {name: value for name, value in self._index_values.items() if name not in fields}
+        values.update({name: self._fields[name].get_index_value(data[name])
+                       for name in fields if data and data.get(name) is not None})
+        return values
+
+    def _take_written(self, fields, data):
+        """
+        This method remembers what was queued by _write and prepares a function updating instance's
+        state once it's executed. Only written fields are marked as unchanged then - fields assigned
+        again in the meantime (e.g. inside batch()) stay changed and mutable fields are compared
+        with their written values, so later changes are saved by the next save().
+
+        :param fields: names of written fields.
+        :param data: dict of field name: serialized value of written fields.
+        :returns: function without arguments.
+        """
+        assigned = {name: self._get_raw(name) for name in self._dirty if name in fields}
+        serialized = {name: data[name] for name, field in self._fields.items()
+                      if name in data and field.is_mutable() and not isinstance(self._get_raw(name), RawValue)}
+        index_values = self._get_index_values() if self.get_indexed_fields() else None
+
+        def written():
+            """
+            This function updates instance's state after the commands were executed.
+            """
+            if index_values is not None:
+                self._index_values = index_values
+            self._dirty = {name for name in self._dirty
+                           if name not in assigned or self._get_raw(name) is not assigned[name]} or NO_CHANGES
+            if serialized:
+                self._serialized = dict(self._serialized, **serialized)
+            if self.near_cache is not None:
+                self.near_cache.invalidate(self.get_instance_key())
+
+        return written
+
+    @classmethod
+    def save_many(cls, instances, chunk_size=DEFAULT_CHUNK_SIZE, transaction=False, create_id=True, ttl=None):
+        """
+        Let's save many instances at once. Writes are flushed in pipelines of at most
+        chunk_size instances, optionally wrapped in MULTI/EXEC.
+
+        :param instances: model instances to save.
+        :param chunk_size: maximum number of instances saved in a single pipeline.
+        :param transaction: whether each chunk should be executed as a MULTI/EXEC transaction.
+        :param create_id: whether ids should be created automatically if they're not set yet.
+        :param ttl: instances' time to live in seconds, overrides model's default_ttl; 0 disables expiry.
+        :returns: list of times (in seconds) it took to save each chunk.
+        """
+        timings = []
+        for chunk in chunks(instances, chunk_size):
+            start = default_timer()
+            pipe = cls.connect.pipeline(transaction=transaction)
+            written = []
+            for instance in chunk:
+                instance._save(create_id)  # pylint: disable=protected-access
+                written.append(instance._write(pipe, ttl))  # pylint: disable=protected-access
+            pipe.execute()
+            for callback in written:
+                if callback is not None:
+                    callback()
+            timings.append(default_timer() - start)
+        return timings
+
+    @classmethod
+    def delete_many(cls, oids, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Let's remove many instances at once, using pipelined non-blocking UNLINKs sent
+        in chunks. If the model has set indexes, indexed values are fetched first (in one
+        pipeline per chunk, from primaries), so instances can be removed from them as well.
+
+        :param oids: ids of objects to remove.
+        :param chunk_size: maximum number of instances removed in a single pipeline.
+        :returns: number of removed instances.
+        """
+        removed = 0
+        indexed = cls.get_indexed_fields()
+        for chunk in chunks(oids, chunk_size):
+            keys = [cls.get_key(oid) for oid in chunk]
+            if indexed:
+                with use_primary():
+                    found = cls._fetch(keys, chunk_size, cls.get_projection(indexed))
+                values = [{name: cls._fields[name].get_index_value(data[name])
+                           for name in indexed if data.get(name) is not None} if data else {} for data in found]
+            else:
+                values = [{}] * len(chunk)
+            pipe = cls.connect.pipeline(transaction=False)
+            positions = []
+            for oid, index_values in zip(chunk, values):
+                positions.append(len(pipe))
+                cls._queue_delete(pipe, oid, index_values)
+            results = pipe.execute()
+            removed += sum(results[position] for position in positions)
+            if cls.near_cache is not None:
+                for key in keys:
+                    cls.near_cache.invalidate(key)
+        return removed
+
+    @classmethod
+    def _queue_delete(cls, pipe, oid, index_values):
+        """
+        This method queues commands removing an instance, its index entries and cached copies.
+        UNLINK is always queued first.
+
+        :param pipe: Redis pipeline.
+        :param oid: id of object to remove.
+        :param index_values: dict of field name: indexed value of the object.
+        """
+        key = cls.get_key(oid)
+        pipe.unlink(key)
+        for name, value in index_values.items():
+            pipe.srem(cls.get_index_key(name, value), oid)
+        for name in cls.get_range_indexed_fields():
+            pipe.zrem(cls.get_range_index_key(name), oid)
+        if cls.has_indexes():
+            pipe.zrem(cls.get_expiry_key(), oid)
+        if cls.get_indexed_fields():
+            pipe.unlink(cls.get_index_record_key(oid))
+        if cls.near_cache is not None:
+            cls.near_cache.publish(pipe, key)
+
+    @classmethod
+    def purge_expired(cls, batch_size=DEFAULT_CHUNK_SIZE):
+        """
+        This method removes ids of expired instances from set and range indexes. Ids whose expiry
+        time has passed are read from the expiry sorted set together with records of index sets
+        they were added to, and every instance is checked and removed from exactly these sets
+        and range indexes by a Lua script, so it costs as much as the number of expired instances.
+        The check is atomic, so instances saved again in the meantime keep their index entries.
+        Index entries of sharded namespaces live on different shards than instances, so there
+        the check is pipelined before removal instead.
+        Everything is read from primaries, as replicas may not have seen recent saves yet.
+
+        :param batch_size: maximum number of ids handled at once.
+        :returns: number of expired instances removed from indexes.
+        """
+        if not cls.has_indexes():
+            return 0
+        with use_primary():
+            return cls._purge_expired(batch_size)
+
+    @classmethod
+    def _purge_expired(cls, batch_size):
+        """
+        This method removes ids of expired instances from indexes, see purge_expired.
+
+        :param batch_size: maximum number of ids handled at once.
+        :returns: number of expired instances removed from indexes.
+        """
+        connect = cls.connect
+        sharded = RedisModelRegister(cls.namespace).shards is not None
+        ranges = [cls.get_range_index_key(name) for name in cls.get_range_indexed_fields()]
+        purged = 0
+        while True:
+            now = time.time()
+            oids = connect.zrangebyscore(cls.get_expiry_key(), '-inf', now, 0, batch_size)
+            if not oids:
+                return purged
+            oids = [oid if isinstance(oid, str) else oid.decode('utf-8') for oid in oids]
+            records = [[]] * len(oids)
+            if cls.get_indexed_fields():
+                pipe = connect.pipeline(transaction=False)
+                for oid in oids:
+                    pipe.hvals(cls.get_index_record_key(oid))
+                records = pipe.execute()
+            if sharded:
+                purged += cls._purge_checked(oids, records, ranges)
+                continue
+            pipe = connect.pipeline(transaction=False)
+            for oid, keys in zip(oids, records):
+                pipe.eval(PURGE_SCRIPT, 3 + len(keys) + len(ranges), cls.get_key(oid),
+                          cls.get_index_record_key(oid), cls.get_expiry_key(), *keys, *ranges, oid, now, len(keys))
+            purged += pipe.execute().count(1)
+
+    @classmethod
+    def _purge_checked(cls, oids, records, ranges):
+        """
+        This method removes expired instances from indexes kept on other shards, checking them
+        with pipelined EXISTS first.
+
+        :param oids: ids whose expiry time has passed.
+        :param records: lists of index sets recorded for them.
+        :param ranges: keys of range indexes.
+        :returns: number of expired instances removed from indexes.
+        """
+        pipe = cls.connect.pipeline(transaction=False)
+        for oid in oids:
+            pipe.exists(cls.get_key(oid))
+        expired = [(oid, keys) for oid, keys, exists in zip(oids, records, pipe.execute()) if not exists]
+        pipe = cls.connect.pipeline(transaction=False)
+        for oid, keys in expired:
+            for key in keys:
+                pipe.srem(key, oid)
+            for key in ranges:
+                pipe.zrem(key, oid)
+            pipe.unlink(cls.get_index_record_key(oid))
+        pipe.zrem(cls.get_expiry_key(), *oids)
+        pipe.execute()
+        return len(expired)
+
     @classmethod
     def get_key(cls, oid):
         """
@@ -58,18 +613,403 @@ class RedisModel(with_metaclass(RedisModelCreator, MapModelBase)):
         return "{0.__module__}.{0.__name__}.{1}".format(cls, oid)
 
     @classmethod
-    def get(cls, oid):
+    def get_index_key(cls, name, value):
+        """
+        This function creates a key of Redis set keeping ids of instances with given field value.
+
+        :param name: indexed field name.
+        :param value: field value, as returned by field's get_index_value.
+        :returns: Redis key.
+        """
+        return "{0.__module__}.{0.__name__}:{1}:{2}".format(cls, name, value)
+
+    @classmethod
+    def get_index_record_key(cls, oid):
+        """
+        This function creates a key of Redis hash recording index sets an expiring instance belongs to.
+
+        :param oid: id of object.
+        :returns: Redis key.
+        """
+        return "{0.__module__}.{0.__name__}::indexed:{1}".format(cls, oid)
+
+    @classmethod
+    def get_indexed_fields(cls):
+        """
+        This function returns names of indexed fields.
+
+        :returns: list of field names.
+        """
+        return [name for name, field in cls._fields.items() if field.is_indexed()]
+
+    @classmethod
+    def get_range_index_key(cls, name):
+        """
+        This function creates a key of Redis sorted set keeping ids of instances scored by field's value.
+
+        :param name: range indexed field name.
+        :returns: Redis key.
+        """
+        return "{0.__module__}.{0.__name__}:{1}".format(cls, name)
+
+    @classmethod
+    def get_expiry_key(cls):
+        """
+        This function creates a key of Redis sorted set keeping ids of indexed instances
+        scored by their expiry time.
+
+        :returns: Redis key.
+        """
+        return "{0.__module__}.{0.__name__}::expiring".format(cls)
+
+    @classmethod
+    def has_indexes(cls):
+        """
+        This function checks whether the model has any set or range indexes.
+
+        :returns: boolean.
+        """
+        return bool(cls.get_indexed_fields() or cls.get_range_indexed_fields())
+
+    @classmethod
+    def get_range_indexed_fields(cls):
+        """
+        This function returns names of range indexed fields.
+
+        :returns: list of field names.
+        """
+        return [name for name, field in cls._fields.items() if field.is_range_indexed()]
+
+    @classmethod
+    def where(cls, **conditions):
+        """
+        This method creates a range query, e.g. Model.where(published__gte=t1).order_by('-published').limit(50).
+
+        :param conditions: conditions like field__gte=value.
+        :returns: RedisQuery.
+        """
+        return RedisQuery(cls).where(**conditions)
+
+    @classmethod
+    def order_by(cls, name):
+        """
+        This method creates a range query returning all indexed instances ordered by given field.
+
+        :param name: field name, prefix it with - to order descending.
+        :returns: RedisQuery.
+        """
+        return RedisQuery(cls).order_by(name)
+
+    @classmethod
+    def hydrate(cls, data, fields=None):
+        """
+        This method creates an instance from pythonized data and remembers its indexed values.
+
+        :param data: dict of values, as returned by pythonize.
+        :param fields: names of fetched fields or None if all of them were fetched.
+        :returns: model instance.
+        """
+        instance = super(RedisModel, cls).hydrate(data, fields)
+        if cls.get_indexed_fields():
+            instance._index_values = instance._get_index_values()  # pylint: disable=protected-access
+        return instance
+
+    @classmethod
+    def filter(cls, **kwargs):
+        """
+        This method gets instances whose indexed fields have given values. Ids are resolved
+        with SINTER of index sets and instances are loaded with get_many. Instances whose
+        current values don't match (e.g. overwritten without being loaded first) are skipped.
+
+        :param kwargs: indexed field names and their values.
+        :returns: list of hydrated model instances ordered by id.
+        """
+        if not kwargs:
+            raise TypeError("filter() of class {} needs at least one condition.".format(cls.__name__))
+        values = {}
+        for name, value in kwargs.items():
+            if name not in cls._fields or not cls._fields[name].is_indexed():
+                raise RedisModelException('Field {} of class {} is not indexed'.format(name, cls.__name__))
+            values[name] = cls._fields[name].get_index_value(value)
+        oids = cls.connect.sinter([cls.get_index_key(name, value) for name, value in values.items()])
+        oids = sorted(oid if isinstance(oid, str) else oid.decode('utf-8') for oid in oids)
+        return [model for model in cls.get_many(oids, skip_missing=True)
+                if all(model._index_values.get(name) == value  # pylint: disable=protected-access
+                       for name, value in values.items())]
+
+    @classmethod
+    def get(cls, oid, fields=None, primary=False):
         """
         This method gets a model instance with given id from Redis.
 
         :param oid: id of object to get.
+        :param fields: names of fields to load with HMGET, by default all fields are loaded with HGETALL.
+        :param primary: whether it should be read from the primary even if the namespace has replicas.
         :returns: hydrated model instance.
         """
-        data = cls.connect.hgetall(cls.get_key(oid))
-        if data:
-            return cls(**cls.pythonize(data))
+        model = cls.get_many([oid], fields=fields, primary=primary)[0]
+        if model is not None:
+            return model
         raise RedisModelException('No object with primary key {} of class {}'.format(cls.get_key(oid), cls.__name__))
 
+    @classmethod
+    def get_many(cls, oids, chunk_size=DEFAULT_CHUNK_SIZE, skip_missing=False, fields=None, primary=False):
+        """
+        This method gets model instances with given ids from Redis. HGETALLs (or HMGETs, if
+        fields are given) are sent in pipelines of at most chunk_size commands, so the whole
+        batch costs len(oids) / chunk_size round trips instead of len(oids).
+        In sharded namespaces every chunk is split into one pipeline per shard, sent in parallel.
+
+        If the model has a near cache, full loads are served from it whenever possible.
+
+        :param oids: ids of objects to get.
+        :param chunk_size: maximum number of commands sent in a single pipeline.
+        :param skip_missing: whether ids missing in Redis should be skipped instead of returned as None.
+        :param fields: names of fields to load, by default all fields are loaded.
+        :param primary: whether they should be read from primaries even if the namespace has replicas,
+         like inside use_primary().
+        :returns: list of hydrated model instances in the same order as oids.
+        """
+        if fields is not None:
+            fields = cls.get_projection(fields)
+        keys = [cls.get_key(oid) for oid in oids]
+        found, missing, generation = cls._get_cached(keys, fields)
+        with use_primary(primary):
+            fetched = cls._fetch([keys[index] for index in missing], chunk_size, fields)
+        return cls._hydrate_found(keys, found, missing, fetched, skip_missing, fields, generation)
+
+    @classmethod
+    def values(cls, oids, fields=None, chunk_size=DEFAULT_CHUNK_SIZE, skip_missing=False, decode=True):
+        """
+        This method gets plain values of given instances as dicts, without creating model instances.
+        Values are read with pipelined HMGETs (in chunks, as in get_many) and pythonized
+        only if decode says so. Fields missing in Redis are None.
+
+        :param oids: ids of objects to get.
+        :param fields: names of fields to get, by default all fields.
+        :param chunk_size: maximum number of commands sent in a single pipeline.
+        :param skip_missing: whether ids missing in Redis should be skipped instead of returned as None.
+        :param decode: whether values should be pythonized by their fields (True), left as returned
+         by Redis (False) or names of fields to pythonize.
+        :returns: list of dicts of field name: value in the same order as oids.
+        """
+        fields, rows = cls._fetch_values(oids, fields, chunk_size, skip_missing, decode)
+        return [None if row is None else dict(zip(fields, row)) for row in rows]
+
+    @classmethod
+    def values_list(cls, oids, fields=None, flat=False, chunk_size=DEFAULT_CHUNK_SIZE, skip_missing=False,
+                    decode=True):
+        """
+        This method works like values, but returns tuples of values ordered like fields.
+        With flat=True and a single field, the values themselves are returned.
+
+        :param oids: ids of objects to get.
+        :param fields: names of fields to get, by default all fields.
+        :param flat: whether values of a single field should be returned instead of 1-tuples.
+        :param chunk_size: maximum number of commands sent in a single pipeline.
+        :param skip_missing: whether ids missing in Redis should be skipped instead of returned as None.
+        :param decode: whether values should be pythonized by their fields (True), left as returned
+         by Redis (False) or names of fields to pythonize.
+        :returns: list of tuples (or values) in the same order as oids.
+        """
+        if flat and (fields is None or len(fields) != 1):
+            raise TypeError("'flat' is not valid when values_list of class {} is called with more than "
+                            "one field.".format(cls.__name__))
+        rows = cls._fetch_values(oids, fields, chunk_size, skip_missing, decode)[1]
+        if flat:
+            return [None if row is None else row[0] for row in rows]
+        return rows
+
+    @classmethod
+    def _fetch_values(cls, oids, fields, chunk_size, skip_missing, decode):
+        """
+        This method fetches values of given fields with pipelined HMGETs. Primary key is always
+        fetched as well, so missing instances can be told apart from instances without values.
+
+        :param oids: ids of objects to get.
+        :param fields: names of fields to get or None for all fields.
+        :param chunk_size: maximum number of commands sent in a single pipeline.
+        :param skip_missing: whether ids missing in Redis should be skipped instead of returned as None.
+        :param decode: True, False or names of fields to pythonize.
+        :returns: 2-tuple of a list of field names and a list of tuples (or None for missing ids).
+        """
+        fields = list(cls._fields) if fields is None else list(fields)
+        for name in fields:
+            if name not in cls._fields:
+                raise RedisModelException('Field {} of class {} does not exist'.format(name, cls.__name__))
+        if decode is True or decode is False:
+            decode = fields if decode else ()
+        projection = cls.get_projection(fields)
+        columns = [(projection.index(name), cls._fields[name].pythonize if name in decode else None)
+                   for name in fields]
+        rows = []
+        for chunk in chunks(oids, chunk_size):
+            pipe = cls.connect.pipeline(transaction=False)
+            cls._queue_fetch(pipe, [cls.get_key(oid) for oid in chunk], projection)
+            for values in pipe.execute():
+                if values[0] is None:
+                    if not skip_missing:
+                        rows.append(None)
+                    continue
+                rows.append(tuple(values[index] if pythonize is None or values[index] is None
+                                  else pythonize(values[index]) for index, pythonize in columns))
+        return fields, rows
+
+    @classmethod
+    async def aget_many(cls, oids, chunk_size=DEFAULT_CHUNK_SIZE, skip_missing=False, fields=None):
+        """
+        This coroutine is an asyncio counterpart of get_many.
+
+        :param oids: ids of objects to get.
+        :param chunk_size: maximum number of commands sent in a single pipeline.
+        :param skip_missing: whether ids missing in Redis should be skipped instead of returned as None.
+        :param fields: names of fields to load, by default all fields are loaded.
+        :returns: list of hydrated model instances in the same order as oids.
+        """
+        if fields is not None:
+            fields = cls.get_projection(fields)
+        keys = [cls.get_key(oid) for oid in oids]
+        if cls.near_cache is not None and fields is None:
+            await cls.near_cache.alisten(cls.connect)
+        found, missing, generation = cls._get_cached(keys, fields)
+        fetched = []
+        for chunk in chunks([keys[index] for index in missing], chunk_size):
+            pipe = cls.aconnect().pipeline(transaction=False)
+            cls._queue_fetch(pipe, chunk, fields)
+            fetched.extend(cls._parse_fetched(await pipe.execute(), fields))
+        return cls._hydrate_found(keys, found, missing, fetched, skip_missing, fields, generation)
+
+    @classmethod
+    async def aget(cls, oid, fields=None):
+        """
+        This coroutine is an asyncio counterpart of get.
+
+        :param oid: id of object to get.
+        :param fields: names of fields to load with HMGET, by default all fields are loaded with HGETALL.
+        :returns: hydrated model instance.
+        """
+        model = (await cls.aget_many([oid], fields=fields))[0]
+        if model is not None:
+            return model
+        raise RedisModelException('No object with primary key {} of class {}'.format(cls.get_key(oid), cls.__name__))
+
+    @classmethod
+    def _get_cached(cls, keys, fields):
+        """
+        This method looks given keys up in model's near cache. Only full loads are cached.
+        Cache's generation is taken before missing keys are fetched, see NearCache.set.
+
+        :param keys: Redis keys of instances.
+        :param fields: names of fields to load or None if all of them should be loaded.
+        :returns: 3-tuple containing a list of cached data (or None), a list of indexes of missing keys
+         and cache's generation (or None).
+        """
+        if cls.near_cache is None or fields is not None:
+            return [None] * len(keys), list(range(len(keys))), None
+        cls.near_cache.listen(cls.connect)
+        generation = cls.near_cache.generation()
+        found = [cls.near_cache.get(key) for key in keys]
+        return found, [index for index, data in enumerate(found) if data is None], generation
+
+    @classmethod
+    def _hydrate_found(cls, keys, found, missing, fetched, skip_missing, fields, generation):
+        """
+        This method merges fetched data with cached data, caches it and creates instances.
+
+        :param keys: Redis keys of instances.
+        :param found: list of cached data (or None), as returned by _get_cached.
+        :param missing: list of indexes of keys which weren't cached.
+        :param fetched: list of data fetched for missing keys.
+        :param skip_missing: whether ids missing in Redis should be skipped instead of returned as None.
+        :param fields: names of loaded fields or None if all of them were loaded.
+        :param generation: near cache's generation taken before fetching, as returned by _get_cached.
+        :returns: list of hydrated model instances in the same order as keys.
+        """
+        for index, data in zip(missing, fetched):
+            if data is not None:
+                found[index] = data
+                if cls.near_cache is not None and fields is None:
+                    cls.near_cache.set(keys[index], data, generation)
+        models = []
+        for data in found:
+            if data is not None:
+                models.append(cls.hydrate(data, fields))
+            elif not skip_missing:
+                models.append(None)
+        return models
+
+    @classmethod
+    def iter_all(cls, batch_size=DEFAULT_CHUNK_SIZE, fields=None):
+        """
+        This generator yields all instances of the model. Keys are enumerated with non-blocking
+        SCAN matching model's key prefix and every SCAN page is loaded with a single pipeline,
+        so memory usage doesn't depend on the number of instances.
+
+        As with SCAN, instances added or removed during iteration may or may not be yielded,
+        and an instance may be yielded more than once.
+
+        :param batch_size: COUNT hint passed to SCAN.
+        :param fields: names of fields to load, by default all fields are loaded.
+        :returns: generator of hydrated model instances.
+        """
+        if fields is not None:
+            fields = cls.get_projection(fields)
+        pattern = escape_pattern(cls.get_key('')) + '*'
+        cursor = 0
+        while True:
+            cursor, keys = cls.connect.scan(cursor, match=pattern, count=batch_size, _type='hash')
+            for data in cls._fetch(keys, batch_size, fields):
+                if data is not None:
+                    yield cls.hydrate(data, fields)
+            if not int(cursor):
+                break
+
+    @classmethod
+    def _fetch(cls, keys, chunk_size, fields):
+        """
+        This method fetches and pythonizes data kept in given keys using chunked pipelines.
+
+        :param keys: Redis keys of instances.
+        :param chunk_size: maximum number of commands sent in a single pipeline.
+        :param fields: names of fields to fetch with HMGET or None to fetch all of them with HGETALL.
+        :returns: list of pythonized data (or None for missing keys) in the same order as keys.
+        """
+        found = []
+        for chunk in chunks(keys, chunk_size):
+            pipe = cls.connect.pipeline(transaction=False)
+            cls._queue_fetch(pipe, chunk, fields)
+            found.extend(cls._parse_fetched(pipe.execute(), fields))
+        return found
+
+    @staticmethod
+    def _queue_fetch(pipe, keys, fields):
+        """
+        This method queues commands fetching given keys in a pipeline.
+
+        :param pipe: Redis pipeline.
+        :param keys: Redis keys of instances.
+        :param fields: names of fields to fetch with HMGET or None to fetch all of them with HGETALL.
+        """
+        for key in keys:
+            if fields is None:
+                pipe.hgetall(key)
+            else:
+                pipe.hmget(key, fields)
+
+    @classmethod
+    def _parse_fetched(cls, results, fields):
+        """
+        This method pythonizes results of commands queued by _queue_fetch.
+
+        :param results: pipeline results.
+        :param fields: names of fetched fields or None if all of them were fetched.
+        :returns: list of pythonized data (or None for missing keys).
+        """
+        if fields is not None:
+            results = [{field: value for field, value in zip(fields, values) if value is not None}
+                       for values in results]
+        return cls.pythonize_many(results)
+
 
 class RedisSortedSetSlice(object):
     """
@@ -143,10 +1083,20 @@ class RedisSortedSet(object):
         :param namespace: name of connection used for this instance.
         :param name: name of sorted set.
         """
-        self.connect = RedisModelRegister(namespace or self.namespace).connect()
+        self.namespace = namespace or self.namespace
+        self.register = RedisModelRegister(self.namespace)
         self.name = name
         self.changes = defaultdict(list)
 
+    @property
+    def connect(self):
+        """
+        Redis connection of the current process.
+
+        :returns: redis.Redis
+        """
+        return self.register.connect()
+
     def clear(self):
         """
         I'm tired of you, off you go. Disappear from Redis. NOW.
@@ -225,18 +1175,26 @@ class RedisSortedSet(object):
         This method analyzes changelist and using as few operations as possible propagates
         changes to Redis's Sorted Set representing this instance.
         """
-        to_remove = []
-        to_add = {}
-        for key, value in self.changes.items():
-            if value[-1] is None:
-                to_remove.append(key)
-            else:
-                to_add[key] = value[-1]
+        writes = Batch.start(self.namespace, self.connect)
+        writes.on_flush(self._queue_changes(writes.pipe))
+        writes.flush()
+
+    def _queue_changes(self, pipe):
+        """
+        This method queues commands propagating the changelist in a pipeline. The changelist is
+        cleared by the returned function, once the commands are executed.
+
+        :param pipe: Redis pipeline.
+        :returns: function without arguments.
+        """
+        latest, forget = take_changes(self.changes)
+        to_remove = [key for key, value in latest.items() if value is None]
+        to_add = {key: value for key, value in latest.items() if value is not None}
         if to_remove:
-            self.connect.zrem(self.get_instance_key(), *to_remove)
+            pipe.zrem(self.get_instance_key(), *to_remove)
         if to_add:
-            self.connect.zadd(self.get_instance_key(), **to_add)
-        self.changes.clear()
+            pipe.zadd(self.get_instance_key(), to_add)
+        return forget
 
     def get_instance_key(self):
         """
@@ -263,8 +1221,17 @@ class RedisHash(object):
     __setitem__ and __delitem__ methods don't modify Redis immediately, but are instead
     queued in a changelist.
 
+    Reads see the changelist - pending values are returned encoded, as Redis would return
+    them once they're saved (as bytes or, with decode_responses, as text), and keys are compared
+    in the same form.
+
+    A prefetched hash keeps a local snapshot of the hash fetched with a single HGETALL
+    and answers reads from it, reloading it when it's older than max_age seconds.
+    Saving applies the changelist to the snapshot.
+
     :type connect: redis.Redis
     :type changes: dict
+    :type snapshot: dict
     """
     namespace = 'redis'
 
@@ -276,23 +1243,160 @@ class RedisHash(object):
         :param namespace: name of connection used by this instance.
         :param name: name of the hash.
         """
-        self.connect = RedisModelRegister(namespace or self.namespace).connect()
+        self.namespace = namespace or self.namespace
+        self.register = RedisModelRegister(self.namespace)
         self.name = name
         self.changes = defaultdict(list)
+        self.snapshot = None
+        self.max_age = None
+        self.loaded_at = None
+        self._pending = None
+        self._encoder = None
+
+    @property
+    def connect(self):
+        """
+        Redis connection of the current process.
+
+        :returns: redis.Redis
+        """
+        return self.register.connect()
 
     def clear(self):
         """
         This removes whole hash from Redis.
         """
         self.connect.delete(self.get_instance_key())
+        if self.snapshot is not None:
+            self.snapshot = {}
+
+    def load(self):
+        """
+        This method fetches the whole hash into the local snapshot with a single HGETALL.
+
+        :returns: self
+        """
+        self._set_snapshot(self.connect.hgetall(self.get_instance_key()))
+        return self
+
+    def prefetch(self, max_age=None):
+        """
+        This method loads the local snapshot, so following reads don't talk to Redis.
+
+        :param max_age: number of seconds after which the snapshot is reloaded or None to keep it
+         until load() is called.
+        :returns: self
+        """
+        self.max_age = max_age
+        return self.load()
+
+    def _encode(self, value):
+        """
+        This method encodes a key or value like Redis returns it - as bytes or, if the connection
+        is configured with decode_responses, as text.
+
+        :param value: value to encode.
+        :returns: bytes or text.
+        """
+        return self._get_encoder().decode(encode_value(value))
+
+    def _get_encoder(self):
+        """
+        This method returns the encoder of the client serving this hash - the shard it belongs to
+        in sharded namespaces, or the primary in replicated ones.
+
+        :returns: redis.connection.Encoder
+        """
+        if self._encoder is None:
+            from .sharding import ShardRouter  # pylint: disable=import-outside-toplevel
+            client = self.connect
+            if isinstance(client, ShardRouter):
+                client = client.get_shard(self.get_instance_key())
+            self._encoder = client.get_encoder()
+        return self._encoder
+
+    def _set_snapshot(self, data):
+        """
+        This method replaces the local snapshot.
+
+        :param data: dict fetched with HGETALL.
+        """
+        self.snapshot = {self._encode(key): value for key, value in data.items()}
+        self.loaded_at = default_timer()
+
+    def _is_stale(self):
+        """
+        This method checks whether the local snapshot should be reloaded.
+
+        :returns: boolean.
+        """
+        return (self.snapshot is not None and self.max_age is not None
+                and default_timer() - self.loaded_at > self.max_age)
+
+    def _get_pending(self):
+        """
+        This method returns the changelist with encoded keys and values. It's encoded once and kept
+        until the changelist changes.
+
+        :returns: dict of key: value or None if the key is going to be removed.
+        """
+        if self._pending is None:
+            self._pending = {self._encode(key): None if values[-1] is None else self._encode(values[-1])
+                             for key, values in self.changes.items()}
+        return self._pending
+
+    def _lookup(self, item):
+        """
+        This method answers a read of a key from the changelist or the local snapshot.
+
+        :param item: key.
+        :returns: 2-tuple containing whether the key could be read locally and its value.
+        """
+        item = self._encode(item)
+        pending = self._get_pending()
+        if item in pending:
+            return True, pending[item]
+        if self.snapshot is not None:
+            return True, self.snapshot.get(item)
+        return False, None
+
+    def _merge_keys(self, keys):
+        """
+        This method applies the changelist to keys read from Redis.
+
+        :param keys: list of keys.
+        :returns: list of keys.
+        """
+        pending = self._get_pending()
+        merged = [key for key in keys if self._encode(key) not in pending]
+        return merged + [key for key, value in pending.items() if value is not None]
+
+    def _merge_items(self, items):
+        """
+        This method applies the changelist to items read from Redis.
+
+        :param items: dict of key: value.
+        :returns: dict of key: value.
+        """
+        merged = dict(items)
+        for key, value in self._get_pending().items():
+            merged.pop(key, None)
+            if value is not None:
+                merged[key] = value
+        return merged
 
     def get(self, *fields):
         """
-        This gets one or many items from Redis.
+        This gets one or many items from Redis. Keys which can be read locally aren't fetched.
 
         :param fields: list of fields to get.
         """
-        return self.connect.hmget(self.get_instance_key(), *fields)
+        if self._is_stale():
+            self.load()
+        found = [self._lookup(field) for field in fields]
+        missing = [field for field, (local, _) in zip(fields, found) if not local]
+        fetched = iter(self.connect.hmget(self.get_instance_key(), *missing) if missing else ())
+        return [value if local else next(fetched) for local, value in found]
 
     def __getitem__(self, item):
         """
@@ -301,6 +1405,11 @@ class RedisHash(object):
         :param item: key belonging to this hash.
         :returns: given key's value.
         """
+        if self._is_stale():
+            self.load()
+        local, value = self._lookup(item)
+        if local:
+            return value
         return self.connect.hget(self.get_instance_key(), item)
 
     def __delitem__(self, item):
@@ -310,14 +1419,17 @@ class RedisHash(object):
         :param item: key to be removed.
         """
         self.changes[item].append(None)
+        self._pending = None
 
     def __len__(self):
         """
-        How many elements are in hash - as Redis says.
+        How many elements are in hash - as Redis says, after applying the changelist.
 
         :returns: number of elements in hash.
         """
-        return self.connect.hlen(self.get_instance_key())
+        if not self.changes and self.snapshot is None:
+            return self.connect.hlen(self.get_instance_key())
+        return len(self.keys())
 
     def keys(self):
         """
@@ -325,7 +1437,11 @@ class RedisHash(object):
 
         :returns: list of keys in hash.
         """
-        return self.connect.hkeys(self.get_instance_key())
+        if self._is_stale():
+            self.load()
+        if self.snapshot is not None:
+            return self._merge_keys(list(self.snapshot))
+        return self._merge_keys(self.connect.hkeys(self.get_instance_key()))
 
     def items(self):
         """
@@ -333,7 +1449,11 @@ class RedisHash(object):
 
         :returns: hash's key, value pairs.
         """
-        return self.connect.hgetall(self.get_instance_key())
+        if self._is_stale():
+            self.load()
+        if self.snapshot is not None:
+            return self._merge_items(self.snapshot)
+        return self._merge_items(self.connect.hgetall(self.get_instance_key()))
 
     def __contains__(self, item):
         """
@@ -342,6 +1462,11 @@ class RedisHash(object):
         :param item: key to be checked.
         :returns: boolean
         """
+        if self._is_stale():
+            self.load()
+        local, value = self._lookup(item)
+        if local:
+            return value is not None
         return self.connect.hexists(self.get_instance_key(), item)
 
     def __setitem__(self, item, value):
@@ -353,24 +1478,47 @@ class RedisHash(object):
         :returns:
         """
         self.changes[item].append(value)
+        self._pending = None
 
     def save(self):
         """
         This method analyzes changelist and using as few operations as possible propagates
         changes to Redis's Hash representing this instance.
         """
-        to_remove = []
-        to_add = {}
-        for key, value in self.changes.items():
-            if value[-1] is None:
-                to_remove.append(key)
-            else:
-                to_add[key] = value[-1]
+        writes = Batch.start(self.namespace, self.connect)
+        writes.on_flush(self._queue_changes(writes.pipe))
+        writes.flush()
+
+    def _queue_changes(self, pipe):
+        """
+        This method queues commands propagating the changelist in a pipeline. The changelist is
+        cleared and written values are applied to the local snapshot by the returned function,
+        once the commands are executed.
+
+        :param pipe: Redis pipeline.
+        :returns: function without arguments.
+        """
+        latest, forget = take_changes(self.changes)
+        to_remove = [key for key, value in latest.items() if value is None]
+        to_add = {key: value for key, value in latest.items() if value is not None}
         if to_remove:
-            self.connect.hdel(self.get_instance_key(), *to_remove)
+            pipe.hdel(self.get_instance_key(), *to_remove)
         if to_add:
-            self.connect.hmset(self.get_instance_key(), to_add)
-        self.changes.clear()
+            pipe.hset(self.get_instance_key(), mapping=to_add)
+
+        def written():
+            """
+            This function updates local state after the changelist was written.
+            """
+            forget()
+            self._pending = None
+            if self.snapshot is not None:
+                for key, value in latest.items():
+                    self.snapshot.pop(self._encode(key), None)
+                    if value is not None:
+                        self.snapshot[self._encode(key)] = self._encode(value)
+
+        return written
 
     def get_instance_key(self):
         """
@@ -396,20 +1544,50 @@ class RedisList(object):
     This class is a proxy for Redis List. It enables instant modifications to
     Redis entity. It has only basic operations pythonized at the moment.
 
+    Iterating over the list fetches it in chunks of LRANGE, see iter_chunks, and to_list
+    fetches it whole. Read values may be pythonized by decode function (e.g. int).
+
+    Buffered lists queue pushes in a changelist, like RedisHash, instead of sending them
+    immediately - save() propagates them with multi-element RPUSH and LPUSH commands.
+
+    Lists with maxlen are capped like deque(maxlen=...): every push is pipelined with LTRIM
+    dropping elements from the opposite end, once per batch of pushes.
+
     :type connect: redis.Redis
+    :type changes: list
     """
     namespace = 'redis'
+    TEMPORARY_KEY_TTL = 3600
 
-    def __init__(self, name, namespace=None):
+    def __init__(self, name, namespace=None, decode=None, buffered=False, maxlen=None):
         """
         This function initializes and remembers name of the hash.
         By default name is used as Redis key for this instance.
 
         :param namespace: name of connection used by this instance.
         :param name: name of hash.
+        :param decode: function pythonizing read values or None to return them as Redis does.
+        :param buffered: whether pushes should be queued until save() is called.
+        :param maxlen: maximum number of elements kept in the list or None.
         """
-        self.connect = RedisModelRegister(namespace or self.namespace).connect()
+        self.namespace = namespace or self.namespace
+        self.register = RedisModelRegister(self.namespace)
         self.name = name
+        self.decode = decode
+        self.buffered = buffered
+        if maxlen is not None and maxlen < 1:
+            raise ValueError("maxlen of list {} has to be positive.".format(name))
+        self.maxlen = maxlen
+        self.changes = []
+
+    @property
+    def connect(self):
+        """
+        Redis connection of the current process.
+
+        :returns: redis.Redis
+        """
+        return self.register.connect()
 
     def clear(self):
         """
@@ -430,10 +1608,67 @@ class RedisList(object):
             else:
                 start = item.start
             if item.stop is None:
-                return self.connect.lrange(self.get_instance_key(), start, -1)
-            return self.connect.lrange(self.get_instance_key(), start, item.stop)
+                return self.decode_many(self.connect.lrange(self.get_instance_key(), start, -1))
+            return self.decode_many(self.connect.lrange(self.get_instance_key(), start, item.stop))
         else:
-            return self.connect.lrange(self.get_instance_key(), item, item)[0]
+            return self.decode_many(self.connect.lrange(self.get_instance_key(), item, item))[0]
+
+    def __iter__(self):
+        """
+        Iterates over list's elements, fetching them in chunks.
+
+        :returns: iterator of values.
+        """
+        for chunk in self.iter_chunks():
+            for value in chunk:
+                yield value
+
+    def iter_chunks(self, size=DEFAULT_CHUNK_SIZE):
+        """
+        This method fetches the list in chunks, each with a single LRANGE. Elements inserted
+        or removed before the current position during iteration shift the following chunks.
+
+        :param size: maximum number of elements in a chunk.
+        :returns: iterator of lists of values.
+        """
+        start = 0
+        while True:
+            chunk = self.connect.lrange(self.get_instance_key(), start, start + size - 1)
+            if chunk:
+                yield self.decode_many(chunk)
+            if len(chunk) < size:
+                return
+            start += size
+
+    def to_list(self):
+        """
+        This method fetches all elements of the list with a single LRANGE.
+
+        :returns: list of values.
+        """
+        return self.decode_many(self.connect.lrange(self.get_instance_key(), 0, -1))
+
+    def tail(self, count):
+        """
+        This method fetches up to count last elements of the list with a single LRANGE.
+
+        :param count: number of elements.
+        :returns: list of values.
+        """
+        if count <= 0:
+            return []
+        return self.decode_many(self.connect.lrange(self.get_instance_key(), -count, -1))
+
+    def decode_many(self, values):
+        """
+        This method pythonizes values read from Redis with decode function, if it's set.
+
+        :param values: list of values.
+        :returns: list of values.
+        """
+        if self.decode is None:
+            return values
+        return [self.decode(value) for value in values]
 
     def remove(self, item):
         """
@@ -441,23 +1676,212 @@ class RedisList(object):
 
         :param item: value to be removed.
         """
-        self.connect.lrem(self.get_instance_key(), item, 0)
+        self.connect.lrem(self.get_instance_key(), 0, item)
 
     def append(self, item):
         """
         Adds element at the end of the list.
 
         :param item: element to be appended.
-        """
-        return self.connect.rpush(self.get_instance_key(), item)
+        :returns: list length or None, if the write is batched or buffered.
+        """
+        if self.buffered:
+            self._buffer('rpush', [item])
+            return None
+        if self.maxlen is not None:
+            return self._push('rpush', [item], DEFAULT_CHUNK_SIZE)
+        current = Batch.current(self.namespace)
+        if current is None:
+            return self.connect.rpush(self.get_instance_key(), item)
+        current.pipe.rpush(self.get_instance_key(), item)
+        return None
 
     def prepend(self, item):
         """
         Adds element at the beginning of the list.
 
         :param item: element to be prepended.
+        :returns: list length or None, if the write is batched or buffered.
+        """
+        if self.buffered:
+            self._buffer('lpush', [item])
+            return None
+        if self.maxlen is not None:
+            return self._push('lpush', [item], DEFAULT_CHUNK_SIZE)
+        current = Batch.current(self.namespace)
+        if current is None:
+            return self.connect.lpush(self.get_instance_key(), item)
+        current.pipe.lpush(self.get_instance_key(), item)
+        return None
+
+    def extend(self, iterable, chunk_size=DEFAULT_CHUNK_SIZE):
         """
-        return self.connect.lpush(self.get_instance_key(), item)
+        Adds elements at the end of the list, sending them in RPUSH commands of chunk_size elements
+        in a single pipeline.
+
+        :param iterable: elements to be appended.
+        :param chunk_size: maximum number of elements pushed by a single command.
+        :returns: list length or None, if the write is batched or buffered or there was nothing to push.
+        """
+        return self._push('rpush', iterable, chunk_size)
+
+    def extendleft(self, iterable, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Adds elements at the beginning of the list one after another, like deque.extendleft,
+        so they end up in reversed order.
+
+        :param iterable: elements to be prepended.
+        :param chunk_size: maximum number of elements pushed by a single command.
+        :returns: list length or None, if the write is batched or buffered or there was nothing to push.
+        """
+        return self._push('lpush', iterable, chunk_size)
+
+    def _push(self, command, iterable, chunk_size):
+        """
+        This method buffers pushes or sends them in the current batch or a new pipeline.
+
+        :param command: rpush or lpush.
+        :param iterable: elements to be pushed.
+        :param chunk_size: maximum number of elements pushed by a single command.
+        :returns: list length or None.
+        """
+        if self.buffered:
+            self._buffer(command, iterable)
+            return None
+        items = list(iterable)
+        if not items:
+            return None
+        writes = Batch.start(self.namespace, self.connect)
+        self._queue_push(writes.pipe, command, items, chunk_size)
+        return self._get_length(writes.flush())
+
+    def _get_length(self, results):
+        """
+        This method finds list's length in responses to queued pushes.
+
+        :param results: pipeline's responses or None if the pipeline wasn't executed yet.
+        :returns: list length or None.
+        """
+        if not results:
+            return None
+        if self.maxlen is None:
+            return results[-1]
+        return min(results[-2], self.maxlen)
+
+    def _buffer(self, command, iterable):
+        """
+        This method queues pushes in the changelist, merging them with the last queued pushes
+        in the same direction.
+
+        :param command: rpush or lpush.
+        :param iterable: elements to be pushed.
+        """
+        items = list(iterable)
+        if not items:
+            return
+        if self.changes and self.changes[-1][0] == command:
+            self.changes[-1][1].extend(items)
+        else:
+            self.changes.append((command, items))
+
+    def _queue_push(self, pipe, command, items, chunk_size, key=None):
+        """
+        This method queues multi-element push commands in a pipeline.
+
+        :param pipe: Redis pipeline.
+        :param command: rpush or lpush.
+        :param items: elements to be pushed.
+        :param chunk_size: maximum number of elements pushed by a single command.
+        :param key: key of the list, by default instance's key.
+        """
+        key = key or self.get_instance_key()
+        if self.maxlen is not None:
+            # Elements which would be trimmed anyway aren't sent at all.
+            items = items[len(items) - self.maxlen:] if len(items) > self.maxlen else items
+        for chunk in chunks(items, chunk_size):
+            getattr(pipe, command)(key, *chunk)
+        if self.maxlen is not None:
+            if command == 'rpush':
+                pipe.ltrim(key, -self.maxlen, -1)
+            else:
+                pipe.ltrim(key, 0, self.maxlen - 1)
+
+    def _queue_changes(self, pipe, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        This method queues commands propagating the changelist in a pipeline and clears it.
+        Pushes aren't idempotent, so the changelist is cleared right away - the returned function
+        puts queued pushes back in front of it, if the commands are discarded.
+
+        :param pipe: Redis pipeline.
+        :param chunk_size: maximum number of elements pushed by a single command.
+        :returns: function without arguments.
+        """
+        queued, self.changes = self.changes, []
+        for command, items in queued:
+            self._queue_push(pipe, command, items, chunk_size)
+
+        def restore():
+            """
+            This function puts discarded pushes back in the changelist.
+            """
+            self.changes = queued + self.changes
+
+        return restore
+
+    def save(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        This method propagates pushes queued by a buffered list to Redis in a single pipeline.
+
+        :param chunk_size: maximum number of elements pushed by a single command.
+        """
+        if not self.changes:
+            return
+        writes = Batch.start(self.namespace, self.connect)
+        writes.on_discard(self._queue_changes(writes.pipe, chunk_size))
+        writes.flush()
+
+    def replace(self, iterable, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        This method atomically replaces the list's contents, so readers see either the old list
+        or the whole new one. It's executed immediately, even in a batch. Pushes buffered so far are dropped.
+
+        :param iterable: new elements of the list.
+        :param chunk_size: maximum number of elements pushed by a single command.
+        """
+        self.changes = []
+        for pipe in self._queue_replace(list(iterable), chunk_size):
+            pipe.execute()
+
+    def _queue_replace(self, items, chunk_size):
+        """
+        This method prepares pipelines replacing the list's contents. A list fitting in a single chunk
+        is replaced in one MULTI/EXEC transaction. A longer one is built under a temporary key, which
+        expires after TEMPORARY_KEY_TTL seconds in case the process dies before it's renamed, and is
+        renamed (keeping no expiry) in a transaction afterwards.
+
+        :param items: new elements of the list.
+        :param chunk_size: maximum number of elements pushed by a single command.
+        :returns: list of pipelines to be executed in order.
+        """
+        key = self.get_instance_key()
+        if self.maxlen is not None and len(items) > self.maxlen:
+            items = items[len(items) - self.maxlen:]
+        if len(items) <= chunk_size:
+            pipe = self.connect.pipeline(transaction=True)
+            pipe.delete(key)
+            if items:
+                pipe.rpush(key, *items)
+            return [pipe]
+        temporary = self.get_temporary_key()
+        build = self.connect.pipeline(transaction=False)
+        for index, chunk in enumerate(chunks(items, chunk_size)):
+            build.rpush(temporary, *chunk)
+            if not index:
+                build.expire(temporary, self.TEMPORARY_KEY_TTL)
+        swap = self.connect.pipeline(transaction=True)
+        swap.persist(temporary)
+        swap.rename(temporary, key)
+        return [build, swap]
 
     def pop(self, first=False):
         """
@@ -466,9 +1890,12 @@ class RedisList(object):
         :param first: Should the first element be popped instead of the last.
         """
         if first:
-            return self.connect.lpop(self.get_instance_key())
+            value = self.connect.lpop(self.get_instance_key())
         else:
-            return self.connect.rpop(self.get_instance_key())
+            value = self.connect.rpop(self.get_instance_key())
+        if value is None or self.decode is None:
+            return value
+        return self.decode(value)
 
     def __len__(self):
         """
@@ -495,6 +1922,28 @@ class RedisList(object):
         """
         return self.get_key(self.name)
 
+    def get_related_key(self, suffix):
+        """
+        This function creates a key of data related to the list. It shares instance key's hash tag
+        (or uses the key as one), so both keys are kept by the same shard.
+
+        :param suffix: suffix distinguishing the key.
+        :returns: related key.
+        """
+        from .sharding import get_hash_key  # pylint: disable=import-outside-toplevel
+        key = self.get_instance_key()
+        if get_hash_key(key) == key.encode('utf-8'):
+            key = '{' + key + '}'
+        return '{}:{}'.format(key, suffix)
+
+    def get_temporary_key(self):
+        """
+        This function creates a unique key for building the list before it's renamed to instance's key.
+
+        :returns: temporary key.
+        """
+        return self.get_related_key('tmp:' + uuid.uuid4().hex)
+
     @classmethod
     def get_key(cls, name):
         """
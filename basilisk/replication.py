@@ -0,0 +1,279 @@
+"""
+This module defines a Redis client balancing reads between replicas of a primary.
+"""
+import itertools
+import threading
+import time
+from collections import deque
+
+from redis.commands import CoreCommands
+from redis.exceptions import ConnectionError as RedisConnectionError, RedisError, ResponseError, \
+    TimeoutError as RedisTimeoutError
+
+from .pipelines import RecordingPipeline
+from .routing import primary_forced
+
+__all__ = ['ReplicatedRedis']
+
+DEFAULT_MAX_LAG = 10
+DEFAULT_CHECK_INTERVAL = 1
+
+
+class ReplicatedPipeline(RecordingPipeline):
+    """
+    This class records pipelined commands. Pipelines containing only reads are sent to a replica,
+    others (and transactions) to the primary.
+    """
+
+    def execute(self, raise_on_error=True):
+        """
+        This method sends recorded commands to a replica or the primary.
+
+        :param raise_on_error: whether the first error should be raised.
+        :returns: list of responses.
+        """
+        commands, self.commands = self.commands, []
+        if not self.transaction and all(self.client.is_read(args) for args, _ in commands):
+            return self.client.read(lambda client: self._send(client, commands, raise_on_error))
+        return self._send(self.client.primary, commands, raise_on_error)
+
+    def _send(self, client, commands, raise_on_error):
+        """
+        This method sends commands in a pipeline.
+
+        :param client: redis.Redis
+        :param commands: list of (args, options) pairs.
+        :param raise_on_error: whether the first error should be raised.
+        :returns: list of responses.
+        """
+        pipe = client.pipeline(transaction=self.transaction)
+        for args, options in commands:
+            pipe.execute_command(*args, **options)
+        return pipe.execute(raise_on_error=raise_on_error)
+
+
+class ReplicatedRedis(CoreCommands):
+    """
+    This class is a Redis client sending writes to the primary and balancing read-only commands
+    between replicas in turns.
+
+    Replicas are checked with INFO replication every check_interval seconds - ones whose link
+    to the primary is down or which lag behind it by more than max_lag seconds are skipped, as are
+    replicas which failed to respond, until they're checked again. Lag is measured with replication
+    offsets - primary's master_repl_offset is sampled with every check, and replica's lag is the age
+    of the newest sample its slave_repl_offset has reached. A replica which hasn't reached any sample
+    yet may just be catching up with the latest writes, so it's skipped only if it was behind all
+    samples at its previous check as well. If offsets aren't available, time since replica's last
+    contact with the primary (master_last_io_seconds_ago) is used instead, which doesn't bound how
+    far behind the replica is.
+
+    The first check of a replica is done before it's used, later ones run in background threads,
+    so reads aren't delayed by them. If no replica is usable, reads fall back to the primary.
+    Reads inside use_primary() (or RedisModel.get and get_many called with primary=True)
+    and transactions always use the primary.
+
+    RedisModelRegister creates it for namespaces (or shards) configured with replicas.
+
+    :type primary: redis.Redis
+    :type replicas: list
+    """
+    READ_COMMANDS = frozenset([
+        'GET', 'MGET', 'STRLEN', 'GETRANGE', 'EXISTS', 'TYPE', 'TTL', 'PTTL', 'HGET', 'HMGET', 'HGETALL',
+        'HKEYS', 'HVALS', 'HLEN', 'HEXISTS', 'HSTRLEN', 'HSCAN', 'LRANGE', 'LLEN', 'LINDEX', 'LPOS', 'SMEMBERS',
+        'SISMEMBER', 'SMISMEMBER', 'SCARD', 'SINTER', 'SUNION', 'SDIFF', 'SRANDMEMBER', 'SSCAN', 'ZRANGE',
+        'ZRANGEBYSCORE', 'ZREVRANGE', 'ZREVRANGEBYSCORE', 'ZRANGEBYLEX', 'ZREVRANGEBYLEX', 'ZCARD', 'ZCOUNT',
+        'ZLEXCOUNT', 'ZSCORE', 'ZMSCORE', 'ZRANK', 'ZREVRANK', 'ZSCAN', 'SCAN', 'KEYS', 'DBSIZE', 'PFCOUNT',
+        'BITCOUNT', 'GETBIT', 'DUMP',
+    ])
+
+    def __init__(self, primary, replicas, max_lag=DEFAULT_MAX_LAG, check_interval=DEFAULT_CHECK_INTERVAL):
+        """
+        This method sets up the client.
+
+        :param primary: redis.Redis of the primary.
+        :param replicas: list of redis.Redis of replicas.
+        :param max_lag: maximum number of seconds replicas may lag behind the primary.
+        :param check_interval: number of seconds between replica checks.
+        """
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self._turns = itertools.cycle(range(len(self.replicas)))
+        self._usable = [True] * len(self.replicas)
+        self._checked = [None] * len(self.replicas)
+        self._checking = [False] * len(self.replicas)
+        self._offsets = deque()
+        self._behind = [False] * len(self.replicas)
+        self._lock = threading.Lock()
+
+    def is_read(self, args):
+        """
+        This method checks whether a command may be sent to a replica.
+
+        :param args: command name and arguments.
+        :returns: boolean.
+        """
+        return str(args[0]).upper() in self.READ_COMMANDS and not primary_forced()
+
+    def read(self, call):
+        """
+        This method calls given function with the next usable replica, falling back to the primary.
+
+        :param call: function taking a client.
+        :returns: function's result.
+        """
+        for _ in self.replicas:
+            with self._lock:
+                index = next(self._turns)
+            if not self._is_usable(index):
+                continue
+            try:
+                result = call(self.replicas[index])
+            except (RedisConnectionError, RedisTimeoutError):
+                self._mark(index, False)
+                continue
+            self.replica_reads += 1
+            return result
+        self.primary_reads += 1
+        return call(self.primary)
+
+    def _is_usable(self, index):
+        """
+        This method returns replica's health, checking it first if it was never checked or
+        starting a check in background if the last one is older than check_interval.
+
+        :param index: replica's index.
+        :returns: boolean.
+        """
+        if self._checked[index] is None:
+            self._refresh(index)
+        elif time.time() - self._checked[index] >= self.check_interval:
+            with self._lock:
+                start, self._checking[index] = not self._checking[index], True
+            if start:
+                thread = threading.Thread(target=self._refresh, args=(index,), name='replica-check')
+                thread.daemon = True
+                thread.start()
+        return self._usable[index]
+
+    def check_replicas(self):
+        """
+        This method checks health of all replicas right away, in the calling thread.
+        """
+        for index in range(len(self.replicas)):
+            self._refresh(index)
+
+    def _refresh(self, index):
+        """
+        This method checks replica's health and remembers the result.
+
+        :param index: replica's index.
+        """
+        try:
+            self._mark(index, self._check(index))
+        finally:
+            self._checking[index] = False
+
+    def _mark(self, index, usable):
+        """
+        This method remembers replica's health.
+
+        :param index: replica's index.
+        :param usable: whether reads may be sent to the replica.
+        """
+        self._usable[index] = usable
+        self._checked[index] = time.time()
+
+    def _check(self, index):
+        """
+        This method checks replica's link to the primary and its lag. Primary's offset is sampled
+        first, so a replica which caught up with it has no lag. Replicas which don't allow INFO are trusted.
+
+        :param index: replica's index.
+        :returns: whether reads may be sent to the replica.
+        """
+        sampled = self._sample_offset()
+        try:
+            info = self.replicas[index].info('replication')
+        except ResponseError:
+            return True
+        except RedisError:
+            return False
+        if info.get('master_link_status', 'up') != 'up':
+            return False
+        if sampled and 'slave_repl_offset' in info:
+            lag = self._get_lag(int(info['slave_repl_offset']))
+            behind, self._behind[index] = self._behind[index], lag == float('inf')
+            return lag <= self.max_lag or (self._behind[index] and not behind)
+        return 0 <= int(info.get('master_last_io_seconds_ago', 0)) <= self.max_lag
+
+    def _sample_offset(self):
+        """
+        This method records primary's current replication offset. Samples older than max_lag
+        and check_interval together aren't needed anymore.
+
+        :returns: whether the offset is known.
+        """
+        try:
+            offset = int(self.primary.info('replication')['master_repl_offset'])
+        except (RedisError, KeyError):
+            return False
+        now = time.time()
+        with self._lock:
+            self._offsets.append((now, offset))
+            while self._offsets[0][0] < now - self.max_lag - self.check_interval:
+                self._offsets.popleft()
+        return True
+
+    def _get_lag(self, offset):
+        """
+        This method finds how many seconds ago the primary was at given replication offset.
+
+        :param offset: replica's replication offset.
+        :returns: number of seconds or infinity if the replica is behind all samples.
+        """
+        with self._lock:
+            reached = [sampled for sampled, primary_offset in self._offsets if primary_offset <= offset]
+        return time.time() - max(reached) if reached else float('inf')
+
+    def execute_command(self, *args, **options):
+        """
+        This method sends a read-only command to a replica and other commands to the primary.
+
+        :param args: command name and arguments.
+        :param options: options passed to response callbacks.
+        :returns: Redis's response.
+        """
+        if self.is_read(args):
+            return self.read(lambda client: client.execute_command(*args, **options))
+        return self.primary.execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):  # pylint: disable=unused-argument
+        """
+        This method creates a pipeline sent to a replica if it contains only reads.
+
+        :param transaction: whether commands should be executed as MULTI/EXEC on the primary.
+        :param shard_hint: unused.
+        :returns: ReplicatedPipeline
+        """
+        return ReplicatedPipeline(self, transaction)
+
+    def pubsub(self, **kwargs):
+        """
+        This method returns PubSub of the primary.
+
+        :param kwargs: arguments of PubSub.
+        :returns: PubSub.
+        """
+        return self.primary.pubsub(**kwargs)
+
+    def get_encoder(self):
+        """
+        This method returns the encoder of the primary, replicas share its config.
+
+        :returns: redis.connection.Encoder
+        """
+        return self.primary.get_encoder()
@@ -0,0 +1,36 @@
+"""
+This module keeps per-thread routing overrides of Redis clients balancing reads between replicas.
+"""
+import threading
+from contextlib import contextmanager
+
+__all__ = ['use_primary', 'primary_forced']
+
+_state = threading.local()
+
+
+@contextmanager
+def use_primary(enabled=True):
+    """
+    This context manager sends all reads issued in current thread to primaries, so they see
+    writes made just before ("read your writes"). It can be nested.
+
+    :param enabled: whether reads should be forced to primaries, so callers can decide per call.
+    """
+    if not enabled:
+        yield
+        return
+    _state.depth = getattr(_state, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _state.depth -= 1
+
+
+def primary_forced():
+    """
+    This function checks whether reads in current thread should be sent to primaries.
+
+    :returns: boolean.
+    """
+    return bool(getattr(_state, 'depth', 0))
@@ -0,0 +1,556 @@
+"""
+This module defines Redis clients spreading keys of a namespace over several Redis instances
+(shards) with consistent hashing.
+
+Keys are hashed like in Redis Cluster: if a key contains a non-empty hash tag, e.g. {user:1},
+only the tag is hashed, so keys sharing a tag always land on the same shard.
+"""
+import asyncio
+import bisect
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from redis.commands import AsyncCoreCommands, CoreCommands
+from redis.exceptions import RedisError
+
+from .pipelines import RecordingPipeline
+from .routing import use_primary
+
+__all__ = ['HashRing', 'ShardedRedis', 'AsyncShardedRedis', 'CrossShardError', 'get_hash_key']
+
+DEFAULT_REPLICAS = 160
+DEFAULT_BATCH_SIZE = 500
+
+
+class CrossShardError(RedisError):
+    """
+    Exception raised when a command can't be routed to a single shard.
+    """
+    pass
+
+
+def get_hash_key(key):
+    """
+    This function returns the part of a key which is hashed - its hash tag, if there is one.
+
+    :param key: Redis key.
+    :returns: bytes
+    """
+    if not isinstance(key, bytes):
+        key = str(key).encode('utf-8')
+    start = key.find(b'{')
+    if start != -1:
+        end = key.find(b'}', start + 1)
+        if end > start + 1:
+            return key[start + 1:end]
+    return key
+
+
+def _first(results):
+    """
+    This function returns the response of the first shard.
+
+    :param results: list of responses.
+    :returns: response.
+    """
+    return results[0]
+
+
+class HashRing(object):
+    """
+    This class implements consistent hashing. Every node is placed on the ring in a number
+    of points (replicas) and a key belongs to the first node found clockwise from its hash,
+    so adding a node moves only keys which now belong to it.
+    """
+
+    def __init__(self, nodes=(), replicas=DEFAULT_REPLICAS):
+        """
+        This method places given nodes on the ring.
+
+        :param nodes: node names.
+        :param replicas: number of points per node.
+        """
+        self.replicas = replicas
+        self.nodes = []
+        self._points = []
+        self._owners = []
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(value):
+        """
+        This method hashes given bytes into a point on the ring.
+
+        :param value: bytes
+        :returns: int
+        """
+        return int(hashlib.md5(value).hexdigest()[:16], 16)
+
+    def add(self, node):
+        """
+        This method places a node on the ring.
+
+        :param node: node name.
+        """
+        points = list(zip(self._points, self._owners))
+        points.extend((self._hash('{}-{}'.format(node, index).encode('utf-8')), node)
+                      for index in range(self.replicas))
+        points.sort()
+        self.nodes.append(node)
+        self._points = [point for point, _ in points]
+        self._owners = [owner for _, owner in points]
+
+    def get_node(self, key):
+        """
+        This method finds the node given key belongs to.
+
+        :param key: Redis key.
+        :returns: node name.
+        """
+        index = bisect.bisect(self._points, self._hash(get_hash_key(key)))
+        return self._owners[index % len(self._owners)]
+
+
+class ShardRouter(object):
+    """
+    This mixin splits commands between shards. Commands are routed by their keys, which are
+    their first argument unless listed below. Keys of a command have to belong to the same shard,
+    apart from DEL, UNLINK, EXISTS and TOUCH, which are split and their responses summed.
+
+    PUBLISH is sent to the first shard, where pubsub() listens as well.
+
+    :type shards: dict
+    :type ring: HashRing
+    """
+    ALL_KEYS_COMMANDS = frozenset(['DEL', 'UNLINK', 'EXISTS', 'TOUCH', 'MGET', 'SINTER', 'SUNION', 'SDIFF',
+                                   'WATCH', 'PFCOUNT'])
+    TWO_KEYS_COMMANDS = frozenset(['RENAME', 'RENAMENX', 'RPOPLPUSH', 'BRPOPLPUSH', 'LMOVE', 'BLMOVE', 'SMOVE',
+                                   'COPY'])
+    TIMEOUT_COMMANDS = frozenset(['BLPOP', 'BRPOP', 'BZPOPMIN', 'BZPOPMAX'])
+    NUMKEYS_COMMANDS = {'EVAL': 2, 'EVALSHA': 2, 'EVAL_RO': 2, 'EVALSHA_RO': 2, 'FCALL': 2, 'FCALL_RO': 2,
+                        'LMPOP': 1, 'BLMPOP': 2, 'ZMPOP': 1, 'BZMPOP': 2, 'SINTERCARD': 1}
+    SUMMED_COMMANDS = frozenset(['DEL', 'UNLINK', 'EXISTS', 'TOUCH'])
+    BROADCAST_COMMANDS = frozenset(['FLUSHDB', 'FLUSHALL', 'PING', 'SCRIPT LOAD', 'SCRIPT FLUSH'])
+    FIRST_SHARD_COMMANDS = frozenset(['PUBLISH'])
+
+    def __init__(self, shards, replicas=DEFAULT_REPLICAS):
+        """
+        This method places shards on the ring.
+
+        :param shards: list of (name, client) pairs.
+        :param replicas: number of ring points per shard.
+        """
+        self.shards = OrderedDict(shards)
+        self.ring = HashRing(self.shards, replicas)
+
+    def get_shard(self, key):
+        """
+        This method returns the client of the shard given key belongs to.
+
+        :param key: Redis key.
+        :returns: client.
+        """
+        return self.shards[self.ring.get_node(key)]
+
+    def _get_keys(self, command, args):
+        """
+        This method finds keys among command's arguments.
+
+        :param command: upper-cased command name.
+        :param args: command name and arguments.
+        :returns: keys.
+        """
+        if command in self.ALL_KEYS_COMMANDS:
+            return args[1:]
+        if command in self.TWO_KEYS_COMMANDS:
+            return args[1:3]
+        if command in self.TIMEOUT_COMMANDS:
+            return args[1:-1]
+        if command in self.NUMKEYS_COMMANDS:
+            position = self.NUMKEYS_COMMANDS[command]
+            return args[position + 1:position + 1 + int(args[position])]
+        return args[1:2]
+
+    def _group_keys(self, keys):
+        """
+        This method groups keys by shards they belong to.
+
+        :param keys: Redis keys.
+        :returns: ordered dict of shard name: keys.
+        """
+        groups = OrderedDict()
+        for key in keys:
+            groups.setdefault(self.ring.get_node(key), []).append(key)
+        return groups
+
+    def _split(self, args):
+        """
+        This method splits a command into commands sent to shards.
+
+        :param args: command name and arguments.
+        :returns: 2-tuple of a list of (shard name, args) pairs and a function combining their responses.
+        """
+        command = str(args[0]).upper()
+        if command in self.BROADCAST_COMMANDS:
+            return [(name, args) for name in self.ring.nodes], _first
+        if command in self.FIRST_SHARD_COMMANDS:
+            return [(self.ring.nodes[0], args)], _first
+        keys = self._get_keys(command, args)
+        if not keys:
+            raise CrossShardError("Command {} doesn't name a key, so it can't be routed to a shard".format(command))
+        groups = self._group_keys(keys)
+        if len(groups) == 1:
+            return [(name, args) for name in groups], _first
+        if command in self.SUMMED_COMMANDS:
+            return [(name, (args[0],) + tuple(group)) for name, group in groups.items()], sum
+        raise CrossShardError('Keys of command {} belong to different shards, use hash tags to keep them '
+                              'together'.format(command))
+
+    def _plan(self, commands):
+        """
+        This method splits pipelined commands between shards, keeping their order.
+
+        :param commands: list of (args, options) pairs.
+        :returns: 2-tuple of an ordered dict of shard name: list of (index, args, options) and a list of combiners.
+        """
+        groups = OrderedDict()
+        combiners = []
+        for index, (args, options) in enumerate(commands):
+            parts, combine = self._split(args)
+            if len(parts) > 1:
+                options = {name: value for name, value in options.items() if name != 'keys'}
+            for name, part in parts:
+                groups.setdefault(name, []).append((index, part, options))
+            combiners.append(combine)
+        return groups, combiners
+
+    @staticmethod
+    def _merge(groups, responses, combiners):
+        """
+        This method merges shards' pipeline responses back into the order of commands.
+
+        :param groups: commands sent to shards, as returned by _plan.
+        :param responses: list of pipeline responses in the same order as groups.
+        :param combiners: list of functions combining responses of a command's parts.
+        :returns: list of responses.
+        """
+        parts = [[] for _ in combiners]
+        for queued, results in zip(groups.values(), responses):
+            for (index, _, _), result in zip(queued, results):
+                parts[index].append(result)
+        merged = []
+        for combine, results in zip(combiners, parts):
+            errors = [result for result in results if isinstance(result, Exception)]
+            merged.append(errors[0] if errors else combine(results))
+        return merged
+
+    def _scan_shard(self, cursor):
+        """
+        This method decodes a cross-shard SCAN cursor.
+
+        :param cursor: cursor returned by scan.
+        :returns: 2-tuple of shard name and shard's cursor.
+        """
+        cursor = int(cursor)
+        return self.ring.nodes[cursor % len(self.ring.nodes)], cursor // len(self.ring.nodes)
+
+    def _scan_cursor(self, name, cursor):
+        """
+        This method encodes a cross-shard SCAN cursor. Shards are scanned one after another.
+
+        :param name: name of scanned shard.
+        :param cursor: cursor returned by the shard.
+        :returns: int, 0 once all shards are scanned.
+        """
+        position = self.ring.nodes.index(name)
+        if not int(cursor):
+            position += 1
+            if position == len(self.ring.nodes):
+                return 0
+        return int(cursor) * len(self.ring.nodes) + position
+
+    def pubsub(self, **kwargs):
+        """
+        This method returns PubSub of the first shard, which receives all PUBLISH commands.
+
+        :param kwargs: arguments of PubSub.
+        :returns: PubSub.
+        """
+        return self.shards[self.ring.nodes[0]].pubsub(**kwargs)
+
+
+class ShardedPipeline(RecordingPipeline):
+    """
+    This class records pipelined commands and executes them as one pipeline per shard, in parallel.
+    Responses are returned in the order of commands.
+
+    Transactions are atomic only within a single shard.
+    """
+
+    def _send(self, name, queued, raise_on_error):
+        """
+        This method sends commands to a shard in a pipeline.
+
+        :param name: shard name.
+        :param queued: list of (index, args, options).
+        :param raise_on_error: whether the first error should be raised.
+        :returns: pipeline responses.
+        """
+        pipe = self.client.shards[name].pipeline(transaction=self.transaction)
+        for _, args, options in queued:
+            pipe.execute_command(*args, **options)
+        return pipe.execute(raise_on_error=raise_on_error)
+
+    def execute(self, raise_on_error=True):
+        """
+        This method sends recorded commands to their shards.
+
+        :param raise_on_error: whether the first error should be raised.
+        :returns: list of responses.
+        """
+        commands, self.commands = self.commands, []
+        groups, combiners = self.client._plan(commands)  # pylint: disable=protected-access
+        responses = self.client.execute_parallel([partial(self._send, name, queued, raise_on_error)
+                                                  for name, queued in groups.items()])
+        return self.client._merge(groups, responses, combiners)  # pylint: disable=protected-access
+
+
+class ShardedRedis(ShardRouter, CoreCommands):
+    """
+    This class is a Redis client routing commands to shards by consistent hashing of their keys.
+    Pipelines are split into one pipeline per shard, executed in parallel threads.
+
+    RedisModelRegister creates it for namespaces configured with a list of shards.
+    """
+
+    def __init__(self, shards, replicas=DEFAULT_REPLICAS):
+        """
+        This method places shards on the ring.
+
+        :param shards: list of (name, redis.Redis) pairs.
+        :param replicas: number of ring points per shard.
+        """
+        super(ShardedRedis, self).__init__(shards, replicas)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def execute_command(self, *args, **options):
+        """
+        This method sends a command to its shard(s).
+
+        :param args: command name and arguments.
+        :param options: options passed to response callbacks.
+        :returns: Redis's response.
+        """
+        parts, combine = self._split(args)
+        if len(parts) > 1:
+            options.pop('keys', None)
+        return combine([self.shards[name].execute_command(*part, **options) for name, part in parts])
+
+    def execute_parallel(self, calls):
+        """
+        This method calls given functions in parallel, one thread per shard at most.
+
+        :param calls: functions without arguments.
+        :returns: list of their results.
+        """
+        if len(calls) < 2:
+            return [call() for call in calls]
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=len(self.shards))
+        return list(self._executor.map(lambda call: call(), calls))
+
+    def pipeline(self, transaction=True, shard_hint=None):  # pylint: disable=unused-argument
+        """
+        This method creates a pipeline splitting commands between shards.
+
+        :param transaction: whether pipelines sent to shards should use MULTI/EXEC.
+        :param shard_hint: unused.
+        :returns: ShardedPipeline
+        """
+        return ShardedPipeline(self, transaction)
+
+    def scan(self, cursor=0, match=None, count=None, _type=None, **kwargs):
+        """
+        This method scans shards one after another. Shard's position is encoded in the cursor.
+
+        :param cursor: cursor returned by previous call or 0.
+        :param match: MATCH pattern.
+        :param count: COUNT hint.
+        :param _type: TYPE filter.
+        :returns: 2-tuple of the next cursor and a list of keys.
+        """
+        name, shard_cursor = self._scan_shard(cursor)
+        shard_cursor, keys = self.shards[name].scan(shard_cursor, match=match, count=count, _type=_type, **kwargs)
+        return self._scan_cursor(name, shard_cursor), keys
+
+    def sinter(self, keys, *args):
+        """
+        This method intersects sets kept on different shards on the client's side.
+
+        :param keys: Redis keys of sets.
+        :param args: more keys.
+        :returns: set
+        """
+        keys = list(keys) + list(args) if isinstance(keys, (list, tuple)) else [keys] + list(args)
+        groups = self._group_keys(keys)
+        return set.intersection(*[set(self.shards[name].sinter(group)) for name, group in groups.items()])
+
+    def add_shard(self, name, client, batch_size=DEFAULT_BATCH_SIZE, match=None):
+        """
+        This method adds a shard and moves keys which now belong to it from other shards.
+        Keys are read from primaries and copied with DUMP and RESTORE (keeping their expiry) before
+        the new shard is put on the ring and removed from previous shards afterwards, so they stay readable.
+        Writes to moved keys made during rebalancing may be lost, so writes should be paused.
+
+        Without match every key found on the shards is moved, so shards have to be databases dedicated
+        to the sharded namespace - keys of other applications kept in them would be moved (and removed
+        from their instances) as well. Otherwise only keys matching given SCAN patterns are moved.
+
+        :param name: shard name.
+        :param client: redis.Redis of the new shard.
+        :param batch_size: COUNT hint passed to SCAN and number of keys copied in a single pipeline.
+        :param match: glob-style pattern or list of patterns of moved keys, by default all keys are moved.
+        :returns: number of moved keys.
+        """
+        ring = HashRing(self.ring.nodes + [name], self.ring.replicas)
+        patterns = [None] if match is None else [match] if isinstance(match, (str, bytes)) else list(match)
+        moved = OrderedDict()
+        with use_primary():
+            for source in self.ring.nodes:
+                for pattern in patterns:
+                    cursor = 0
+                    while True:
+                        cursor, keys = self.shards[source].scan(cursor, match=pattern, count=batch_size)
+                        keys = [key for key in keys if ring.get_node(key) == name]
+                        if keys:
+                            moved.setdefault(source, []).extend(self._copy_keys(self.shards[source], client, keys))
+                        if not int(cursor):
+                            break
+        self.shards[name] = client
+        self.ring = ring
+        for source, keys in moved.items():
+            for start in range(0, len(keys), batch_size):
+                self.shards[source].unlink(*keys[start:start + batch_size])
+        return sum(len(keys) for keys in moved.values())
+
+    @staticmethod
+    def _copy_keys(source, target, keys):
+        """
+        This method copies keys between shards with DUMP and RESTORE.
+
+        :param source: redis.Redis of the shard keeping the keys.
+        :param target: redis.Redis of the shard receiving them.
+        :param keys: Redis keys.
+        :returns: list of copied keys.
+        """
+        pipe = source.pipeline(transaction=False)
+        for key in keys:
+            pipe.dump(key)
+            pipe.pttl(key)
+        results = pipe.execute()
+        copied = []
+        pipe = target.pipeline(transaction=False)
+        for key, dump, ttl in zip(keys, results[::2], results[1::2]):
+            if dump is not None:
+                pipe.restore(key, max(ttl, 0), dump, replace=True)
+                copied.append(key)
+        pipe.execute()
+        return copied
+
+
+class AsyncShardedPipeline(ShardedPipeline):
+    """
+    An asyncio counterpart of ShardedPipeline. Pipelines are sent to shards concurrently.
+    """
+
+    async def _send(self, name, queued, raise_on_error):
+        """
+        This coroutine sends commands to a shard in a pipeline.
+
+        :param name: shard name.
+        :param queued: list of (index, args, options).
+        :param raise_on_error: whether the first error should be raised.
+        :returns: pipeline responses.
+        """
+        pipe = self.client.shards[name].pipeline(transaction=self.transaction)
+        for _, args, options in queued:
+            pipe.execute_command(*args, **options)
+        return await pipe.execute(raise_on_error=raise_on_error)
+
+    async def execute(self, raise_on_error=True):
+        """
+        This coroutine sends recorded commands to their shards.
+
+        :param raise_on_error: whether the first error should be raised.
+        :returns: list of responses.
+        """
+        commands, self.commands = self.commands, []
+        groups, combiners = self.client._plan(commands)  # pylint: disable=protected-access
+        responses = await asyncio.gather(*[self._send(name, queued, raise_on_error)
+                                           for name, queued in groups.items()])
+        return self.client._merge(groups, responses, combiners)  # pylint: disable=protected-access
+
+
+class AsyncShardedRedis(ShardRouter, AsyncCoreCommands):
+    """
+    An asyncio counterpart of ShardedRedis, routing commands to redis.asyncio clients.
+    """
+
+    async def execute_command(self, *args, **options):
+        """
+        This coroutine sends a command to its shard(s).
+
+        :param args: command name and arguments.
+        :param options: options passed to response callbacks.
+        :returns: Redis's response.
+        """
+        parts, combine = self._split(args)
+        if len(parts) > 1:
+            options.pop('keys', None)
+        return combine(await asyncio.gather(*[self.shards[name].execute_command(*part, **options)
+                                              for name, part in parts]))
+
+    def pipeline(self, transaction=True, shard_hint=None):  # pylint: disable=unused-argument
+        """
+        This method creates a pipeline splitting commands between shards.
+
+        :param transaction: whether pipelines sent to shards should use MULTI/EXEC.
+        :param shard_hint: unused.
+        :returns: AsyncShardedPipeline
+        """
+        return AsyncShardedPipeline(self, transaction)
+
+    async def scan(self, cursor=0, match=None, count=None, _type=None, **kwargs):
+        """
+        This coroutine scans shards one after another. Shard's position is encoded in the cursor.
+
+        :param cursor: cursor returned by previous call or 0.
+        :param match: MATCH pattern.
+        :param count: COUNT hint.
+        :param _type: TYPE filter.
+        :returns: 2-tuple of the next cursor and a list of keys.
+        """
+        name, shard_cursor = self._scan_shard(cursor)
+        shard_cursor, keys = await self.shards[name].scan(shard_cursor, match=match, count=count, _type=_type,
+                                                          **kwargs)
+        return self._scan_cursor(name, shard_cursor), keys
+
+    async def sinter(self, keys, *args):
+        """
+        This coroutine intersects sets kept on different shards on the client's side.
+
+        :param keys: Redis keys of sets.
+        :param args: more keys.
+        :returns: set
+        """
+        keys = list(keys) + list(args) if isinstance(keys, (list, tuple)) else [keys] + list(args)
+        groups = self._group_keys(keys)
+        results = await asyncio.gather(*[self.shards[name].sinter(group) for name, group in groups.items()])
+        return set.intersection(*[set(result) for result in results])
@@ -1,14 +1,29 @@
 """
 This module contains tests regarding correctness of basilisk's Public API.
 """
+import asyncio
+import subprocess
+import sys
+import threading
+import time
 import unittest
+from unittest import mock
 
 import redis
 from six import string_types, b
 
-from .base import RedisModelRegister, singleton_decorator, NamedSingleton, MapModel, Config, MapModelBase
+from .aio import AsyncRedisHash, AsyncRedisList, AsyncRedisSortedSet
+from .autopipeline import AutoPipelineRedis
+from .batching import batch
+from .cache import NearCache
+from .base import RedisModelRegister, singleton_decorator, NamedSingleton, MapModel, Config, MapModelBase, \
+    MapModelException, NO_SERIALIZED
 from .fields import MapField, JsonMapField
+from .replication import ReplicatedRedis
+from .routing import use_primary
+from .sharding import HashRing, ShardedRedis, CrossShardError, get_hash_key
 from .redis_entities import RedisModel, RedisSortedSet, RedisHash, RedisModelException, RedisList
+from .workqueue import QueueConsumer, WorkQueue
 from .elasticsearch_entities import ElasticsearchModel, ElasticsearchModelException
 
 Config.load(redis={'host': 'localhost', 'port': 6379, 'db': 0, 'max_connections': 10},
@@ -204,6 +219,48 @@ class ModelRegisterTest(unittest.TestCase):
         self.assertTrue(connection.set('test', 1))
         self.assertEqual(connection.delete('test'), 1)
 
+    def test_lazy_connection(self):
+        """
+        Models can be defined before their namespace is configured and connections are
+        recreated in forked processes.
+        """
+
+        class Late(RedisModel):
+            """
+            Inner model using a namespace configured after its definition.
+            """
+            namespace = 'late'
+            name = MapField(key=True)
+
+        register = RedisModelRegister('late')
+        self.assertIsNone(register.pool)
+        Config.load(late=Config['redis'])
+        Late(name='late').save()
+        self.assertEqual(Late.get('late').name, 'late')
+        connection = Late.connect
+        self.assertIs(connection, register.connect())
+        with mock.patch('basilisk.base.os.getpid', return_value=-1):
+            self.assertIsNot(Late.connect, connection)
+            self.assertIs(RedisList('late_list', namespace='late').connect, register.connect())
+        self.assertIsNot(Late.connect, connection)
+
+    def test_lazy_backends(self):
+        """
+        Importing basilisk and defining models doesn't import client libraries.
+        """
+        script = (
+            'import sys, basilisk\n'
+            'class Item(basilisk.RedisModel):\n'
+            '    id = basilisk.MapField(key=True)\n'
+            'basilisk.ElasticsearchModel\n'
+            'print(sorted(name for name in (\'redis\', \'elasticsearch\', \'asyncio\') if name in sys.modules))\n'
+        )
+        output = subprocess.check_output([sys.executable, '-c', script])
+        self.assertEqual(output.strip(), b'[]')
+        script = 'from basilisk import *\nprint(RedisModel.__name__, RedisList.__name__, MapField.__name__)\n'
+        output = subprocess.check_output([sys.executable, '-c', script])
+        self.assertEqual(output.split(), [b'RedisModel', b'RedisList', b'MapField'])
+
     def test_register(self):
         """
         This method checks if we can register models correctly.
@@ -245,6 +302,182 @@ class RedisFieldTest(unittest.TestCase):
         self.assertEqual(json_field.pythonize(b('{"a": 2}')), {'a': 2})
 
 
+class CodegenTest(unittest.TestCase):
+    """
+    This suite checks if functions compiled for models match generic ones.
+    """
+
+    def test_compiled(self):
+        """
+        Compiled functions should initialize, serialize and pythonize instances like generic ones.
+        """
+
+        class Counter(MapField):
+            """
+            Field with a dynamic default and custom serialization.
+            """
+            __slots__ = ()
+            counter = []
+
+            def get_default(self):
+                """
+                Counts calls.
+                """
+                self.counter.append(1)
+                return len(self.counter)
+
+            @staticmethod
+            def serialize(data):
+                """
+                Multiplies data by 10.
+                """
+                return str(data * 10)
+
+        class Compiled(RedisModel):
+            """
+            Inner model with various fields.
+            """
+            name = MapField(key=True)
+            count = Counter(type=int)
+            raw = MapField(type=None)
+            extra = JsonMapField()
+
+        self.assertEqual(Compiled().count, 1)
+        self.assertEqual(Compiled().count, 2)
+        self.assertEqual(Compiled(count=7).count, 7)
+        instance = Compiled(name='a', count=3, raw=b('x'), extra={'a': 1})
+        generic_encode = MapModelBase._encode  # pylint: disable=protected-access
+        self.assertEqual(instance.serialize(), generic_encode(instance, None))
+        self.assertEqual(instance.serialize(), {'name': 'a', 'count': '30', 'raw': b('x'), 'extra': '{"a": 1}'})
+        self.assertEqual(instance.serialize(fields=['count']), {'count': '30'})
+        instance._unloaded = frozenset(['raw', 'extra'])  # pylint: disable=protected-access
+        self.assertEqual(instance.serialize(), {'name': 'a', 'count': '30'})
+        self.assertEqual(instance.serialize(fields=['raw', 'name']), {'name': 'a'})
+        generic_decode = MapModelBase.__dict__['_decode'].__func__  # pylint: disable=protected-access
+        for data in ({b('name'): b('a'), b('count'): b('3'), b('raw'): b('x'), b('extra'): b('{}'), b('other'): 1},
+                     {'name': 'a', 'count': '3', 'extra': '[1]'}, {}):
+            self.assertEqual(Compiled.pythonize(data), generic_decode(Compiled, data))
+        self.assertEqual(Compiled.pythonize({b('name'): b('a'), b('raw'): b('x')}), {'name': 'a', 'raw': b('x')})
+
+
+class CompactModelTest(unittest.TestCase):
+    """
+    This suite checks models keeping their values in slots.
+    """
+
+    def test_compact(self):
+        """
+        Compact instances shouldn't have __dict__ and should behave like regular ones.
+        """
+
+        class Slotted(RedisModel):
+            """
+            Inner compact model.
+            """
+            compact = True
+            name = MapField(key=True)
+            fame = MapField(type=int, index=True)
+            extra = JsonMapField()
+
+        class Subslotted(Slotted):
+            """
+            Inner model inheriting a compact one.
+            """
+            size = MapField(type=int, default=1)
+
+        instance = Slotted(name='slotted', fame=5)
+        self.assertFalse(hasattr(instance, '__dict__'))
+        self.assertRaises(AttributeError, lambda: setattr(instance, 'other', 1))
+        self.assertEqual(instance.to_dict(), {'name': 'slotted', 'fame': 5, 'extra': {}})
+        self.assertEqual(instance.serialize(), {'name': 'slotted', 'fame': 5, 'extra': '{}'})
+        instance.save()
+        self.assertEqual(instance.get_changed_fields(), set())
+        instance.fame = 6
+        self.assertEqual(instance.get_changed_fields(), {'fame'})
+        instance.save()
+        loaded = Slotted.get('slotted')
+        self.assertEqual((loaded.fame, loaded.extra), (6, {}))
+        self.assertEqual([item.name for item in Slotted.filter(fame=6)], ['slotted'])
+        partial = Slotted.get('slotted', fields=['fame'])
+        self.assertFalse(partial.is_loaded('extra'))
+        self.assertEqual(partial.serialize(), {'name': 'slotted', 'fame': 6})
+        self.assertIs(partial._serialized, NO_SERIALIZED)  # pylint: disable=protected-access
+        self.assertEqual(loaded._serialized, {'extra': '{}'})  # pylint: disable=protected-access
+        partial.extra = {'a': 1}
+        self.assertEqual(partial.save().get_changed_fields(), set())
+        partial.extra['a'] = 2
+        self.assertEqual(partial.get_changed_fields(), {'extra'})
+
+        child = Subslotted(name='subslotted')
+        self.assertFalse(hasattr(child, '__dict__'))
+        self.assertEqual(Subslotted.__slots__, ('size',))
+        self.assertEqual(child.save().serialize(), {'name': 'subslotted', 'fame': None, 'extra': '{}', 'size': 1})
+        self.assertEqual(Subslotted.get('subslotted').size, 1)
+
+
+class LazyFieldTest(unittest.TestCase):
+    """
+    This suite checks fields pythonized on first access.
+    """
+
+    def test_lazy(self):
+        """
+        Lazy JSON should be loaded once, when it's accessed, and written back untouched otherwise.
+        """
+        loaded = []
+
+        class CountingField(JsonMapField):
+            """
+            Inner field remembering loaded values.
+            """
+
+            def pythonize(self, data):
+                """
+                This method remembers data before loading it.
+
+                :param data: data fetched from Redis.
+                :returns: loaded JSON.
+                """
+                loaded.append(data)
+                return super(CountingField, self).pythonize(data)
+
+        class Lazy(RedisModel):
+            """
+            Inner model with a lazy field.
+            """
+            name = MapField(key=True)
+            extra = CountingField(lazy=True)
+
+        class CompactLazy(Lazy):
+            """
+            Inner compact model with a lazy field.
+            """
+            compact = True
+
+        for model in (Lazy, CompactLazy):
+            del loaded[:]
+            model(name='lazy', extra={'a': [1, 2]}).save()
+            self.assertEqual(model.values(['lazy'], fields=['extra']), [{'extra': {'a': [1, 2]}}])
+            del loaded[:]
+            instance = model.get('lazy')
+            self.assertEqual(instance.name, 'lazy')
+            instance.mark_dirty()
+            self.assertEqual(instance.serialize(), {'name': 'lazy', 'extra': b('{"a": [1, 2]}')})
+            instance.save()
+            self.assertEqual(loaded, [])
+            self.assertEqual(instance.extra, {'a': [1, 2]})
+            self.assertEqual(instance.extra, {'a': [1, 2]})
+            self.assertEqual(loaded, [b('{"a": [1, 2]}')])
+            self.assertEqual(instance.get_changed_fields(), set())
+            instance.extra['b'] = 3
+            instance.mark_dirty('extra')
+            instance.save()
+            self.assertEqual(model.get('lazy').to_dict(), {'name': 'lazy', 'extra': {'a': [1, 2], 'b': 3}})
+            instance.extra = None
+            self.assertEqual(instance.get_changed_fields(), {'extra'})
+            self.assertEqual(model().extra, {})
+
+
 class RedisModelTest(unittest.TestCase):
     """
     This test suite checks if RedisModel is working as intended.
@@ -337,6 +570,429 @@ class RedisModelTest(unittest.TestCase):
         self.assertEqual(loaded.fame, inheriting.fame)
         self.assertEqual(loaded.value, inheriting.value)
 
+    def test_get_many(self):
+        """
+        Pipelined bulk fetch should keep the order of ids and handle missing ones.
+        """
+        for fame in range(5):
+            self.Inheriting(name='many_{}'.format(fame), fame=fame, value='v').save()
+        ids = ['many_3', 'many_missing', 'many_0', 'many_4']
+        loaded = self.Inheriting.get_many(ids, chunk_size=2)
+        self.assertEqual(len(loaded), 4)
+        self.assertIsNone(loaded[1])
+        self.assertEqual([item.fame for item in loaded if item], [3, 0, 4])
+        loaded = self.Inheriting.get_many(ids, chunk_size=2, skip_missing=True)
+        self.assertEqual([item.name for item in loaded], ['many_3', 'many_0', 'many_4'])
+        self.assertEqual(self.Inheriting.get_many([]), [])
+
+    def test_values(self):
+        """
+        Plain values should be read without creating instances.
+        """
+        self.Inheriting.save_many([self.Inheriting(name='values_%d' % i, value=str(i), fame=i) for i in range(3)])
+        self.Inheriting(name='values_empty').save()
+        oids = ['values_2', 'values_missing', 'values_0', 'values_empty']
+        self.assertEqual(self.Inheriting.values(oids, fields=['fame', 'name']),
+                         [{'fame': 2, 'name': 'values_2'}, None, {'fame': 0, 'name': 'values_0'},
+                          {'fame': None, 'name': 'values_empty'}])
+        self.assertEqual(self.Inheriting.values(oids[:1]), [{'name': 'values_2', 'value': '2', 'fame': 2}])
+        self.assertEqual(self.Inheriting.values(oids, fields=['fame'], skip_missing=True, decode=False),
+                         [{'fame': b('2')}, {'fame': b('0')}, {'fame': None}])
+        self.assertEqual(self.Inheriting.values_list(oids, fields=['value', 'fame'], decode=['fame'], chunk_size=1),
+                         [(b('2'), 2), None, (b('0'), 0), (None, None)])
+        self.assertEqual(self.Inheriting.values_list(oids, fields=['fame'], flat=True, skip_missing=True),
+                         [2, 0, None])
+        self.assertRaises(TypeError, lambda: self.Inheriting.values_list(oids, flat=True))
+        self.assertRaises(RedisModelException, lambda: self.Inheriting.values(oids, fields=['missing']))
+
+    def test_partial_load(self):
+        """
+        Projections should load only requested fields and saving must not overwrite the rest.
+        """
+        self.Inheriting(name='partial', fame=7, value='untouched').save()
+        loaded = self.Inheriting.get('partial', fields=['fame'])
+        self.assertEqual(loaded.name, 'partial')
+        self.assertEqual(loaded.fame, 7)
+        self.assertIsNone(loaded.value)
+        self.assertFalse(loaded.is_loaded('value'))
+        self.assertEqual(set(loaded.to_dict()), {'name', 'fame'})
+        loaded.fame = 8
+        loaded.save()
+        loaded = self.Inheriting.get('partial')
+        self.assertEqual((loaded.fame, loaded.value), (8, 'untouched'))
+        partial = self.Inheriting.get_many(['partial', 'partial_missing'], fields=['value'])
+        self.assertIsNone(partial[1])
+        partial[0].value = 'changed'
+        self.assertTrue(partial[0].is_loaded('value'))
+        partial[0].save()
+        loaded = self.Inheriting.get('partial')
+        self.assertEqual((loaded.fame, loaded.value), (8, 'changed'))
+
+    def test_dirty_fields(self):
+        """
+        Only fields changed since load or last save should be written.
+        """
+        inheriting = self.Inheriting(name='dirty', fame=1, value='a')
+        self.assertEqual(inheriting.get_changed_fields(), {'name', 'fame', 'value'})
+        inheriting.save()
+        self.assertEqual(inheriting.get_changed_fields(), set())
+        loaded = self.Inheriting.get('dirty')
+        self.assertEqual(loaded.get_changed_fields(), set())
+        loaded.connect.hset(loaded.get_instance_key(), 'value', 'b')
+        loaded.save()
+        self.assertEqual(self.Inheriting.get('dirty').value, 'b')
+        loaded.fame = 2
+        self.assertEqual(loaded.get_changed_fields(), {'fame'})
+        loaded.save()
+        loaded = self.Inheriting.get('dirty')
+        self.assertEqual((loaded.fame, loaded.value), (2, 'b'))
+        loaded.mark_dirty()
+        self.assertEqual(loaded.get_changed_fields(), {'name', 'fame', 'value'})
+        loaded.name = 'dirty_moved'
+        loaded.mark_dirty('fame')
+        self.assertEqual(loaded.get_changed_fields(), {'name', 'fame', 'value'})
+
+    def test_mutated_fields(self):
+        """
+        JSON changed in place should be saved without mark_dirty.
+        """
+
+        class Documented(RedisModel):
+            """
+            Inner model with eager and lazy JSON fields.
+            """
+            name = MapField(key=True)
+            doc = JsonMapField()
+            lazy_doc = JsonMapField(lazy=True)
+
+        Documented(name='documented', doc={'a': 1}, lazy_doc={'b': 2}).save()
+        loaded = Documented.get('documented')
+        self.assertEqual(loaded.get_changed_fields(), set())
+        loaded.doc['a'] = 2
+        loaded.lazy_doc['b'] = 3
+        self.assertEqual(loaded.get_changed_fields(), {'doc', 'lazy_doc'})
+        loaded.save()
+        self.assertEqual(loaded.get_changed_fields(), set())
+        self.assertEqual(Documented.get('documented').to_dict(),
+                         {'name': 'documented', 'doc': {'a': 2}, 'lazy_doc': {'b': 3}})
+
+    def test_iter_all(self):
+        """
+        SCAN-based iteration should yield every instance of the model and nothing else.
+        """
+
+        class Scanned(RedisModel):
+            """
+            Inner model to check iteration.
+            """
+            name = MapField(key=True)
+            value = MapField(index=True)
+
+        for key in Scanned.connect.keys(Scanned.get_key('*')):
+            Scanned.connect.delete(key)
+        Scanned.save_many([Scanned(name='s{}'.format(i), value='v') for i in range(25)])
+        self.assertEqual(sorted(item.name for item in Scanned.iter_all(batch_size=10)),
+                         sorted('s{}'.format(i) for i in range(25)))
+        partial = list(Scanned.iter_all(fields=['name']))
+        self.assertEqual(len(partial), 25)
+        self.assertFalse(partial[0].is_loaded('value'))
+
+    def test_delete(self):
+        """
+        Instances should be removable one by one and in bulk.
+        """
+        self.Inheriting.save_many([self.Inheriting(name='del_{}'.format(i), fame=i) for i in range(3)])
+        self.Inheriting.get('del_0').delete()
+        self.assertRaises(RedisModelException, lambda: self.Inheriting.get('del_0'))
+        self.assertEqual(self.Inheriting.delete_many(['del_0', 'del_1', 'del_2'], chunk_size=2), 2)
+        self.assertEqual(self.Inheriting.get_many(['del_1', 'del_2'], skip_missing=True), [])
+        self.assertRaises(NotImplementedError, lambda: MapModelBase.delete(self.Model()))
+        self.assertRaises(MapModelException, MapModelBase.aconnect)
+
+    def test_ttl(self):
+        """
+        Default and per-call expiry should be set when saving.
+        """
+
+        class Expiring(RedisModel):
+            """
+            Inner model with default time to live.
+            """
+            name = MapField(key=True)
+            value = MapField(index=True)
+            default_ttl = 100
+
+        expiring = Expiring(name='ttl', value='a').save()
+        self.assertTrue(0 < expiring.connect.ttl(expiring.get_instance_key()) <= 100)
+        expiring.save(ttl=2.5)
+        self.assertTrue(0 < expiring.connect.pttl(expiring.get_instance_key()) <= 2500)
+        Expiring.save_many([expiring], ttl=50)
+        self.assertTrue(2 < expiring.connect.ttl(expiring.get_instance_key()) <= 50)
+        expiring.save(ttl=0)
+        self.assertEqual(expiring.connect.ttl(expiring.get_instance_key()), -1)
+        self.assertEqual([item.name for item in Expiring.filter(value='a')], ['ttl'])
+        self.assertEqual(Expiring.delete_many(['ttl']), 1)
+        self.assertFalse(expiring.connect.exists(Expiring.get_index_key('value', 'a')))
+
+    def test_purge_expired(self):
+        """
+        Index entries of expired instances should be removed by purge_expired.
+        """
+
+        class Purged(RedisModel):
+            """
+            Inner model with set and range indexes.
+            """
+            name = MapField(key=True)
+            value = MapField(index=True)
+            rank = MapField(type=int, range_index=True)
+
+        Purged(name='gone', value='a', rank=1).save(ttl=0.05)
+        changed = Purged(name='changed', value='a', rank=4).save(ttl=0.05)
+        changed.value = 'c'
+        changed.save()
+        Purged(name='kept', value='a', rank=2).save(ttl=100)
+        Purged(name='persisted', value='b', rank=3).save(ttl=100).save(ttl=0)
+        self.assertFalse(Purged.connect.exists(Purged.get_index_record_key('persisted')))
+        time.sleep(0.1)
+        self.assertEqual(Purged.where(rank__gte=0).count_all(), 4)
+        self.assertEqual(Purged.purge_expired(), 2)
+        self.assertEqual(Purged.where(rank__gte=0).count_all(), 2)
+        self.assertEqual(sorted(Purged.connect.smembers(Purged.get_index_key('value', 'a'))), [b('kept')])
+        self.assertFalse(Purged.connect.exists(Purged.get_index_key('value', 'c')))
+        self.assertEqual(Purged.connect.zrange(Purged.get_expiry_key(), 0, -1), [b('kept')])
+        self.assertEqual(Purged.purge_expired(), 0)
+
+        Purged(name='again', value='d', rank=5).save(ttl=0.05)
+        time.sleep(0.1)
+        Purged(name='again', value='d', rank=5).save()
+        self.assertEqual(Purged.purge_expired(), 0)
+        self.assertEqual(Purged.filter(value='d')[0].name, 'again')
+        self.assertEqual(Purged.connect.zrange(Purged.get_expiry_key(), 0, -1), [b('kept')])
+        Purged.get('kept').delete()
+        self.assertEqual(Purged.connect.zcard(Purged.get_expiry_key()), 0)
+        self.assertFalse(Purged.connect.exists(Purged.get_index_record_key('kept')))
+        Purged.delete_many(['again', 'persisted'])
+
+    def test_save_many(self):
+        """
+        Chunked bulk saving should persist every instance and report each chunk's timing.
+        """
+        instances = [self.Inheriting(fame=fame, value='bulk') for fame in range(5)]
+        timings = self.Inheriting.save_many(instances, chunk_size=2)
+        self.assertEqual(len(timings), 3)
+        self.assertTrue(all(instance.name for instance in instances))
+        loaded = self.Inheriting.get_many([instance.name for instance in instances])
+        self.assertEqual([item.fame for item in loaded], list(range(5)))
+        self.assertEqual(len(self.Inheriting.save_many(instances, transaction=True)), 1)
+        self.assertRaises(ValueError, lambda: self.Inheriting.save_many([self.Inheriting()], create_id=False))
+
+
+class RedisIndexTest(unittest.TestCase):
+    """
+    This suite checks secondary indexes of RedisModel.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        We need an indexed model to proceed with the tests.
+        """
+
+        class Indexed(RedisModel):
+            """
+            Inner model with indexed fields.
+            """
+            name = MapField(key=True)
+            color = MapField(index=True)
+            size = MapField(type=int, index=True)
+
+        cls.Indexed = Indexed
+
+    def test_filter(self):
+        """
+        filter() should resolve ids from indexes kept up to date by save().
+        """
+        for name in self.Indexed.connect.keys(self.Indexed.get_index_key('*', '*')):
+            self.Indexed.connect.delete(name)
+        self.Indexed(name='a', color='red', size=1).save()
+        self.Indexed(name='b', color='red', size=2).save()
+        self.Indexed(name='c', color='blue', size=2).save()
+        self.assertEqual([item.name for item in self.Indexed.filter(color='red')], ['a', 'b'])
+        self.assertEqual([item.name for item in self.Indexed.filter(color='red', size=2)], ['b'])
+        loaded = self.Indexed.get('b')
+        loaded.color = 'blue'
+        loaded.save()
+        self.assertEqual([item.name for item in self.Indexed.filter(color='red')], ['a'])
+        self.assertEqual([item.name for item in self.Indexed.filter(color='blue')], ['b', 'c'])
+        self.Indexed(name='a', color='green', size=1).save()
+        self.assertEqual([item.name for item in self.Indexed.filter(color='red')], [])
+        self.assertEqual(self.Indexed.filter(color='yellow'), [])
+        self.assertRaises(RedisModelException, lambda: self.Indexed.filter(name='a'))
+        self.assertRaises(TypeError, self.Indexed.filter)
+
+    def test_delete_unloaded(self):
+        """
+        delete() should remove index entries of instances which weren't loaded or were loaded partially.
+        """
+        self.Indexed(name='d', color='white', size=4).save()
+        self.Indexed(name='e', color='white', size=5).save()
+        self.Indexed(name='f', color='white', size=6).save()
+        self.Indexed(name='d').delete()
+        self.Indexed.get('e', fields=['size']).delete()
+        asyncio.run(self.Indexed(name='f').adelete())
+        for key in (self.Indexed.get_index_key('color', 'white'), self.Indexed.get_index_key('size', '4'),
+                    self.Indexed.get_index_key('size', '5'), self.Indexed.get_index_key('size', '6')):
+            self.assertFalse(self.Indexed.connect.exists(key))
+
+
+class RedisQueryTest(unittest.TestCase):
+    """
+    This suite checks range queries over sorted-set indexes.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        We need a model with a range index to proceed with the tests.
+        """
+
+        class Article(RedisModel):
+            """
+            Inner model with a range indexed field.
+            """
+            name = MapField(key=True)
+            published = MapField(type=int, range_index=True)
+
+        cls.Article = Article
+
+    def test_where(self):
+        """
+        Conditions, ordering, limit and offset should be resolved by Redis.
+        """
+        self.Article.connect.delete(self.Article.get_range_index_key('published'))
+        self.Article.save_many([self.Article(name='a{}'.format(i), published=i) for i in range(10)])
+
+        def names(query):
+            """
+            Returns names of articles matching the query.
+            """
+            return [item.name for item in query]
+
+        self.assertEqual(names(self.Article.where(published__gte=3, published__lt=6)), ['a3', 'a4', 'a5'])
+        self.assertEqual(names(self.Article.where(published__gt=3, published__lte=6)), ['a4', 'a5', 'a6'])
+        self.assertEqual(names(self.Article.where(published=7)), ['a7'])
+        query = self.Article.where(published__gte=2).order_by('-published')
+        self.assertEqual(names(query.limit(3)), ['a9', 'a8', 'a7'])
+        self.assertEqual(names(query.offset(6)), ['a3', 'a2'])
+        self.assertEqual(names(query.offset(1).limit(2)), ['a8', 'a7'])
+        self.assertEqual(query.limit(1).count_all(), 8)
+        self.assertEqual(names(self.Article.order_by('published').limit(2)), ['a0', 'a1'])
+        loaded = self.Article.get('a0')
+        loaded.published = 20
+        loaded.save()
+        self.assertEqual(names(self.Article.order_by('-published').limit(1)), ['a0'])
+        loaded.published = None
+        loaded.save()
+        self.assertEqual(self.Article.order_by('published').count_all(), 9)
+        self.assertRaises(RedisModelException, lambda: self.Article.where(name='a'))
+        self.assertRaises(RedisModelException, lambda: self.Article.where(published__in=[1]))
+
+
+class NearCacheTest(unittest.TestCase):
+    """
+    This suite checks the in-process near cache and its invalidation.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        We need a cached model to proceed with the tests.
+        """
+
+        class Cached(RedisModel):
+            """
+            Inner model using near cache.
+            """
+            name = MapField(key=True)
+            value = MapField()
+            near_cache = NearCache(max_size=2, ttl=60)
+
+        cls.Cached = Cached
+
+    def tearDown(self):
+        """
+        Let's stop the listener thread after every test.
+        """
+        self.Cached.near_cache.stop()
+
+    def test_lru(self):
+        """
+        Entries should expire, be evicted when cache is full and counted.
+        """
+        cache = NearCache(max_size=2, ttl=60)
+        self.assertIsNone(cache.get('a'))
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 2, 'evictions': 1, 'invalidations': 0, 'size': 2})
+        cache.invalidate('a')
+        self.assertEqual(len(cache), 1)
+        cache = NearCache(ttl=-1)
+        cache.set('a', 1)
+        self.assertIsNone(cache.get('a'))
+
+    def test_generation(self):
+        """
+        Data fetched before an invalidation of its key shouldn't be cached and cached data shouldn't be shared.
+        """
+        cache = NearCache(max_size=2, ttl=60)
+        generation = cache.generation()
+        cache.invalidate('a')
+        cache.set('a', {'doc': {'k': 1}}, generation)
+        cache.set('b', {'doc': {'k': 2}}, generation)
+        self.assertIsNone(cache.get('a'))
+        cache.get('b')['doc']['k'] = 3
+        self.assertEqual(cache.get('b'), {'doc': {'k': 2}})
+        cache.invalidate('c')
+        cache.invalidate('d')
+        cache.set('e', {}, generation)
+        self.assertIsNone(cache.get('e'))
+        cache.set('a', {}, cache.generation())
+        self.assertEqual(cache.get('a'), {})
+
+    def test_cached_get(self):
+        """
+        Loads should be served from cache until save() invalidates the entry.
+        """
+        self.Cached(name='cached', value='a').save()
+        self.assertEqual(self.Cached.get('cached').value, 'a')
+        self.Cached.connect.hset(self.Cached.get_key('cached'), 'value', 'b')
+        self.assertEqual(self.Cached.get('cached').value, 'a')
+        self.assertEqual(self.Cached.get_many(['cached'], fields=['value'])[0].value, 'b')
+        self.assertGreaterEqual(self.Cached.near_cache.hits, 1)
+        loaded = self.Cached.get('cached')
+        loaded.value = 'c'
+        loaded.save()
+        self.assertEqual(self.Cached.get('cached').value, 'c')
+        self.assertIsNone(self.Cached.get_many(['cached', 'cached_missing'])[1])
+
+    def test_remote_invalidation(self):
+        """
+        Messages published by other processes should invalidate cached entries.
+        """
+        self.Cached(name='remote', value='a').save()
+        self.Cached.get('remote')
+        self.Cached.connect.hset(self.Cached.get_key('remote'), 'value', 'b')
+        self.Cached.connect.publish(NearCache.channel, self.Cached.get_key('remote'))
+        for _ in range(50):
+            if self.Cached.get('remote').value == 'b':
+                break
+            time.sleep(0.05)
+        self.assertEqual(self.Cached.get('remote').value, 'b')
+
 
 class RedisSortedSetTest(unittest.TestCase):
     """
@@ -402,6 +1058,97 @@ class RedisHashTest(unittest.TestCase):
         self.assertEqual(redis_hash.items(), {b(k): b(v) for k, v in {'b': '3', 'c': '3', 'd': '4', 'e': '6'}.items()})
         self.assertIn('b', redis_hash)
 
+    def test_local_view(self):
+        """
+        Pending changes and the prefetched snapshot should answer reads without Redis.
+        """
+        redis_hash = RedisHash('rh_local')
+        redis_hash.clear()
+        redis_hash['a'] = 1
+        redis_hash['b'] = 'x'
+        redis_hash.save()
+        redis_hash['a'] = 2
+        redis_hash['c'] = 0.5
+        del redis_hash['b']
+        with mock.patch.object(redis_hash.connect, 'hget') as hget:
+            self.assertEqual(redis_hash['a'], b('2'))
+            self.assertIsNone(redis_hash['b'])
+            self.assertEqual(hget.call_count, 0)
+        self.assertNotIn('b', redis_hash)
+        self.assertIn('c', redis_hash)
+        self.assertEqual(redis_hash.get('c', 'missing', 'a'), [b('0.5'), None, b('2')])
+        self.assertEqual(sorted(redis_hash.keys()), [b('a'), b('c')])
+        self.assertEqual(redis_hash.items(), {b('a'): b('2'), b('c'): b('0.5')})
+        self.assertEqual(len(redis_hash), 2)
+        self.assertEqual(RedisHash('rh_local').items(), {b('a'): b('1'), b('b'): b('x')})
+        redis_hash.save()
+        self.assertEqual(RedisHash('rh_local').items(), redis_hash.items())
+
+        prefetched = RedisHash('rh_local').prefetch(max_age=0.2)
+        with mock.patch.object(prefetched.connect, 'execute_command') as execute_command:
+            self.assertEqual(prefetched['a'], b('2'))
+            self.assertEqual(prefetched.get('a', 'b'), [b('2'), None])
+            self.assertIn('c', prefetched)
+            self.assertEqual(len(prefetched), 2)
+            prefetched['d'] = 4
+            self.assertEqual(sorted(prefetched.keys()), [b('a'), b('c'), b('d')])
+            self.assertEqual(execute_command.call_count, 0)
+        prefetched.save()
+        self.assertEqual(prefetched.snapshot, {b('a'): b('2'), b('c'): b('0.5'), b('d'): b('4')})
+        redis_hash['a'] = 3
+        redis_hash.save()
+        self.assertEqual(prefetched['a'], b('2'))
+        time.sleep(0.3)
+        self.assertEqual(prefetched['a'], b('3'))
+        redis_hash['e'] = 5
+        redis_hash.save()
+        self.assertNotIn('e', prefetched)
+        self.assertEqual(prefetched.load()['e'], b('5'))
+        prefetched.clear()
+        self.assertEqual(prefetched.items(), {})
+
+    def test_decoded_view(self):
+        """
+        With decode_responses, pending changes and the snapshot should be read as text, like Redis's responses.
+        """
+        Config.load(decoded=dict(Config['redis'], decode_responses=True))
+        redis_hash = RedisHash('rh_decoded', namespace='decoded')
+        redis_hash.clear()
+        redis_hash['a'] = 1
+        redis_hash.save()
+        redis_hash['b'] = 2
+        self.assertEqual(redis_hash['a'], '1')
+        self.assertEqual(redis_hash['b'], '2')
+        self.assertEqual(sorted(redis_hash.keys()), ['a', 'b'])
+        prefetched = RedisHash('rh_decoded', namespace='decoded').prefetch()
+        prefetched['c'] = 3
+        self.assertEqual(prefetched.items(), {'a': '1', 'c': '3'})
+        prefetched.save()
+        self.assertEqual(prefetched.snapshot, {'a': '1', 'c': '3'})
+        with self.assertRaises(ValueError), batch('decoded'):
+            prefetched['d'] = 4
+            prefetched.save()
+            raise ValueError()
+        self.assertEqual(prefetched.snapshot, {'a': '1', 'c': '3'})
+        self.assertEqual(prefetched['d'], '4')
+
+    def test_decoded_shards(self):
+        """
+        Pending changes should be read like the shard holding the hash responds, even if it's configured
+        with decode_responses and the namespace isn't.
+        """
+        Config.load(decoded_shards=dict(Config['redis'], shards=[{'db': 5, 'decode_responses': True}]))
+        redis_hash = RedisHash('rh_decoded', namespace='decoded_shards')
+        redis_hash.clear()
+        redis_hash['a'] = 1
+        self.assertEqual(redis_hash['a'], '1')
+        redis_hash.save()
+        redis_hash['b'] = 2
+        self.assertEqual(redis_hash.get('a', 'b'), ['1', '2'])
+        del redis_hash['b']
+        self.assertEqual(redis_hash.items(), {'a': '1'})
+        redis_hash.clear()
+
 
 class RedisListTest(unittest.TestCase):
     """
@@ -434,6 +1181,859 @@ class RedisListTest(unittest.TestCase):
         redis_list[0] = 13
         self.assertEqual(int(redis_list[0]), 13)
 
+    def test_iteration(self):
+        """
+        Lists should be fetched in chunks instead of element by element.
+        """
+        redis_list = RedisList('rl_iter', decode=int)
+        redis_list.clear()
+        self.assertEqual(list(redis_list), [])
+        for item in range(7):
+            redis_list.append(item)
+        with mock.patch.object(redis_list.connect, 'lrange', wraps=redis_list.connect.lrange) as lrange:
+            self.assertEqual(list(redis_list), list(range(7)))
+            self.assertEqual(lrange.call_count, 1)
+            self.assertEqual(list(redis_list.iter_chunks(3)), [[0, 1, 2], [3, 4, 5], [6]])
+            self.assertEqual(list(redis_list.iter_chunks(7)), [list(range(7))])
+            self.assertEqual(lrange.call_count, 6)
+        self.assertEqual(redis_list.to_list(), list(range(7)))
+        self.assertEqual(redis_list[1:2], [1, 2])
+        self.assertEqual(redis_list.pop(), 6)
+        self.assertEqual(RedisList('rl_iter').to_list(), [b(str(item)) for item in range(6)])
+
+    def test_bulk(self):
+        """
+        Many elements should be pushed with few commands and replaced atomically.
+        """
+        redis_list = RedisList('rl_bulk', decode=int)
+        redis_list.clear()
+        with mock.patch.object(redis.client.Pipeline, 'rpush', autospec=True,
+                               side_effect=redis.client.Pipeline.rpush) as rpush:
+            self.assertEqual(redis_list.extend(range(5), chunk_size=2), 5)
+            self.assertEqual(rpush.call_count, 3)
+        self.assertIsNone(redis_list.extend([]))
+        self.assertEqual(redis_list.extendleft([-1, -2]), 7)
+        self.assertEqual(redis_list.to_list(), [-2, -1, 0, 1, 2, 3, 4])
+        with batch():
+            self.assertIsNone(redis_list.extend([5, 6]))
+        self.assertEqual(len(redis_list), 9)
+
+        buffered = RedisList('rl_bulk', decode=int, buffered=True)
+        buffered.append(7)
+        buffered.extend([8, 9])
+        buffered.prepend(-3)
+        self.assertEqual(buffered.changes, [('rpush', [7, 8, 9]), ('lpush', [-3])])
+        self.assertEqual(len(buffered), 9)
+        buffered.save()
+        self.assertEqual(buffered.changes, [])
+        self.assertEqual(buffered.to_list(), list(range(-3, 10)))
+
+        buffered.append(10)
+        redis_list.replace(['a', 'b'])
+        self.assertEqual(RedisList('rl_bulk').to_list(), [b('a'), b('b')])
+        self.assertEqual(redis_list.connect.keys('*rl_bulk*'), [b('rl_bulk')])
+        buffered.replace([])
+        self.assertEqual(buffered.changes, [])
+        self.assertEqual(len(redis_list), 0)
+        with mock.patch.object(redis_list, 'get_temporary_key', return_value='{rl_bulk}:tmp:test'):
+            pipes = redis_list._queue_replace(list(range(5)), 2)  # pylint: disable=protected-access
+            pipes[0].execute()
+            self.assertTrue(0 < redis_list.connect.ttl('{rl_bulk}:tmp:test') <= RedisList.TEMPORARY_KEY_TTL)
+            pipes[1].execute()
+        self.assertEqual(RedisList('rl_bulk', decode=int).to_list(), list(range(5)))
+        self.assertEqual(redis_list.connect.ttl('rl_bulk'), -1)
+        self.assertEqual(redis_list.connect.keys('*rl_bulk*'), [b('rl_bulk')])
+        self.assertTrue(RedisList('plain').get_temporary_key().startswith('{plain}:tmp:'))
+        self.assertTrue(RedisList('list.{tag}').get_temporary_key().startswith('list.{tag}:tmp:'))
+
+    def test_maxlen(self):
+        """
+        Capped lists should keep only the newest elements and trim them once per push.
+        """
+        events = RedisList('rl_capped', decode=int, maxlen=3)
+        events.clear()
+        self.assertEqual(events.tail(2), [])
+        for item in range(4):
+            self.assertEqual(events.append(item), min(item + 1, 3))
+        self.assertEqual(events.to_list(), [1, 2, 3])
+        with mock.patch.object(redis.client.Pipeline, 'ltrim', autospec=True,
+                               side_effect=redis.client.Pipeline.ltrim) as ltrim:
+            self.assertEqual(events.extend(range(4, 10), chunk_size=2), 3)
+            self.assertEqual(ltrim.call_count, 1)
+        self.assertEqual(events.to_list(), [7, 8, 9])
+        self.assertEqual(events.tail(2), [8, 9])
+        self.assertEqual(events.tail(10), [7, 8, 9])
+        self.assertEqual(events.tail(0), [])
+        self.assertEqual(events.prepend(6), 3)
+        self.assertEqual(events.to_list(), [6, 7, 8])
+        with batch():
+            self.assertIsNone(events.append(9))
+        self.assertEqual(events.to_list(), [7, 8, 9])
+        buffered = RedisList('rl_capped', decode=int, buffered=True, maxlen=3)
+        buffered.extend([10, 11])
+        buffered.extendleft([1, 2, 3, 4])
+        buffered.save()
+        self.assertEqual(buffered.to_list(), [4, 3, 2])
+        events.replace(range(10))
+        self.assertEqual(events.to_list(), [7, 8, 9])
+        self.assertRaises(ValueError, lambda: RedisList('rl_capped', maxlen=0))
+
+
+class WorkQueueTest(unittest.TestCase):
+    """
+    This suite checks if WorkQueue delivers jobs reliably.
+    """
+
+    def setUp(self):
+        """
+        We start every test with an empty queue.
+        """
+        self.queue = WorkQueue('wq_test', decode=int, visibility_timeout=0.2)
+        self.queue.clear()
+
+    def test_pop_many(self):
+        """
+        Jobs should be popped in batches.
+        """
+        self.queue.extend(range(5))
+        self.assertEqual(self.queue.pop_many(3), [0, 1, 2])
+        self.assertEqual(self.queue.pop_many(3, timeout=0.1), [3, 4])
+        self.assertEqual(self.queue.pop_many(3), [])
+        self.assertEqual(self.queue.pop_many(3, timeout=0.1), [])
+
+    def test_reserve(self):
+        """
+        Reserved jobs should be kept until they're acknowledged and requeued when consumer's lease expires.
+        """
+        self.queue.extend(range(6))
+        jobs = self.queue.reserve('first', 3)
+        self.assertEqual(jobs, [b(str(item)) for item in range(3)])
+        self.assertEqual(self.queue.processing('first'), jobs)
+        self.assertEqual(self.queue.ack('first', *jobs[:2]), 2)
+        self.assertEqual(self.queue.ack('first', jobs[0]), 0)
+        self.assertEqual(self.queue.release('first', jobs[2]), 1)
+        self.assertEqual(self.queue.to_list(), [3, 4, 5, 2])
+        self.assertEqual(self.queue.reserve('second', 2), [b('3'), b('4')])
+        self.assertEqual(self.queue.consumers(), ['first', 'second'])
+        self.assertEqual(self.queue.requeue_expired(), 0)
+        time.sleep(0.3)
+        self.queue.reserve('first', 0)
+        self.assertEqual(self.queue.requeue_expired(), 2)
+        self.assertEqual(self.queue.consumers(), ['first'])
+        self.assertEqual(self.queue.to_list(), [3, 4, 5, 2])
+        self.assertEqual(self.queue.reserve('first', 10), [b(str(item)) for item in (3, 4, 5, 2)])
+        self.assertEqual(self.queue.reserve('first', 10, timeout=0.1), [])
+        self.queue.clear()
+        self.assertEqual(self.queue.connect.keys('*wq_test*'), [])
+
+    def test_blocking_reserve(self):
+        """
+        Reserving with a timeout longer than the visibility timeout should renew the lease once jobs arrive.
+        """
+        connection = self.queue.connect
+        blmove = connection.blmove
+
+        def waiting_blmove(*args):
+            """
+            Waits until the lease expired and expired consumers were requeued, then jobs arrive.
+
+            :param args: BLMOVE arguments.
+            """
+            time.sleep(0.3)
+            self.assertEqual(self.queue.requeue_expired(), 0)
+            self.queue.extend(range(3))
+            return blmove(*args)
+
+        with mock.patch.object(connection, 'blmove', waiting_blmove):
+            jobs = self.queue.reserve('blocked', 2, timeout=2)
+        self.assertEqual(jobs, [b('0'), b('1')])
+        self.assertEqual(self.queue.consumers(), ['blocked'])
+        self.assertEqual(self.queue.requeue_expired(), 0)
+        self.assertEqual(self.queue.processing('blocked'), jobs)
+
+    def test_consumer(self):
+        """
+        Consumer should handle every job, retrying failed ones.
+        """
+        handled = []
+        failures = [7]
+
+        def handler(job):
+            """
+            Fails on a job once.
+
+            :param job: decoded job.
+            """
+            if job in failures:
+                failures.remove(job)
+                raise ValueError(job)
+            handled.append(job)
+
+        self.queue.extend(range(30))
+        self.queue.reserve('crashed', 5)
+        consumer = QueueConsumer(self.queue, handler, threads=3, batch_size=4, timeout=0.05, requeue_interval=0.1)
+        with self.assertLogs('basilisk.workqueue') as logs:
+            consumer.start()
+            deadline = time.time() + 5
+            while len(handled) < 30 and time.time() < deadline:
+                time.sleep(0.05)
+            consumer.stop()
+        self.assertEqual(sorted(handled), list(range(30)))
+        self.assertEqual((consumer.handled, consumer.failed), (30, 1))
+        self.assertEqual(self.queue.processing(consumer.name), [])
+        self.assertEqual(len(self.queue), 0)
+        self.assertEqual(len(logs.records), 1)
+        self.assertIsInstance(logs.records[0].exc_info[1], ValueError)
+
+    def test_heartbeat(self):
+        """
+        Consumer's lease should be renewed while a batch is handled, so its jobs aren't requeued.
+        """
+        handled = []
+
+        def handler(job):
+            """
+            Handles a job for longer than the visibility timeout.
+
+            :param job: decoded job.
+            """
+            time.sleep(0.5)
+            handled.append(job)
+
+        self.queue.extend(range(2))
+        consumer = QueueConsumer(self.queue, handler, threads=2, timeout=0.05).start()
+        deadline = time.time() + 5
+        while not self.queue.processing(consumer.name) and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.3)
+        self.assertEqual(self.queue.requeue_expired(), 0)
+        self.assertEqual(self.queue.consumers(), [consumer.name])
+        while len(handled) < 2 and time.time() < deadline:
+            time.sleep(0.05)
+        consumer.stop()
+        self.assertEqual(sorted(handled), [0, 1])
+        self.assertEqual((consumer.handled, len(self.queue)), (2, 0))
+
+
+class BatchTest(unittest.TestCase):
+    """
+    This suite checks if batch() collects and flushes writes correctly.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        We need a model to proceed with the tests.
+        """
+
+        class Batched(RedisModel):
+            """
+            Inner model saved in batches.
+            """
+            name = MapField(key=True)
+            value = MapField()
+
+        cls.Batched = Batched
+
+    def setUp(self):
+        """
+        Let's start every test with empty entities.
+        """
+        self.redis_list = RedisList('batch_list')
+        self.redis_hash = RedisHash('batch_hash')
+        self.redis_ss = RedisSortedSet('batch_ss')
+        for entity in (self.redis_list, self.redis_hash, self.redis_ss):
+            entity.clear()
+        self.Batched.delete_many(['batched'])
+
+    def test_flush(self):
+        """
+        Writes should be visible only after the batch exits.
+        """
+        with batch(transaction=True):
+            model = self.Batched(name='batched', value='a').save()
+            self.assertIsNone(self.redis_list.append(1))
+            self.redis_list.prepend(0)
+            self.redis_hash['a'] = 1
+            self.redis_hash.save()
+            self.redis_ss.set_score('a', 1)
+            self.redis_ss.save()
+            with batch():
+                self.redis_list.append(2)
+            self.assertEqual(len(self.redis_list), 0)
+            self.assertRaises(RedisModelException, lambda: self.Batched.get('batched'))
+            self.assertEqual(model.get_changed_fields(), {'name', 'value'})
+        self.assertEqual(model.get_changed_fields(), set())
+        self.assertEqual(self.Batched.get('batched').value, 'a')
+        self.assertEqual([int(item) for item in self.redis_list[:]], [0, 1, 2])
+        self.assertEqual(int(self.redis_hash['a']), 1)
+        self.assertEqual(len(self.redis_ss), 1)
+        with batch():
+            model.delete()
+            self.assertEqual(self.Batched.get('batched').value, 'a')
+        self.assertRaises(RedisModelException, lambda: self.Batched.get('batched'))
+
+    def test_changed_after_save(self):
+        """
+        Fields changed after save() inside a batch should stay changed once it's flushed.
+        """
+        model = self.Batched(name='batched', value='a').save()
+        with batch():
+            model.value = 'b'
+            model.save()
+            model.value = 'c'
+        self.assertEqual(model.get_changed_fields(), {'value'})
+        self.assertEqual(self.Batched.get('batched').value, 'b')
+        model.save()
+        self.assertEqual(model.get_changed_fields(), set())
+        self.assertEqual(self.Batched.get('batched').value, 'c')
+
+    def test_discard(self):
+        """
+        Writes should be discarded when an exception is raised.
+        """
+        def failing():
+            """
+            Saves a model and fails.
+            """
+            with batch():
+                self.Batched(name='batched', value='a').save()
+                self.redis_list.append(1)
+                raise ValueError()
+
+        self.assertRaises(ValueError, failing)
+        self.assertEqual(len(self.redis_list), 0)
+        self.assertRaises(RedisModelException, lambda: self.Batched.get('batched'))
+        self.assertEqual(self.redis_list.append(1), 1)
+
+    def test_discard_changes(self):
+        """
+        Changelists saved in a discarded batch should be kept, so they can be saved again.
+        """
+        buffered = RedisList('batch_list', buffered=True)
+
+        def failing():
+            """
+            Saves changelists and fails.
+            """
+            with batch():
+                self.redis_hash['a'] = 1
+                self.redis_hash.save()
+                self.redis_ss.set_score('a', 1)
+                self.redis_ss.save()
+                buffered.append(1)
+                buffered.save()
+                buffered.append(2)
+                self.redis_hash['b'] = 2
+                raise ValueError()
+
+        self.assertRaises(ValueError, failing)
+        self.assertEqual(self.redis_hash.connect.exists('batch_hash', 'batch_ss', 'batch_list'), 0)
+        self.redis_hash.save()
+        self.redis_ss.save()
+        buffered.save()
+        self.assertEqual(self.redis_hash.items(), {b('a'): b('1'), b('b'): b('2')})
+        self.assertEqual(self.redis_ss.lowest(), (b('a'), 1))
+        self.assertEqual([int(item) for item in self.redis_list[:]], [1, 2])
+        self.assertEqual((self.redis_hash.changes, self.redis_ss.changes, buffered.changes), ({}, {}, []))
+        buffered.append(3)
+        with mock.patch('redis.client.Pipeline.execute', side_effect=redis.ConnectionError):
+            self.assertRaises(redis.ConnectionError, buffered.save)
+        self.assertEqual(buffered.changes, [('rpush', [3])])
+        buffered.save()
+        self.assertEqual([int(item) for item in self.redis_list[:]], [1, 2, 3])
+        with batch():
+            self.redis_hash['c'] = 3
+            self.redis_hash.save()
+            self.redis_hash['c'] = 4
+            self.assertEqual(self.redis_hash['c'], b('4'))
+        self.assertEqual(self.redis_hash['c'], b('4'))
+        self.assertEqual(self.redis_hash.connect.hget('batch_hash', 'c'), b('3'))
+
+
+class AutoPipelineTest(unittest.TestCase):
+    """
+    This suite checks if commands issued by many threads are pipelined correctly.
+    """
+
+    def test_concurrent(self):
+        """
+        Every thread should get its own result, while commands share pipelines.
+        """
+        Config.load(autopipelined=dict(Config['redis'], autopipeline=True, autopipeline_window=0.001))
+        connection = RedisModelRegister('autopipelined').connect()
+        self.assertIsInstance(connection, AutoPipelineRedis)
+        self.assertIs(connection, RedisModelRegister('autopipelined').connect())
+        redis_hash = RedisHash('autopipeline_hash', namespace='autopipelined')
+        redis_hash.clear()
+        for i in range(50):
+            redis_hash[str(i)] = i
+        redis_hash.save()
+        results = {}
+        barrier = threading.Barrier(50)
+
+        def worker(index):
+            """
+            Reads one hash field, together with other threads.
+            """
+            barrier.wait()
+            results[index] = int(redis_hash[str(index)])
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, {i: i for i in range(50)})
+        self.assertLess(connection.pipelines_sent, connection.commands_sent)
+        self.assertRaises(redis.ResponseError, lambda: connection.incr('autopipeline_hash'))
+        self.assertIsNone(connection.blpop('autopipeline_missing', timeout=1))
+
+    def test_interrupted(self):
+        """
+        A thread interrupted while sending a pipeline shouldn't block following commands,
+        which shouldn't wait for the window without concurrency.
+        """
+        Config.load(autopipeline_window=dict(Config['redis'], autopipeline=True, autopipeline_window=0.5))
+        connection = RedisModelRegister('autopipeline_window').connect()
+        with mock.patch.object(redis.client.Pipeline, 'execute', side_effect=KeyboardInterrupt):
+            self.assertRaises(KeyboardInterrupt, lambda: connection.get('autopipeline_key'))
+        start = time.time()
+        connection.set('autopipeline_key', 1)
+        self.assertEqual(connection.get('autopipeline_key'), b('1'))
+        self.assertLess(time.time() - start, 0.5)
+
+
+class AsyncTest(unittest.TestCase):
+    """
+    This suite checks asyncio counterparts of models and proxies.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        We need a model to proceed with the tests.
+        """
+
+        class Awaited(RedisModel):
+            """
+            Inner model used with asyncio.
+            """
+            name = MapField(key=True)
+            fame = MapField(type=int)
+
+        cls.Awaited = Awaited
+
+    def test_model(self):
+        """
+        Async models should read what's written synchronously and vice versa.
+        """
+        async def scenario():
+            """
+            Saves and loads models asynchronously.
+            """
+            await self.Awaited(name='async_a', fame=1).asave()
+            self.Awaited(name='async_b', fame=2).save()
+            loaded = await self.Awaited.aget('async_b')
+            self.assertEqual(loaded.fame, 2)
+            loaded = await self.Awaited.aget_many(['async_a', 'async_missing', 'async_b'], chunk_size=2)
+            self.assertEqual([item.fame if item else None for item in loaded], [1, None, 2])
+            partial = await self.Awaited.aget('async_a', fields=['name'])
+            self.assertFalse(partial.is_loaded('fame'))
+            with self.assertRaises(RedisModelException):
+                await self.Awaited.aget('async_missing')
+            await loaded[0].adelete()
+
+        asyncio.run(scenario())
+        self.assertEqual(self.Awaited.get_many(['async_a', 'async_b'], skip_missing=True)[0].name, 'async_b')
+
+    def test_near_cache(self):
+        """
+        Async loads should subscribe to invalidations outside of the event loop's thread.
+        """
+
+        class AwaitedCached(RedisModel):
+            """
+            Inner model using near cache with asyncio.
+            """
+            name = MapField(key=True)
+            near_cache = NearCache()
+
+        threads = []
+        listen = AwaitedCached.near_cache.listen
+
+        def recording_listen(connect):
+            """
+            Remembers threads subscribing.
+
+            :param connect: Redis connection.
+            """
+            if AwaitedCached.near_cache._listener_pid is None:  # pylint: disable=protected-access
+                threads.append(threading.current_thread())
+            listen(connect)
+
+        async def scenario():
+            """
+            Loads a cached instance twice.
+            """
+            await AwaitedCached(name='async_cached').asave()
+            for _ in range(2):
+                self.assertEqual((await AwaitedCached.aget('async_cached')).name, 'async_cached')
+
+        AwaitedCached.near_cache.listen = recording_listen
+        try:
+            asyncio.run(scenario())
+        finally:
+            AwaitedCached.near_cache.stop()
+        self.assertEqual(len(threads), 1)
+        self.assertNotIn(threading.current_thread(), threads)
+        self.assertEqual(AwaitedCached.near_cache.stats()['hits'], 1)
+
+    def test_proxies(self):
+        """
+        Async proxies should mirror the blocking ones.
+        """
+        async def scenario():
+            """
+            Uses every kind of async proxy.
+            """
+            redis_hash = AsyncRedisHash('async_hash')
+            await redis_hash.clear()
+            self.assertTrue(redis_hash)
+            redis_hash['a'] = 1
+            redis_hash['b'] = 2
+            await redis_hash.save()
+            self.assertEqual(await redis_hash['a'], b('1'))
+            self.assertEqual(await redis_hash.length(), 2)
+            self.assertTrue(await redis_hash.contains('b'))
+            self.assertRaises(TypeError, lambda: 'b' in redis_hash)
+            redis_hash['c'] = 3
+            self.assertEqual(await redis_hash.get('a', 'c'), [b('1'), b('3')])
+            self.assertEqual(await redis_hash.length(), 3)
+            await redis_hash.prefetch()
+            self.assertEqual(await redis_hash.items(), {b('a'): b('1'), b('b'): b('2'), b('c'): b('3')})
+            del redis_hash['a']
+            self.assertFalse(await redis_hash.contains('a'))
+            self.assertEqual(sorted(await redis_hash.keys()), [b('b'), b('c')])
+            await redis_hash.save()
+            self.assertEqual(await AsyncRedisHash('async_hash')['c'], b('3'))
+
+            redis_list = AsyncRedisList('async_list')
+            await redis_list.clear()
+            for item in (1, 2, 3):
+                await redis_list.append(item)
+            await redis_list.prepend(0)
+            await redis_list.remove(2)
+            await redis_list.set(0, 9)
+            self.assertEqual(await redis_list[:], [b(x) for x in ['9', '1', '3']])
+            self.assertEqual(await redis_list[1], b('1'))
+            self.assertEqual(await redis_list.length(), 3)
+            self.assertRaises(TypeError, lambda: len(redis_list))
+            self.assertTrue(redis_list)
+            self.assertRaises(TypeError, lambda: list(redis_list))
+            self.assertEqual([item async for item in AsyncRedisList('async_list', decode=int)], [9, 1, 3])
+            self.assertEqual([chunk async for chunk in redis_list.iter_chunks(2)], [[b('9'), b('1')], [b('3')]])
+            self.assertEqual(await redis_list.to_list(), [b(x) for x in ['9', '1', '3']])
+            self.assertEqual(await redis_list.extend([4, 5], chunk_size=1), 5)
+            buffered = AsyncRedisList('async_list', buffered=True)
+            self.assertIsNone(await buffered.prepend(8))
+            with mock.patch('redis.asyncio.client.Pipeline.execute', side_effect=redis.ConnectionError):
+                with self.assertRaises(redis.ConnectionError):
+                    await buffered.save()
+            self.assertEqual(buffered.changes, [('lpush', [8])])
+            await buffered.save()
+            self.assertEqual(await redis_list[:], [b(x) for x in ['8', '9', '1', '3', '4', '5']])
+            await redis_list.replace([1, 2])
+            self.assertEqual(await redis_list[:], [b('1'), b('2')])
+            capped = AsyncRedisList('async_list', maxlen=2)
+            self.assertEqual(await capped.append(3), 2)
+            self.assertEqual(await capped.tail(5), [b('2'), b('3')])
+
+            redis_ss = AsyncRedisSortedSet('async_ss')
+            await redis_ss.clear()
+            for score, item in enumerate('abcd'):
+                redis_ss.set_score(item, score)
+            await redis_ss.save()
+            self.assertEqual(await redis_ss.lowest(), (b('a'), 0.0))
+            self.assertEqual(await redis_ss.highest(), (b('d'), 3.0))
+            self.assertEqual(await redis_ss[1:][:], [b(x) for x in 'bcd'])
+            self.assertEqual(await redis_ss[0:][1:3], [b(x) for x in 'bc'])
+            self.assertEqual(await redis_ss[1:2].length(), 2)
+            await redis_ss.delete_range(stop=1)
+            self.assertEqual(await redis_ss.length(), 2)
+
+        asyncio.run(scenario())
+
+
+class ShardingTest(unittest.TestCase):
+    """
+    This suite checks if sharded namespaces route keys correctly.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        We spread two namespaces over separate databases.
+        """
+        common = {name: value for name, value in Config['redis'].items() if name != 'db'}
+        Config.load(sharded=dict(common, shards=[{'db': 1}, {'db': 2}]),
+                    rebalanced=dict(common, shards=[{'db': 3}, {'db': 4}]))
+        for db in (1, 2, 3, 4, 9, 10):
+            redis.Redis(connection_pool=redis.ConnectionPool(db=db, **common)).flushdb()
+
+        class Sharded(RedisModel):
+            """
+            Inner model spread over shards.
+            """
+            namespace = 'sharded'
+            name = MapField(key=True)
+            group = MapField(index=True)
+            rank = MapField(type=int, range_index=True)
+
+        class Rebalanced(RedisModel):
+            """
+            Inner model moved to a new shard.
+            """
+            namespace = 'rebalanced'
+            name = MapField(key=True)
+            rank = MapField(type=int)
+
+        cls.Sharded = Sharded
+        cls.Rebalanced = Rebalanced
+
+    def test_ring(self):
+        """
+        Keys sharing a hash tag belong to the same node and adding a node moves keys only to it.
+        """
+        self.assertEqual(get_hash_key('user.{42}.posts'), b('42'))
+        self.assertEqual(get_hash_key('user.{}.posts'), b('user.{}.posts'))
+        ring = HashRing(['a', 'b', 'c'])
+        self.assertEqual(len(set(ring.get_node('{tag}:%d' % i) for i in range(100))), 1)
+        owners = [ring.get_node(i) for i in range(1000)]
+        self.assertEqual(set(owners), {'a', 'b', 'c'})
+        ring.add('d')
+        moved = [(old, ring.get_node(i)) for i, old in enumerate(owners) if ring.get_node(i) != old]
+        self.assertTrue(moved)
+        self.assertTrue(all(new == 'd' for _, new in moved))
+        self.assertLess(len(moved), 500)
+
+    def test_models(self):
+        """
+        Models in sharded namespaces should be spread over shards and work as usual.
+        """
+        connection = self.Sharded.connect
+        self.assertIsInstance(connection, ShardedRedis)
+        self.Sharded.save_many([self.Sharded(name='shard_%d' % i, group=str(i % 2), rank=i) for i in range(40)])
+        for shard in connection.shards.values():
+            self.assertGreater(shard.dbsize(), 0)
+        oids = ['shard_%d' % i for i in reversed(range(40))] + ['shard_missing']
+        loaded = self.Sharded.get_many(oids, chunk_size=7)
+        self.assertEqual([item.rank if item else None for item in loaded], list(reversed(range(40))) + [None])
+        self.assertEqual(self.Sharded.get('shard_3').group, '1')
+        self.assertEqual(len(self.Sharded.filter(group='0')), 20)
+        self.assertEqual([item.rank for item in self.Sharded.where(rank__gte=35)], [35, 36, 37, 38, 39])
+        self.assertEqual(len(list(self.Sharded.iter_all(batch_size=5))), 40)
+        self.assertEqual(self.Sharded.delete_many(['shard_%d' % i for i in range(10)]), 10)
+        self.assertEqual(connection.delete(*[self.Sharded.get_key('shard_%d' % i) for i in range(10, 20)]), 10)
+        self.assertRaises(CrossShardError, lambda: connection.rename('{a}', '{b}'))
+        connection.set('{pair}.a', 1)
+        connection.rename('{pair}.a', '{pair}.b')
+        self.assertEqual(connection.get('{pair}.b'), b('1'))
+        sharded_list = RedisList('sharded_list', namespace='sharded')
+        for size in (3, 0, 4):
+            sharded_list.replace(range(size), chunk_size=2)
+            self.assertEqual(sharded_list.to_list(), [b(str(item)) for item in range(size)])
+        sharded_queue = WorkQueue('sharded_queue', namespace='sharded')
+        sharded_queue.extend([1, 2])
+        self.assertEqual(sharded_queue.reserve('consumer', 2), [b('1'), b('2')])
+        self.assertEqual(sharded_queue.recover('consumer'), 2)
+        sharded_queue.clear()
+        self.Sharded(name='shard_expiring', group='2', rank=50).save(ttl=0.05)
+        time.sleep(0.1)
+        self.assertEqual(self.Sharded.purge_expired(), 1)
+        self.assertEqual(connection.scard(self.Sharded.get_index_key('group', '2')), 0)
+        self.assertEqual(self.Sharded.where(rank__gte=50).count_all(), 0)
+
+        async def scenario():
+            """
+            Loads instances with an asyncio sharded client.
+            """
+            loaded = await self.Sharded.aget_many(['shard_%d' % i for i in range(15, 25)])
+            self.assertEqual([item.rank if item else None for item in loaded], [None] * 5 + list(range(20, 25)))
+
+        asyncio.run(scenario())
+
+    def test_rebalance(self):
+        """
+        Adding a shard should move keys which belong to it and keep all instances readable.
+        """
+        self.Rebalanced.save_many([self.Rebalanced(name=str(i), rank=i) for i in range(100)], ttl=3600)
+        register = RedisModelRegister('rebalanced')
+        moved = register.add_shard({'db': 9})
+        self.assertGreater(moved, 0)
+        self.assertLess(moved, 100)
+        self.assertEqual(len(Config['rebalanced']['shards']), 3)
+        connection = self.Rebalanced.connect
+        self.assertEqual(connection.shards['localhost:6379/9'].dbsize(), moved)
+        for name, shard in connection.shards.items():
+            self.assertTrue(all(connection.ring.get_node(key) == name for key in shard.keys()))
+        self.assertEqual([item.rank for item in self.Rebalanced.get_many([str(i) for i in range(100)])],
+                         list(range(100)))
+        self.assertGreater(connection.ttl(self.Rebalanced.get_key('1')), 0)
+        self.assertRaises(MapModelException, lambda: RedisModelRegister('redis').add_shard({'db': 11}))
+        for i in range(50):
+            connection.set('other_app:%d' % i, i)
+        moved = register.add_shard({'db': 10}, match=[self.Rebalanced.get_key('*'), 'missing:*'])
+        self.assertEqual(connection.shards['localhost:6379/10'].dbsize(), moved)
+        self.assertTrue(all(key.startswith(b(self.Rebalanced.get_key('')))
+                            for key in connection.shards['localhost:6379/10'].keys()))
+        self.assertEqual([connection.get('other_app:%d' % i) for i in range(50)].count(None),
+                         sum(connection.ring.get_node('other_app:%d' % i) == 'localhost:6379/10' for i in range(50)))
+        self.assertEqual([item.rank for item in self.Rebalanced.get_many([str(i) for i in range(100)])],
+                         list(range(100)))
+
+
+class ReplicationTest(unittest.TestCase):
+    """
+    This suite checks if reads are balanced between replicas.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        We use separate databases as the primary and its replicas. Nothing replicates them,
+        so tests can tell where reads were sent to.
+        """
+        common = {name: value for name, value in Config['redis'].items() if name != 'db'}
+        Config.load(replicated=dict(common, db=6, replicas=[{'db': 7}, {'db': 8}]))
+        for db in (6, 7, 8):
+            redis.Redis(connection_pool=redis.ConnectionPool(db=db, **common)).flushdb()
+
+        class Replicated(RedisModel):
+            """
+            Inner model read from replicas.
+            """
+            namespace = 'replicated'
+            name = MapField(key=True)
+            rank = MapField(type=int)
+
+        class IndexedReplicated(RedisModel):
+            """
+            Inner indexed model read from replicas.
+            """
+            namespace = 'replicated'
+            name = MapField(key=True)
+            group = MapField(index=True)
+
+        cls.Replicated = Replicated
+        cls.IndexedReplicated = IndexedReplicated
+
+    def replicate(self, key):
+        """
+        This method copies a hash from the primary to replicas.
+
+        :param key: Redis key.
+        """
+        connection = self.Replicated.connect
+        for replica in connection.replicas:
+            replica.hset(key, mapping=connection.primary.hgetall(key))
+
+    def test_routing(self):
+        """
+        Writes should go to the primary and reads to replicas, unless forced to the primary.
+        """
+        connection = self.Replicated.connect
+        self.assertIsInstance(connection, ReplicatedRedis)
+        self.Replicated(name='a', rank=1).save()
+        self.assertRaises(RedisModelException, lambda: self.Replicated.get('a'))
+        with use_primary():
+            self.assertEqual(self.Replicated.get('a').rank, 1)
+        self.assertEqual(self.Replicated.get('a', primary=True).rank, 1)
+        self.assertEqual([item.rank for item in self.Replicated.get_many(['a'], primary=True)], [1])
+        self.assertRaises(RedisModelException, lambda: self.Replicated.get('a', primary=False))
+        self.replicate(self.Replicated.get_key('a'))
+        reads = connection.replica_reads
+        self.assertEqual([item.rank for item in self.Replicated.get_many(['a', 'a'])], [1, 1])
+        self.assertEqual(self.Replicated.get('a').rank, 1)
+        self.assertEqual(connection.replica_reads, reads + 2)
+
+        redis_hash = RedisHash('replicated_hash', namespace='replicated')
+        redis_hash['x'] = 1
+        redis_hash.save()
+        self.assertIsNone(redis_hash['x'])
+        self.assertEqual(len(redis_hash), 0)
+        with use_primary():
+            self.assertEqual(redis_hash['x'], b('1'))
+            self.assertEqual(len(redis_hash), 1)
+
+    def test_delete_indexed(self):
+        """
+        Indexed values of instances removed without being loaded should be read from the primary.
+        """
+        connection = self.IndexedReplicated.connect
+        self.IndexedReplicated(name='c', group='x').save()
+        self.IndexedReplicated(name='d', group='x').save()
+        with mock.patch.object(connection, '_check', return_value=True):
+            connection.check_replicas()
+            self.IndexedReplicated(name='d').delete()
+            self.assertEqual(self.IndexedReplicated.delete_many(['c']), 1)
+        self.assertEqual(connection.primary.scard(self.IndexedReplicated.get_index_key('group', 'x')), 0)
+
+    def test_fallback(self):
+        """
+        Reads should fall back to the primary when replicas fail or lag behind.
+        """
+        connection = self.Replicated.connect
+        self.Replicated(name='b', rank=2).save()
+        with mock.patch.object(connection.replicas[0], 'pipeline', side_effect=redis.ConnectionError), \
+                mock.patch.object(connection.replicas[1], 'pipeline', side_effect=redis.ConnectionError):
+            reads = connection.primary_reads
+            self.assertEqual(self.Replicated.get('b').rank, 2)
+            self.assertEqual(self.Replicated.get('b').rank, 2)
+            self.assertEqual(connection.primary_reads, reads + 2)
+
+        connection.check_interval = 3600
+        lagging = {'role': 'slave', 'master_link_status': 'up', 'master_last_io_seconds_ago': 60}
+        first, second = connection.replicas
+        with mock.patch.object(first, 'info', return_value=lagging), \
+                mock.patch.object(second, 'info', return_value=dict(lagging, master_link_status='down')):
+            connection.check_replicas()
+        self.assertEqual(self.Replicated.get('b').rank, 2)
+        recent = dict(lagging, master_last_io_seconds_ago=1)
+        with mock.patch.object(first, 'info', return_value=recent), \
+                mock.patch.object(second, 'info', return_value=recent):
+            connection.check_replicas()
+        self.assertRaises(RedisModelException, lambda: self.Replicated.get('b'))
+
+        def check_offsets(primary, replicas):
+            """
+            Checks replicas with given replication offsets.
+            """
+            with mock.patch.object(connection.primary, 'info', return_value={'master_repl_offset': primary}), \
+                    mock.patch.object(first, 'info', return_value=dict(recent, slave_repl_offset=replicas[0])), \
+                    mock.patch.object(second, 'info', return_value=dict(recent, slave_repl_offset=replicas[1])):
+                connection.check_replicas()
+            return list(connection._usable)  # pylint: disable=protected-access
+
+        self.assertEqual(check_offsets(100, (50, 100)), [True, True])
+        self.assertEqual(check_offsets(200, (60, 150)), [False, True])
+        self.assertEqual(check_offsets(300, (150, 300)), [True, True])
+        time.sleep(0.05)
+        connection.max_lag = 0.01
+        self.assertEqual(check_offsets(400, (150, 400)), [False, True])
+        connection.max_lag = 10
+        checks = []
+        connection.check_interval = 0
+        with mock.patch.object(connection, '_check', side_effect=lambda index: checks.append(
+                threading.current_thread().name) or True):
+            connection.get('b')
+            for thread in threading.enumerate():
+                if thread.name == 'replica-check':
+                    thread.join()
+        self.assertTrue(checks)
+        self.assertEqual(set(checks), {'replica-check'})
+        connection.check_interval = 1
+
 
 class ElasticsearchModelTest(unittest.TestCase):
     """
@@ -481,6 +2081,25 @@ class ElasticsearchModelTest(unittest.TestCase):
         self.assertEqual(loaded.value, inheriting.value)
         self.assertRaises(ElasticsearchModelException, lambda: self.Inheriting.get(123456))
 
+    def test_get_many(self):
+        """
+        Instances should be loaded in bulk, blocking and asynchronously, in the order of ids.
+        """
+        self.Inheriting(name='many_a', fame=1).save()
+        self.Inheriting(name='many_b', fame=2).save()
+        oids = ['many_b', 'many_missing', 'many_a']
+        self.assertEqual([item.fame if item else None for item in self.Inheriting.get_many(oids)], [2, None, 1])
+        self.assertEqual([item.fame for item in self.Inheriting.get_many(oids, skip_missing=True)], [2, 1])
+
+        async def scenario():
+            """
+            Loads instances asynchronously.
+            """
+            loaded = await self.Inheriting.aget_many(oids)
+            self.assertEqual([item.fame if item else None for item in loaded], [2, None, 1])
+
+        asyncio.run(scenario())
+
     def test_dump(self):
         """
         We shall make sure all kinds of dumping (Python or JSON) are working.
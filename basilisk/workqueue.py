@@ -0,0 +1,380 @@
+"""
+This module defines a reliable work queue kept in Redis lists.
+
+Jobs are pushed at the end of the queue's list (with append or extend) and consumed from
+its beginning. Consumers reserve jobs by atomically moving them (LMOVE) to their own processing
+lists and acknowledge them once they're handled, so jobs of a consumer which crashed aren't lost.
+Every consumer keeps a lease, renewed whenever it reserves jobs and while it handles them - jobs
+of consumers whose lease expired are moved back to the queue by requeue_expired, which checks
+the lease and moves the jobs atomically. Jobs are thus delivered at least once.
+
+All keys of a queue share its hash tag, so queues work in sharded namespaces as well.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+from .redis_entities import RedisList
+
+__all__ = ['WorkQueue', 'QueueConsumer']
+
+DEFAULT_VISIBILITY_TIMEOUT = 30
+DEFAULT_BATCH_SIZE = 100
+
+# KEYS: consumer's lease, processing list, queue, set of consumers. ARGV: consumer's name.
+REQUEUE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return -1
+end
+local requeued = 0
+while redis.call('LMOVE', KEYS[2], KEYS[3], 'RIGHT', 'LEFT') do
+    requeued = requeued + 1
+end
+redis.call('SREM', KEYS[4], ARGV[1])
+return requeued
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class WorkQueue(RedisList):
+    """
+    This class is a work queue built on RedisList. Jobs may be popped in batches (pop_many)
+    or reserved by named consumers and acknowledged (reserve, ack and release).
+
+    Reserved jobs are returned as Redis returns them, as they're needed to acknowledge jobs,
+    decode function of the list is applied by QueueConsumer.
+
+    :type visibility_timeout: float
+    """
+
+    def __init__(self, name, namespace=None, decode=None, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT):
+        """
+        This function initializes the queue.
+
+        :param name: name of the queue.
+        :param namespace: name of connection used by this instance.
+        :param decode: function pythonizing jobs or None.
+        :param visibility_timeout: number of seconds after which jobs reserved by a consumer
+         which hasn't renewed its lease are requeued.
+        """
+        super(WorkQueue, self).__init__(name, namespace, decode)
+        self.visibility_timeout = visibility_timeout
+
+    def pop_many(self, count, timeout=None):
+        """
+        This method pops up to count jobs from the beginning of the queue with a single LMPOP
+        (or BLMPOP, if timeout is given). Popped jobs aren't tracked, so they're lost if they
+        aren't handled.
+
+        :param count: maximum number of jobs.
+        :param timeout: number of seconds to wait for jobs (0 waits forever) or None not to wait.
+        :returns: list of jobs.
+        """
+        key = self.get_instance_key()
+        if timeout is None:
+            result = self.connect.lmpop(1, key, direction='LEFT', count=count)
+        else:
+            result = self.connect.blmpop(timeout, 1, key, direction='LEFT', count=count)
+        return self.decode_many(result[1]) if result else []
+
+    def reserve(self, consumer, count=1, timeout=None):
+        """
+        This method moves up to count jobs from the beginning of the queue to consumer's processing
+        list and renews consumer's lease in a single pipeline. If the queue is empty and timeout
+        is given, it waits for the first job with BLMOVE and renews the lease again along with
+        moving the rest of the jobs, as it may have expired while waiting.
+
+        :param consumer: consumer's name.
+        :param count: maximum number of jobs.
+        :param timeout: number of seconds to wait for jobs (0 waits forever) or None not to wait.
+        :returns: list of jobs.
+        """
+        key, processing = self.get_instance_key(), self.get_processing_key(consumer)
+        jobs = self._move(key, processing, count, self._queue_lease(consumer))
+        if not jobs and timeout is not None:
+            job = self.connect.blmove(key, processing, timeout, 'LEFT', 'RIGHT')
+            if job is not None:
+                jobs = [job] + self._move(key, processing, count - 1, self._queue_lease(consumer))
+        return jobs
+
+    def ack(self, consumer, *jobs):
+        """
+        This method removes handled jobs from consumer's processing list.
+
+        :param consumer: consumer's name.
+        :param jobs: jobs, as returned by reserve.
+        :returns: number of acknowledged jobs.
+        """
+        return len(self._remove(consumer, jobs))
+
+    def release(self, consumer, *jobs):
+        """
+        This method moves jobs which weren't handled from consumer's processing list to the end
+        of the queue. Jobs which have been requeued already are skipped.
+
+        :param consumer: consumer's name.
+        :param jobs: jobs, as returned by reserve.
+        :returns: number of released jobs.
+        """
+        removed = self._remove(consumer, jobs)
+        if removed:
+            self.connect.rpush(self.get_instance_key(), *removed)
+        return len(removed)
+
+    def processing(self, consumer):
+        """
+        This method returns jobs reserved by a consumer and not acknowledged yet.
+
+        :param consumer: consumer's name.
+        :returns: list of jobs.
+        """
+        return self.connect.lrange(self.get_processing_key(consumer), 0, -1)
+
+    def recover(self, consumer):
+        """
+        This method moves all jobs reserved by a consumer back to the beginning of the queue,
+        keeping their order, and forgets the consumer.
+
+        :param consumer: consumer's name.
+        :returns: number of requeued jobs.
+        """
+        processing = self.get_processing_key(consumer)
+        pipe = self.connect.pipeline(transaction=False)
+        for _ in range(self.connect.llen(processing)):
+            pipe.lmove(processing, self.get_instance_key(), 'RIGHT', 'LEFT')
+        pipe.srem(self.get_consumers_key(), consumer)
+        return sum(1 for job in pipe.execute()[:-1] if job is not None)
+
+    def requeue_expired(self):
+        """
+        This method requeues jobs of consumers whose lease expired. Every lease is checked in the same
+        script which moves the jobs, so jobs of consumers which have just renewed their lease are kept.
+
+        :returns: number of requeued jobs.
+        """
+        consumers = self.consumers()
+        if not consumers:
+            return 0
+        pipe = self.connect.pipeline(transaction=False)
+        for consumer in consumers:
+            pipe.eval(REQUEUE_SCRIPT, 4, self.get_lease_key(consumer), self.get_processing_key(consumer),
+                      self.get_instance_key(), self.get_consumers_key(), consumer)
+        return sum(max(requeued, 0) for requeued in pipe.execute())
+
+    def renew(self, consumer):
+        """
+        This method renews consumer's lease, so its jobs aren't requeued while they're handled.
+
+        :param consumer: consumer's name.
+        """
+        self._queue_lease(consumer).execute()
+
+    def consumers(self):
+        """
+        This method returns names of consumers which reserved jobs and weren't recovered yet.
+
+        :returns: list of consumers' names.
+        """
+        return sorted(consumer.decode('utf-8') if isinstance(consumer, bytes) else consumer
+                      for consumer in self.connect.smembers(self.get_consumers_key()))
+
+    def clear(self):
+        """
+        This removes the queue, processing lists and leases of its consumers from Redis.
+        """
+        consumers = self.consumers()
+        keys = [self.get_instance_key(), self.get_consumers_key()]
+        keys.extend(self.get_processing_key(consumer) for consumer in consumers)
+        keys.extend(self.get_lease_key(consumer) for consumer in consumers)
+        self.connect.delete(*keys)
+
+    def _queue_lease(self, consumer):
+        """
+        This method creates a pipeline renewing consumer's lease.
+
+        :param consumer: consumer's name.
+        :returns: Redis pipeline.
+        """
+        pipe = self.connect.pipeline(transaction=False)
+        pipe.sadd(self.get_consumers_key(), consumer)
+        pipe.set(self.get_lease_key(consumer), 1, px=int(self.visibility_timeout * 1000))
+        return pipe
+
+    def _move(self, source, destination, count, pipe=None):
+        """
+        This method moves up to count jobs from the beginning of source to the end of destination
+        with pipelined LMOVEs.
+
+        :param source: source key.
+        :param destination: destination key.
+        :param count: maximum number of jobs.
+        :param pipe: pipeline with other commands already queued or None.
+        :returns: list of moved jobs.
+        """
+        if pipe is None:
+            pipe = self.connect.pipeline(transaction=False)
+        queued = len(pipe)
+        for _ in range(count):
+            pipe.lmove(source, destination, 'LEFT', 'RIGHT')
+        return [job for job in pipe.execute()[queued:] if job is not None] if len(pipe) else []
+
+    def _remove(self, consumer, jobs):
+        """
+        This method removes jobs from consumer's processing list.
+
+        :param consumer: consumer's name.
+        :param jobs: jobs, as returned by reserve.
+        :returns: list of removed jobs.
+        """
+        if not jobs:
+            return []
+        processing = self.get_processing_key(consumer)
+        pipe = self.connect.pipeline(transaction=False)
+        for job in jobs:
+            pipe.lrem(processing, 1, job)
+        return [job for job, removed in zip(jobs, pipe.execute()) if removed]
+
+    def get_processing_key(self, consumer):
+        """
+        This function creates a key of consumer's processing list.
+
+        :param consumer: consumer's name.
+        :returns: Redis key.
+        """
+        return self.get_related_key('processing:' + consumer)
+
+    def get_lease_key(self, consumer):
+        """
+        This function creates a key of consumer's lease.
+
+        :param consumer: consumer's name.
+        :returns: Redis key.
+        """
+        return self.get_related_key('lease:' + consumer)
+
+    def get_consumers_key(self):
+        """
+        This function creates a key of the set of queue's consumers.
+
+        :returns: Redis key.
+        """
+        return self.get_related_key('consumers')
+
+
+class QueueConsumer(object):
+    """
+    This class consumes jobs of a WorkQueue with a pool of threads. Jobs are reserved in batches,
+    handled by handler in pool's threads and acknowledged together - jobs whose handler raised
+    an exception are logged and released to the end of the queue. The lease is renewed every third
+    of queue's visibility timeout until the batch is handled. Jobs of expired consumers are requeued
+    every requeue_interval seconds.
+
+    :type queue: WorkQueue
+    """
+
+    def __init__(self, queue, handler, threads=4, batch_size=DEFAULT_BATCH_SIZE, timeout=1, name=None,
+                 requeue_interval=None):
+        """
+        This method sets up the consumer.
+
+        :param queue: WorkQueue.
+        :param handler: function called with every decoded job.
+        :param threads: number of threads handling jobs.
+        :param batch_size: maximum number of jobs reserved at once.
+        :param timeout: number of seconds to wait for jobs before checking whether the consumer was stopped.
+        :param name: consumer's name, unique by default. Jobs left by a consumer with the same name are
+         requeued on start.
+        :param requeue_interval: number of seconds between checks of expired consumers,
+         by default queue's visibility timeout.
+        """
+        self.queue = queue
+        self.handler = handler
+        self.threads = threads
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.name = name or '{}:{}:{}'.format(socket.gethostname(), os.getpid(), uuid.uuid4().hex[:8])
+        self.requeue_interval = queue.visibility_timeout if requeue_interval is None else requeue_interval
+        self.handled = 0
+        self.failed = 0
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def run(self):
+        """
+        This method consumes jobs until the consumer is stopped.
+        """
+        self.queue.recover(self.name)
+        requeued = 0
+        with ThreadPoolExecutor(self.threads) as executor:
+            while not self._stopped.is_set():
+                if time.time() - requeued >= self.requeue_interval:
+                    self.queue.requeue_expired()
+                    requeued = time.time()
+                self.run_batch(executor)
+
+    def run_batch(self, executor):
+        """
+        This method reserves, handles and acknowledges a batch of jobs.
+
+        :param executor: concurrent.futures.Executor running the handler.
+        :returns: number of reserved jobs.
+        """
+        jobs = self.queue.reserve(self.name, self.batch_size, self.timeout)
+        if not jobs:
+            return 0
+        futures = [executor.submit(self._handle, value) for value in self.queue.decode_many(jobs)]
+        pending = futures
+        while pending:
+            pending = wait_futures(pending, self.queue.visibility_timeout / 3.0).not_done
+            if pending:
+                self.queue.renew(self.name)
+        results = [future.result() for future in futures]
+        done = [job for job, result in zip(jobs, results) if result]
+        failed = [job for job, result in zip(jobs, results) if not result]
+        self.queue.ack(self.name, *done)
+        self.queue.release(self.name, *failed)
+        self.handled += len(done)
+        self.failed += len(failed)
+        return len(jobs)
+
+    def _handle(self, value):
+        """
+        This method calls the handler.
+
+        :param value: decoded job.
+        :returns: whether the job was handled without an exception.
+        """
+        try:
+            self.handler(value)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception('Consumer %s failed to handle a job of queue %s', self.name, self.queue.name)
+            return False
+        return True
+
+    def start(self):
+        """
+        This method starts consuming jobs in a background thread.
+
+        :returns: self
+        """
+        self._thread = threading.Thread(target=self.run, name=self.name)
+        self._thread.daemon = True
+        self._stopped.clear()
+        self._thread.start()
+        return self
+
+    def stop(self, wait=True):
+        """
+        This method stops the consumer once it's done with the current batch.
+
+        :param wait: whether to wait for the background thread.
+        """
+        self._stopped.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+            self._thread = None
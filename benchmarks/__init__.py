@@ -0,0 +1,8 @@
+"""
+Basilisk's benchmark suite. Run all benchmarks with:
+
+    python -m benchmarks
+
+or a single one with e.g. python -m benchmarks.import_time. Every benchmark module
+exposes run(), which prints its report.
+"""
@@ -0,0 +1,20 @@
+"""
+This module runs all benchmarks.
+"""
+from . import import_time, memory, serialization, work_queue
+
+BENCHMARKS = [import_time, serialization, memory, work_queue]
+
+
+def main():
+    """
+    Runs every benchmark in turn.
+    """
+    for benchmark in BENCHMARKS:
+        print('== {} =='.format(benchmark.__name__))
+        benchmark.run()
+        print('')
+
+
+if __name__ == '__main__':
+    main()
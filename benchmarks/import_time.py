@@ -0,0 +1,59 @@
+"""
+This benchmark measures how long it takes to import basilisk in a fresh interpreter
+and which client libraries get imported along the way.
+"""
+import json
+import statistics
+import subprocess
+import sys
+
+REPEAT = 10
+
+SCRIPTS = {
+    'import basilisk': 'import basilisk',
+    'import basilisk, define RedisModel': (
+        'import basilisk\n'
+        'class Item(basilisk.RedisModel):\n'
+        '    id = basilisk.MapField(key=True)\n'
+    ),
+    'import basilisk, touch ElasticsearchModel': 'import basilisk\nbasilisk.ElasticsearchModel',
+    'import redis': 'import redis',
+    'import elasticsearch': 'import elasticsearch',
+}
+
+TEMPLATE = '''
+import json, sys, time
+start = time.perf_counter()
+{}
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, [name for name in ('redis', 'elasticsearch') if name in sys.modules]]))
+'''
+
+
+def measure(script):
+    """
+    Runs the script in fresh interpreters.
+
+    :param script: Python code to measure.
+    :returns: 2-tuple containing median time in seconds and a list of imported client libraries.
+    """
+    timings = []
+    libraries = []
+    for _ in range(REPEAT):
+        output = subprocess.check_output([sys.executable, '-c', TEMPLATE.format(script)])
+        elapsed, libraries = json.loads(output.decode('utf-8'))
+        timings.append(elapsed)
+    return statistics.median(timings), libraries
+
+
+def run():
+    """
+    Prints median import times.
+    """
+    for name, script in SCRIPTS.items():
+        elapsed, libraries = measure(script)
+        print('{:<45} {:8.2f} ms   client libraries: {}'.format(name, elapsed * 1000, ', '.join(libraries) or '-'))
+
+
+if __name__ == '__main__':
+    run()
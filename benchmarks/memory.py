@@ -0,0 +1,75 @@
+"""
+This benchmark compares memory used by regular and compact (slotted) model instances
+hydrated from the same data. No NoSQL store is involved.
+"""
+import gc
+import tracemalloc
+
+from basilisk import MapField, RedisModel
+
+INSTANCES = 100000
+
+
+class Regular(RedisModel):
+    """
+    A model keeping values in __dict__.
+    """
+    namespace = 'benchmark'
+    id = MapField(key=True)
+    title = MapField()
+    author = MapField()
+    section = MapField()
+    url = MapField()
+    published = MapField(type=int)
+    updated = MapField(type=int)
+    score = MapField(type=float)
+
+
+class Compact(RedisModel):
+    """
+    The same model keeping values in slots.
+    """
+    namespace = 'benchmark'
+    compact = True
+    id = MapField(key=True)
+    title = MapField()
+    author = MapField()
+    section = MapField()
+    url = MapField()
+    published = MapField(type=int)
+    updated = MapField(type=int)
+    score = MapField(type=float)
+
+
+def measure(model, data):
+    """
+    This function measures memory allocated by hydrating instances of the model.
+
+    :param model: model class.
+    :param data: list of pythonized data, shared by all measurements.
+    :returns: number of bytes per instance.
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    instances = [model.hydrate(values) for values in data]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before - len(instances) * 8) / float(len(instances))
+
+
+def run():
+    """
+    Prints memory used per instance.
+    """
+    data = [Regular.pythonize({'id': str(i), 'title': 'Title', 'author': 'Author', 'section': 'news',
+                               'url': 'https://example.com/{}'.format(i), 'published': '1500000000',
+                               'updated': '1500000001', 'score': '0.5'}) for i in range(INSTANCES)]
+    regular, compact = measure(Regular, data), measure(Compact, data)
+    print('{} instances, {} fields, values excluded'.format(INSTANCES, len(Regular.get_fields())))
+    print('regular  {:7.1f} bytes per instance'.format(regular))
+    print('compact  {:7.1f} bytes per instance   {:.0%} saved'.format(compact, 1 - compact / regular))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,78 @@
+"""
+This benchmark compares CPU time of initializing, serializing and pythonizing model instances
+with generic MapModelBase methods and with functions compiled for the model. No NoSQL store
+is involved.
+"""
+import timeit
+
+from basilisk import JsonMapField, MapField, MapModelBase, RedisModel
+
+INSTANCES = 1000
+REPEAT = 5
+
+
+class Article(RedisModel):
+    """
+    A model with a typical mix of fields.
+    """
+    namespace = 'benchmark'
+    id = MapField(key=True)
+    title = MapField()
+    lead = MapField()
+    author = MapField()
+    section = MapField()
+    url = MapField()
+    published = MapField(type=int)
+    updated = MapField(type=int)
+    score = MapField(type=float)
+    tags = JsonMapField()
+
+
+def get_data():
+    """
+    This function creates data as returned by HGETALL.
+
+    :returns: list of dicts.
+    """
+    return [{b'id': str(i).encode(), b'title': b'Title', b'lead': b'Lead', b'author': b'Author', b'section': b'news',
+             b'url': b'https://example.com/%d' % i, b'published': b'1500000000', b'updated': b'1500000001',
+             b'score': b'0.5', b'tags': b'["a", "b"]'} for i in range(INSTANCES)]
+
+
+def measure(function):
+    """
+    This function measures the best time of calling function.
+
+    :param function: function without arguments.
+    :returns: time in seconds.
+    """
+    return min(timeit.repeat(function, number=1, repeat=REPEAT))
+
+
+def run():
+    """
+    Prints times of generic and compiled functions per operation.
+    """
+    data = get_data()
+    pythonized = [Article.pythonize(values) for values in data]
+    instances = [Article(**values) for values in pythonized]
+    # pylint: disable=protected-access
+    generic_decode = MapModelBase.__dict__['_decode'].__func__
+    blank = Article()
+    operations = [
+        ('pythonize', lambda: [generic_decode(Article, values) for values in data],
+         lambda: [Article._decode(values) for values in data]),
+        ('__init__', lambda: [MapModelBase._init_fields(blank, values) for values in pythonized],
+         lambda: [blank._init_fields(values) for values in pythonized]),
+        ('serialize', lambda: [MapModelBase._encode(instance, None) for instance in instances],
+         lambda: [instance._encode(None) for instance in instances]),
+    ]
+    print('{} instances, {} fields'.format(INSTANCES, len(Article.get_fields())))
+    for name, generic, compiled in operations:
+        generic_time, compiled_time = measure(generic), measure(compiled)
+        print('{:<10} generic {:7.2f} ms   compiled {:7.2f} ms   speedup {:.1f}x'.format(
+            name, generic_time * 1000, compiled_time * 1000, generic_time / compiled_time))
+
+
+if __name__ == '__main__':
+    run()
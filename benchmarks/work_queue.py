@@ -0,0 +1,88 @@
+"""
+This benchmark measures throughput of consuming jobs kept in a Redis list: popping them
+one by one (like a polling loop calling RedisList.pop), popping them in batches with LMPOP
+and consuming them reliably with QueueConsumer.
+
+It needs a Redis server, configured with REDIS_HOST, REDIS_PORT and REDIS_DB environment
+variables (localhost:6379, db 15 by default). The benchmark's keys are removed afterwards.
+"""
+import os
+import time
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from basilisk import Config
+from basilisk.workqueue import QueueConsumer, WorkQueue
+
+JOBS = 10000
+BATCH_SIZE = 100
+THREADS = 4
+
+
+def fill(queue):
+    """
+    This function fills the queue with jobs.
+
+    :param queue: WorkQueue.
+    """
+    queue.clear()
+    queue.extend(range(JOBS), chunk_size=1000)
+
+
+def pop_one_by_one(queue):
+    """
+    Pops jobs with a command per job.
+
+    :param queue: WorkQueue.
+    """
+    while queue.pop(first=True) is not None:
+        pass
+
+
+def pop_batches(queue):
+    """
+    Pops jobs with LMPOP.
+
+    :param queue: WorkQueue.
+    """
+    while queue.pop_many(BATCH_SIZE):
+        pass
+
+
+def consume(queue):
+    """
+    Consumes jobs reliably with a pool of threads.
+
+    :param queue: WorkQueue.
+    """
+    consumer = QueueConsumer(queue, lambda job: None, threads=THREADS, batch_size=BATCH_SIZE, timeout=0.1).start()
+    while len(queue) or queue.processing(consumer.name):
+        time.sleep(0.01)
+    consumer.stop()
+
+
+def run():
+    """
+    Prints the number of jobs consumed per second by every method.
+    """
+    Config.load(benchmark={'host': os.environ.get('REDIS_HOST', 'localhost'),
+                           'port': int(os.environ.get('REDIS_PORT', 6379)),
+                           'db': int(os.environ.get('REDIS_DB', 15))})
+    queue = WorkQueue('benchmark_queue', namespace='benchmark')
+    try:
+        queue.clear()
+    except RedisConnectionError:
+        print('Redis is not available, skipped.')
+        return
+    print('{} jobs, batches of {}, {} consumer threads'.format(JOBS, BATCH_SIZE, THREADS))
+    for name, method in (('pop', pop_one_by_one), ('pop_many', pop_batches), ('QueueConsumer', consume)):
+        fill(queue)
+        start = time.perf_counter()
+        method(queue)
+        elapsed = time.perf_counter() - start
+        print('{:<14} {:9.0f} jobs/s'.format(name, JOBS / elapsed))
+    queue.clear()
+
+
+if __name__ == '__main__':
+    run()
@@ -1,15 +1,16 @@
-from distutils.core import setup
+from setuptools import setup
 
 setup(
     name='basilisk',
     packages=['basilisk'],
     version='0.1',
+    python_requires='>=3.7',
     install_requires=[
         'six',
-        'redis',
+        'redis>=4.2',
         'elasticsearch'
     ],
-    description='Basilisk is a object-NoSQL mapper for Python 2.7 and 3.3+,'
+    description='Basilisk is a object-NoSQL mapper for Python 3.7+, '
                 'supporting models, lists, hashes and sorted sets.',
     author='Bonnier Business Polska / Krzysztof Bujniewicz',
     author_email='racech@gmail.com',